@@ -0,0 +1,12 @@
+USE EMPORIA_DB;
+
+-- Track the last modification of every product for the change feed
+ALTER TABLE products
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_products_updated_at (updated_at, id);
+
+CREATE TABLE IF NOT EXISTS product_tombstones (
+    product_id INT PRIMARY KEY,
+    deleted_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_product_tombstones_deleted_at (deleted_at, product_id)
+);
@@ -0,0 +1,32 @@
+USE EMPORIA_DB;
+
+-- Link each order to the checkout saga that created it, so recovery can find
+-- orders whose creation was never acknowledged in the saga log
+ALTER TABLE orders
+    ADD COLUMN saga_id CHAR(32) NULL,
+    ADD UNIQUE INDEX idx_orders_saga_id (saga_id);
+
+CREATE TABLE IF NOT EXISTS order_sagas (
+    id CHAR(32) PRIMARY KEY,
+    customer_id INT,
+    payment_method VARCHAR(50),
+    order_id INT NULL,
+    status VARCHAR(32) NOT NULL DEFAULT 'running',
+    recovery_attempts INT NOT NULL DEFAULT 0,
+    claimed_by CHAR(32) NULL,
+    created_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_order_sagas_status_updated_at (status, updated_at),
+    INDEX idx_order_sagas_claimed_by (claimed_by)
+);
+
+CREATE TABLE IF NOT EXISTS order_saga_log (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    saga_id CHAR(32) NOT NULL,
+    step VARCHAR(64) NOT NULL,
+    event VARCHAR(32) NOT NULL,
+    data JSON NULL,
+    created_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (saga_id) REFERENCES order_sagas(id) ON DELETE CASCADE,
+    INDEX idx_order_saga_log_saga (saga_id, id)
+);
@@ -0,0 +1,6 @@
+USE EMPORIA_DB;
+
+-- Status transitions are single guarded UPDATEs; the status they replaced
+-- is kept here so a transition can be undone without reading the order
+ALTER TABLE orders
+    ADD COLUMN previous_status VARCHAR(50) NULL AFTER status;
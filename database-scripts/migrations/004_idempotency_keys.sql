@@ -0,0 +1,16 @@
+USE EMPORIA_DB;
+
+-- Responses of keyed POST /orders requests, replayed when a client retries
+-- with the same Idempotency-Key; rows are purged once expires_at passes
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    customer_id INT NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'in_progress',
+    response_code SMALLINT NULL,
+    response_body MEDIUMTEXT NULL,
+    created_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    expires_at TIMESTAMP(6) NOT NULL,
+    PRIMARY KEY (customer_id, idempotency_key),
+    INDEX idx_idempotency_keys_expires_at (expires_at)
+);
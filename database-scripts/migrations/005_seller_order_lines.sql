@@ -0,0 +1,29 @@
+USE EMPORIA_DB;
+
+-- Order items copied per seller when an order is created, so a seller's
+-- orders are read from one index instead of the whole order_items history
+CREATE TABLE IF NOT EXISTS seller_order_lines (
+    order_item_id INT PRIMARY KEY,
+    seller_id INT NOT NULL,
+    order_id INT NOT NULL,
+    customer_id INT,
+    product_id INT NOT NULL,
+    product_name VARCHAR(255),
+    quantity INT NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    order_date TIMESTAMP NULL,
+    FOREIGN KEY (order_item_id) REFERENCES order_items(id),
+    FOREIGN KEY (order_id) REFERENCES orders(id),
+    INDEX idx_seller_order_lines_seller (seller_id, order_item_id),
+    INDEX idx_seller_order_lines_order (order_id)
+);
+
+-- Backfill the orders placed before this migration
+INSERT IGNORE INTO seller_order_lines
+    (order_item_id, seller_id, order_id, customer_id, product_id,
+     product_name, quantity, price, order_date)
+SELECT oi.id, p.seller_id, oi.order_id, o.customer_id, oi.product_id,
+       p.name, oi.quantity, oi.price, o.order_date
+FROM order_items oi
+JOIN orders o ON o.id = oi.order_id
+JOIN products p ON p.id = oi.product_id;
@@ -0,0 +1,21 @@
+USE EMPORIA_DB;
+
+-- Units and revenue of sold order lines per product and day. Paying an order
+-- adds its lines and cancelling a paid one subtracts them, in the same
+-- transaction as the status change. Fill it for existing orders with
+-- scripts/rebuild_sales_rollups.py
+CREATE TABLE IF NOT EXISTS sales_daily (
+    day DATE NOT NULL,
+    product_id INT NOT NULL,
+    seller_id INT,
+    category_id INT,
+    units INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, product_id),
+    INDEX idx_sales_daily_seller (seller_id, day),
+    INDEX idx_sales_daily_category (category_id, day)
+);
+
+-- The rebuild reads orders one date range at a time
+ALTER TABLE orders
+    ADD INDEX idx_orders_order_date (order_date);
@@ -0,0 +1,17 @@
+USE EMPORIA_DB;
+
+-- Co-occurrence counts behind GET /products/{id}/related, folded in
+-- incrementally from the orders placed after recommendation_state.watermark
+CREATE TABLE IF NOT EXISTS product_pairs (
+    product_id INT NOT NULL,
+    related_id INT NOT NULL,
+    orders INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    PRIMARY KEY (product_id, related_id),
+    INDEX idx_product_pairs_updated_at (updated_at)
+);
+
+CREATE TABLE IF NOT EXISTS recommendation_state (
+    name VARCHAR(64) PRIMARY KEY,
+    watermark BIGINT NOT NULL DEFAULT 0
+);
@@ -0,0 +1,13 @@
+USE EMPORIA_DB;
+
+-- Popularity from views and orders, decaying with TRENDING_HALF_LIFE. Each
+-- score is stored as log(score) + decay * (t - epoch) so the plain column
+-- ranks products and workers can merge increments with a log-sum-exp
+CREATE TABLE IF NOT EXISTS product_trending (
+    product_id INT PRIMARY KEY,
+    category_id INT NULL,
+    log_score DOUBLE NOT NULL,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_product_trending_score (log_score),
+    INDEX idx_product_trending_category_score (category_id, log_score)
+);
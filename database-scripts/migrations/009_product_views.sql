@@ -0,0 +1,11 @@
+USE EMPORIA_DB;
+
+-- Views of GET /products/{id} per product and day. Workers count views in
+-- memory and add them here with one batched upsert per flush interval
+CREATE TABLE IF NOT EXISTS product_views (
+    day DATE NOT NULL,
+    product_id INT NOT NULL,
+    views BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, product_id),
+    INDEX idx_product_views_product (product_id, day)
+);
@@ -0,0 +1,25 @@
+USE EMPORIA_DB;
+
+-- Order events behind product_pairs: +1 when an order is paid, -1 when a
+-- sold order is cancelled or its payment reverted, written in the same
+-- transaction as the status change. The recommendation builder counts and
+-- deletes them, replacing the orders.id watermark that missed orders paid
+-- late and never subtracted cancelled ones
+CREATE TABLE IF NOT EXISTS recommendation_events (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    order_id INT NOT NULL,
+    sign TINYINT NOT NULL,
+    created_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+);
+
+-- recommendation_state only holds the builder lock row now
+ALTER TABLE recommendation_state
+    DROP COLUMN watermark;
+
+-- Recount from scratch: one event for every order sold today
+TRUNCATE TABLE product_pairs;
+
+INSERT INTO recommendation_events (order_id, sign)
+SELECT id, 1 FROM orders
+WHERE status IN ('paid', 'shipped', 'delivered')
+ORDER BY id;
@@ -53,9 +53,18 @@ CREATE TABLE IF NOT EXISTS products (
     price DECIMAL(10, 2) NOT NULL,
     stock INT NOT NULL,
     seller_id INT,
+    image VARCHAR(255), -- Assuming image is a URL or path to the image
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
     FOREIGN KEY (category_id) REFERENCES categories(id),
-    FOREIGN KEY (seller_id) REFERENCES sellers(seller_id)
-    image VARCHAR(255) -- Assuming image is a URL or path to the image
+    FOREIGN KEY (seller_id) REFERENCES sellers(seller_id),
+    INDEX idx_products_updated_at (updated_at, id)
+);
+
+-- Product Tombstones Table (deletions reported by the change feed)
+CREATE TABLE IF NOT EXISTS product_tombstones (
+    product_id INT PRIMARY KEY,
+    deleted_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_product_tombstones_deleted_at (deleted_at, product_id)
 );
 
 -- Shopping Carts Table
@@ -81,9 +90,13 @@ CREATE TABLE IF NOT EXISTS orders (
     id INT AUTO_INCREMENT PRIMARY KEY,
     order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     status VARCHAR(50) NOT NULL,
+    previous_status VARCHAR(50) NULL, -- kept by guarded status transitions so they can be undone
     total_amount DECIMAL(10, 2) NOT NULL,
     customer_id INT,
-    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+    saga_id CHAR(32) NULL,
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
+    UNIQUE INDEX idx_orders_saga_id (saga_id),
+    INDEX idx_orders_order_date (order_date)
 );
 
 -- Order Items Table
@@ -97,3 +110,116 @@ CREATE TABLE IF NOT EXISTS order_items (
     FOREIGN KEY (product_id) REFERENCES products(id)
 );
 
+-- Seller Order Lines Table (order items denormalized per seller, filled at order creation)
+CREATE TABLE IF NOT EXISTS seller_order_lines (
+    order_item_id INT PRIMARY KEY,
+    seller_id INT NOT NULL,
+    order_id INT NOT NULL,
+    customer_id INT,
+    product_id INT NOT NULL,
+    product_name VARCHAR(255),
+    quantity INT NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    order_date TIMESTAMP NULL,
+    FOREIGN KEY (order_item_id) REFERENCES order_items(id),
+    FOREIGN KEY (order_id) REFERENCES orders(id),
+    INDEX idx_seller_order_lines_seller (seller_id, order_item_id),
+    INDEX idx_seller_order_lines_order (order_id)
+);
+
+-- Sales Daily Table (units and revenue of sold order lines per product and day,
+-- kept current as orders are paid or cancelled)
+CREATE TABLE IF NOT EXISTS sales_daily (
+    day DATE NOT NULL,
+    product_id INT NOT NULL,
+    seller_id INT,
+    category_id INT,
+    units INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, product_id),
+    INDEX idx_sales_daily_seller (seller_id, day),
+    INDEX idx_sales_daily_category (category_id, day)
+);
+
+-- Order Sagas Table (one row per checkout, see OrderSaga)
+CREATE TABLE IF NOT EXISTS order_sagas (
+    id CHAR(32) PRIMARY KEY,
+    customer_id INT,
+    payment_method VARCHAR(50),
+    order_id INT NULL,
+    status VARCHAR(32) NOT NULL DEFAULT 'running',
+    recovery_attempts INT NOT NULL DEFAULT 0,
+    claimed_by CHAR(32) NULL,
+    created_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_order_sagas_status_updated_at (status, updated_at),
+    INDEX idx_order_sagas_claimed_by (claimed_by)
+);
+
+-- Order Saga Log Table (every step event, with the data needed to compensate it)
+CREATE TABLE IF NOT EXISTS order_saga_log (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    saga_id CHAR(32) NOT NULL,
+    step VARCHAR(64) NOT NULL,
+    event VARCHAR(32) NOT NULL,
+    data JSON NULL,
+    created_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (saga_id) REFERENCES order_sagas(id) ON DELETE CASCADE,
+    INDEX idx_order_saga_log_saga (saga_id, id)
+);
+
+-- Idempotency Keys Table (stored responses of retried POST /orders requests)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    customer_id INT NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'in_progress',
+    response_code SMALLINT NULL,
+    response_body MEDIUMTEXT NULL,
+    created_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    expires_at TIMESTAMP(6) NOT NULL,
+    PRIMARY KEY (customer_id, idempotency_key),
+    INDEX idx_idempotency_keys_expires_at (expires_at)
+);
+
+-- Product Pairs Table (orders holding both products, for "frequently bought together")
+CREATE TABLE IF NOT EXISTS product_pairs (
+    product_id INT NOT NULL,
+    related_id INT NOT NULL,
+    orders INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    PRIMARY KEY (product_id, related_id),
+    INDEX idx_product_pairs_updated_at (updated_at)
+);
+
+-- Recommendation Events Table (orders paid (+1) or unpaid (-1) since product_pairs was last built)
+CREATE TABLE IF NOT EXISTS recommendation_events (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    order_id INT NOT NULL,
+    sign TINYINT NOT NULL,
+    created_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+);
+
+-- Recommendation State Table (one locked row per builder, so builders never run concurrently)
+CREATE TABLE IF NOT EXISTS recommendation_state (
+    name VARCHAR(64) PRIMARY KEY
+);
+
+-- Product Trending Table (decayed popularity as log(score) + decay * (t - epoch), see DBTrendingRepo)
+CREATE TABLE IF NOT EXISTS product_trending (
+    product_id INT PRIMARY KEY,
+    category_id INT NULL,
+    log_score DOUBLE NOT NULL,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_product_trending_score (log_score),
+    INDEX idx_product_trending_category_score (category_id, log_score)
+);
+
+-- Product Views Table (page views per product and day, written in batches)
+CREATE TABLE IF NOT EXISTS product_views (
+    day DATE NOT NULL,
+    product_id INT NOT NULL,
+    views BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, product_id),
+    INDEX idx_product_views_product (product_id, day)
+);
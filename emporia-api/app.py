@@ -1,4 +1,5 @@
 # emporia-api/app.py
+import atexit
 import os
 from flask import Flask, make_response, request
 from dotenv import load_dotenv
@@ -6,7 +7,7 @@ from flask_cors import CORS
 
 # Import your existing modules
 from reg import User_Registry
-from repositories.database.db_connection import DatabaseConnection
+from repositories.database.db_connection import DatabaseConnection, DedicatedConnection, PooledConnection
 from repositories.database.db_user_repo import DBUserRepo
 from repositories.database.db_category_repo import DBCategoryRepo
 from repositories.database.db_product_repo import DBProductRepo
@@ -18,13 +19,45 @@ from services.order_services import OrderService
 from services.payment_services import PaymentService
 from services.cart_services import CartService
 from repositories.database.db_cart_repo import DBCartRepo
+from repositories.database.db_saga_repo import DBSagaRepo
+from services.saga_recovery_services import SagaRecoveryService
+from repositories.database.db_idempotency_repo import DBIdempotencyRepo
+from services.idempotency_services import IdempotencyService
+from repositories.database.db_sales_repo import DBSalesRepo
+from services.sales_services import SalesService
+from services.analytics_services import SalesAnalyticsService
+from repositories.database.db_recommendation_repo import DBRecommendationRepo
+from services.recommendation_services import RecommendationService
+from repositories.database.db_trending_repo import DBTrendingRepo
+from services.trending_services import TrendingService
+from repositories.database.db_product_view_repo import DBProductViewRepo
+from services.product_view_services import ProductViewService
 from routes import register_blueprints
+from utils.json_provider import FastJSONProvider
+from utils.json_fragment_cache import JSONFragmentCache
+from utils.compression import Compress
+from utils import metrics, tracing
+from utils.logging_config import configure_logging
+from utils.background import PeriodicTask
+from utils.profiling import RequestProfiler
+from utils.memory_diagnostics import MemoryDiagnostics
+from models.Product.Product import Product
+from models.Order.CartItem import CartItem
+from models.Order.Order import Order
+from models.Order.ShoppingCart import ShoppingCart
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 
+# Structured JSON logs written off the request thread
+configure_logging(app)
+logger = app.logger
+
+# Serialize every jsonify/blueprint response with the fast JSON provider
+app.json = FastJSONProvider(app)
+
 # Basic Flask configuration (removed all session-related config)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 
@@ -32,11 +65,20 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', 30))
 
+# Response compression (gzip, plus brotli when installed)
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+Compress(app)
+
+# Per-endpoint Cache-Control overrides for catalog routes:
+# {'<endpoint>': (max_age, stale_while_revalidate)}, e.g. {'products.get_product': (120, 600)}
+app.config['CACHE_CONTROL'] = {}
+
 # CORS configuration - allow credentials removed since we're using JWT in headers
 # CORS configuration to allow all origins
 CORS(app,
      origins=["http://localhost:5173", "http://127.0.0.1:5173"],
-     allow_headers=["Content-Type", "Authorization"],
+     allow_headers=["Content-Type", "Authorization", "Idempotency-Key"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
 @app.before_request
@@ -44,14 +86,40 @@ def handle_preflight():
     if request.method == "OPTIONS":
         res = make_response()
         res.headers.add('Access-Control-Allow-Origin', '*')
-        res.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        res.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,Idempotency-Key')
         res.headers.add('Access-Control-Allow-Methods', 'GET,POST,PUT,DELETE,OPTIONS')
         return res
 
 
 
+# Request metrics for every blueprint, served at /metrics
+metrics.init_app(app)
+
+# Sampled request traces (TRACE_EXPORTER=file|otlp, TRACE_SAMPLE_RATE)
+tracing.init_app(app)
+
+# On-demand cProfile of single requests (signed X-Profile header or sampling)
+app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', 'profiles')
+app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', 0.0))
+app.config['PROFILE_SECRET'] = os.getenv('PROFILE_SECRET')
+app.profiler = RequestProfiler(app)
+
+# tracemalloc snapshots/diffs and model object counts under /admin/memory
+app.memory_diagnostics = MemoryDiagnostics(
+    [Product, CartItem, Order, ShoppingCart],
+    frames=int(os.getenv('MEMORY_TRACE_FRAMES', 10))
+)
+
 # Initialize database connection
 db = DatabaseConnection()
+db.add_query_observer(metrics.observe_query)
+db.add_query_observer(tracing.observe_query)
+
+# Connections borrowed per unit of work, so a checkout's transaction is
+# never committed or rolled back by another request on the shared connection
+if db.connection is not None:
+    db.init_pool(size=int(os.getenv('DB_POOL_SIZE', 10)),
+                 timeout=int(os.getenv('DB_POOL_TIMEOUT', 10)))
 
 # Initialize repositories
 user_repo = DBUserRepo(db)
@@ -59,14 +127,48 @@ category_repo = DBCategoryRepo(db)
 product_repo = DBProductRepo(db)
 order_repo = DBOrderRepo(db)
 cart_repo = DBCartRepo(db)
+saga_repo = DBSagaRepo(db)
+idempotency_repo = DBIdempotencyRepo(db)
+sales_repo = DBSalesRepo(db)
+
+# Cache of encoded product JSON, dropped as soon as a product changes
+product_json_cache = JSONFragmentCache(
+    app.json.dumps,
+    max_entries=int(os.getenv('PRODUCT_JSON_CACHE_SIZE', 10000))
+)
+product_repo.add_change_listener(product_json_cache.invalidate)
+order_repo.add_restock_listener(product_json_cache.invalidate)
+
+metrics.registry.callback(
+    'emporia_cache_requests_total', 'In-process cache lookups by result',
+    ['cache', 'result'],
+    lambda: {('product_json', 'hit'): product_json_cache.hits,
+             ('product_json', 'miss'): product_json_cache.misses},
+    type='counter')
+metrics.registry.callback(
+    'emporia_cache_hit_ratio', 'Hit ratio of in-process caches since start',
+    ['cache'],
+    lambda: {('product_json',): product_json_cache.hits / max(product_json_cache.hits + product_json_cache.misses, 1)})
+metrics.registry.callback(
+    'emporia_db_connections_open', 'MySQL connections in use (shared connection, active streams and borrowed pool connections)',
+    [], lambda: {(): db.open_connections()})
 
 # Initialize services
 user_service = UserService(user_repo)
 category_service = CategoryService(category_repo)
-product_service = ProductService(product_repo)
+product_service = ProductService(product_repo, product_json_cache)
 payment_service = PaymentService()
-order_service = OrderService(order_repo, product_repo, payment_service)
+order_service = OrderService(
+    order_repo, product_repo, payment_service, saga_repo,
+    connections=(lambda: PooledConnection(db)) if db.pooled else None
+)
 cart_service = CartService(cart_repo, product_repo)
+sales_service = SalesService(sales_repo)
+analytics_service = SalesAnalyticsService(
+    sales_repo, chunk_size=int(os.getenv('ANALYTICS_CHUNK_SIZE', 50000))
+)
+idempotency_ttl = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 86400))
+idempotency_service = IdempotencyService(idempotency_repo, ttl_seconds=idempotency_ttl)
 
 # Add services to app context
 app.user_service = user_service
@@ -74,7 +176,108 @@ app.category_service = category_service
 app.product_service = product_service
 app.order_service = order_service
 app.cart_service = cart_service
+app.sales_service = sales_service
+app.analytics_service = analytics_service
 app.payment_service = payment_service
+app.idempotency_service = idempotency_service
+
+# Finish or compensate checkouts left behind by a dead worker, at startup
+# and then periodically, on a connection of its own
+recovery_db = DedicatedConnection(db)
+if recovery_db.available:
+    recovery_product_repo = DBProductRepo(recovery_db)
+    recovery_product_repo.add_change_listener(product_json_cache.invalidate)
+    saga_recovery_service = SagaRecoveryService(
+        DBSagaRepo(recovery_db),
+        DBOrderRepo(recovery_db),
+        recovery_product_repo,
+        payment_service,
+        stale_seconds=int(os.getenv('SAGA_STALE_SECONDS', 60)),
+        batch_size=int(os.getenv('SAGA_RECOVERY_BATCH', 100)),
+        retention_days=int(os.getenv('SAGA_RETENTION_DAYS', 7))
+    )
+
+    def _recover_sagas():
+        recovery_db.ping()
+        return saga_recovery_service.run()
+
+    app.saga_recovery = PeriodicTask(
+        'saga-recovery', int(os.getenv('SAGA_RECOVERY_INTERVAL', 30)), _recover_sagas
+    ).start()
+
+# Delete expired idempotency keys in the background, on a connection of its own
+purge_db = DedicatedConnection(db)
+if purge_db.available:
+    idempotency_purge_service = IdempotencyService(DBIdempotencyRepo(purge_db), ttl_seconds=idempotency_ttl)
+
+    def _purge_idempotency_keys():
+        purge_db.ping()
+        return idempotency_purge_service.purge_expired()
+
+    app.idempotency_purge = PeriodicTask(
+        'idempotency-purge', int(os.getenv('IDEMPOTENCY_PURGE_INTERVAL', 3600)), _purge_idempotency_keys
+    ).start()
+
+# "Frequently bought together": pair counts folded in from new orders and
+# each product's top neighbours reloaded into memory, on a connection of its own
+recommendation_db = DedicatedConnection(db)
+recommendation_service = RecommendationService(
+    DBRecommendationRepo(recommendation_db),
+    top_k=int(os.getenv('RECOMMENDATION_TOP_K', 10))
+)
+app.recommendation_service = recommendation_service
+if recommendation_db.available and recommendation_service.available:
+    def _build_recommendations():
+        recommendation_db.ping()
+        return recommendation_service.run()
+
+    app.recommendation_builder = PeriodicTask(
+        'recommendations', int(os.getenv('RECOMMENDATION_INTERVAL', 300)), _build_recommendations
+    ).start()
+
+# Decayed popularity scores from views and orders, merged into a shared
+# table every interval on a connection of its own
+trending_db = DedicatedConnection(db)
+trending_service = TrendingService(
+    DBTrendingRepo(trending_db),
+    half_life=int(os.getenv('TRENDING_HALF_LIFE', 21600)),
+    view_weight=float(os.getenv('TRENDING_VIEW_WEIGHT', 1.0)),
+    order_weight=float(os.getenv('TRENDING_ORDER_WEIGHT', 5.0))
+)
+app.trending_service = trending_service
+order_service.add_order_listener(trending_service.record_order)
+if trending_db.available:
+    def _flush_trending():
+        trending_db.ping()
+        return trending_service.run()
+
+    app.trending_flush = PeriodicTask(
+        'trending', int(os.getenv('TRENDING_INTERVAL', 15)), _flush_trending
+    ).start()
+
+# Product page views counted in memory and written with one batched upsert
+# per interval; whatever is left is written at shutdown
+view_db = DedicatedConnection(db)
+product_view_service = ProductViewService(DBProductViewRepo(view_db))
+product_view_service.add_view_listener(trending_service.record_view)
+app.product_view_service = product_view_service
+if view_db.available:
+    def _flush_views():
+        view_db.ping()
+        return product_view_service.flush()
+
+    # Registered first so it runs after the periodic task has stopped
+    atexit.register(product_view_service.shutdown)
+    app.view_flush = PeriodicTask(
+        'product-views', int(os.getenv('VIEW_FLUSH_INTERVAL', 10)), _flush_views
+    ).start()
+
+metrics.registry.callback(
+    'emporia_product_views_buffered', 'Product views counted but not yet written',
+    [], lambda: {(): product_view_service.pending()})
+metrics.registry.callback(
+    'emporia_product_views_dropped_total', 'Product views lost to a full buffer or flush queue',
+    [], lambda: {(): product_view_service.dropped}, type='counter')
 
 # Register all blueprints
 register_blueprints(app)
@@ -82,8 +285,8 @@ register_blueprints(app)
 # Register user types
 User_Registry.register_all_user_types()
 
-print("✅ JWT Authentication configured")
-print("✅ Flask app ready to serve requests")
+logger.info("JWT authentication configured")
+logger.info("Flask app ready to serve requests")
 
 if __name__ == '__main__':
     app.run(debug=True)
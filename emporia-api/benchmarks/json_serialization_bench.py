@@ -0,0 +1,93 @@
+"""
+Serialization benchmark for API response payloads.
+
+Compares Flask's default JSON provider with FastJSONProvider on both of its
+backends, using payloads shaped like GET /products and GET /orders responses.
+
+Run from emporia-api/:
+    python benchmarks/json_serialization_bench.py [--rounds 200]
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from utils.json_provider import FastJSONProvider, orjson
+
+
+def product_list_payload(count=100):
+    return {'products': [{
+        'product_id': i,
+        'seller_id': i % 17 + 1,
+        'category_id': i % 9 + 1,
+        'name': f'Product {i}',
+        'description': 'Hand-made ceramic mug with a matte glaze. ' * 4,
+        'price': Decimal('19.99') + i,
+        'stock': 250 - i % 250,
+        'image': f'https://cdn.example.com/products/{i}.jpg'
+    } for i in range(count)]}
+
+
+def order_history_payload(orders=50, lines=5):
+    placed = datetime(2024, 1, 1, 12, 0, 0)
+    return {'orders': [{
+        'order_id': o,
+        'date': (placed + timedelta(days=o)).strftime('%Y-%m-%d %H:%M:%S'),
+        'status': 'paid',
+        'total_amount': Decimal('104.95'),
+        'items': [{
+            'product_id': o * lines + l,
+            'name': f'Product {o * lines + l}',
+            'price': Decimal('20.99'),
+            'quantity': l + 1,
+            'subtotal': Decimal('20.99') * (l + 1)
+        } for l in range(lines)]
+    } for o in range(orders)]}
+
+
+class LegacyProvider(DefaultJSONProvider):
+    """Flask's stock provider with the compact separators jsonify uses in production."""
+
+    def dumps(self, obj, **kwargs):
+        kwargs.setdefault('separators', (',', ':'))
+        return super().dumps(obj, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    providers = [('flask default', LegacyProvider(app)),
+                 ('fast (stdlib json)', FastJSONProvider(app, backend='json'))]
+    if orjson is not None:
+        providers.append(('fast (orjson)', FastJSONProvider(app, backend='orjson')))
+    else:
+        print('orjson is not installed; skipping the orjson backend\n')
+
+    payloads = [('product list x100', product_list_payload()),
+                ('product list x1000', product_list_payload(1000)),
+                ('order history 50x5', order_history_payload())]
+
+    for payload_name, payload in payloads:
+        print(payload_name)
+        baseline = None
+        for provider_name, provider in providers:
+            seconds = timeit.timeit(lambda: provider.dumps(payload), number=args.rounds)
+            per_call = seconds / args.rounds * 1e6
+            size = len(provider.dumps(payload).encode('utf-8'))
+            baseline = baseline or per_call
+            print(f'  {provider_name:<20} {per_call:10.1f} us/call  {size:8d} bytes  x{baseline / per_call:.2f}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
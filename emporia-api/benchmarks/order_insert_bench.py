@@ -0,0 +1,93 @@
+"""
+Order creation benchmark: one INSERT per order line versus the batched insert
+used by DBOrderRepo.create_order.
+
+Needs the database from configs/config.ini with at least one customer and
+one product. Every order created here is deleted again.
+
+Run from emporia-api/:
+    python benchmarks/order_insert_bench.py [--rounds 20] [--lines 1 10 100]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from models.Order.CartItem import CartItem
+from models.Order.Order import Order
+from models.Product.Product import Product
+from repositories.database.db_connection import DatabaseConnection
+from repositories.database.db_order_repo import DBOrderRepo
+
+
+class PerLineOrderRepo(DBOrderRepo):
+    """create_order as it was before batching: a round-trip per line."""
+
+    def create_order(self, order, saga_id=None):
+        self.cursor.execute("""
+            INSERT INTO orders (customer_id, order_date, status, total_amount, saga_id)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (order.customer_id, order.date, order.status, order.amount, saga_id))
+        order.order_id = self.cursor.lastrowid
+
+        for item in order.product_list:
+            self.cursor.execute("""
+                INSERT INTO order_items (order_id, product_id, quantity, price)
+                VALUES (%s, %s, %s, %s)
+            """, (order.order_id, item.product.product_id, item.quantity, item.product.price))
+
+        self.connection.commit()
+        return order
+
+
+def sample_order(customer_id, product_ids, lines):
+    items = [CartItem(Product(product_ids[i % len(product_ids)], None, None, 'bench', '', None, 10, None), 1)
+             for i in range(lines)]
+    return Order(None, customer_id, items, 10 * lines, 'pending', datetime.now())
+
+
+def time_create(repo, customer_id, product_ids, lines, rounds):
+    elapsed = 0.0
+    for _ in range(rounds):
+        order = sample_order(customer_id, product_ids, lines)
+        started_at = time.perf_counter()
+        repo.create_order(order)
+        elapsed += time.perf_counter() - started_at
+        repo.delete_order(order.order_id)
+    return elapsed / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--lines', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+
+    db = DatabaseConnection()
+    if db.connection is None:
+        sys.exit('Database connection failed; check configs/config.ini')
+
+    db.cursor.execute("SELECT customer_id FROM customers ORDER BY customer_id LIMIT 1")
+    customer = db.cursor.fetchone()
+    db.cursor.execute("SELECT id FROM products ORDER BY id LIMIT 100")
+    product_ids = [row[0] for row in db.cursor.fetchall()]
+    if not customer or not product_ids:
+        sys.exit('Needs at least one customer and one product')
+
+    repos = [('per line', PerLineOrderRepo(db)), ('batched', DBOrderRepo(db))]
+    for lines in args.lines:
+        print(f'order with {lines} line(s)')
+        baseline = None
+        for name, repo in repos:
+            per_order = time_create(repo, customer[0], product_ids, lines, args.rounds)
+            baseline = baseline or per_order
+            print(f'  {name:<10} {per_order:9.2f} ms/order  x{baseline / per_order:.2f}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
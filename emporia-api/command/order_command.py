@@ -10,3 +10,7 @@ class OrderCommand(ABC):
     @abstractmethod
     def undo(self):
         pass
+
+    def log_data(self):
+        # What a recovery worker needs to compensate this step after a crash
+        return None
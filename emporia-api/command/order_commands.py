@@ -36,11 +36,12 @@ class ValidateOrderCommand(OrderCommand):
 
 class CreateOrderCommand(OrderCommand):
 
-    def __init__(self, order_repository, customer_id, product_list, amount):
+    def __init__(self, order_repository, customer_id, product_list, amount, saga_id=None):
         self.order_repository = order_repository
         self.customer_id = customer_id
         self.product_list = product_list
         self.amount = amount
+        self.saga_id = saga_id
         self.order = None
 
     def execute(self):
@@ -55,7 +56,7 @@ class CreateOrderCommand(OrderCommand):
         )
 
         # Save order to database
-        self.order = self.order_repository.create_order(order)
+        self.order = self.order_repository.create_order(order, saga_id=self.saga_id)
         return self.order
 
     def undo(self):
@@ -64,39 +65,36 @@ class CreateOrderCommand(OrderCommand):
             self.order_repository.delete_order(self.order.order_id)
             self.order = None
 
+    def log_data(self):
+        return {'order_id': self.order.order_id if self.order else None}
+
 
 class UpdateInventoryCommand(OrderCommand):
 
     def __init__(self, product_repository, product_list):
         self.product_repository = product_repository
         self.product_list = product_list
-        self.original_stock = {}
+        self.deducted = {}
 
     def execute(self):
-        # Save original stock for potential rollback
+        quantities = {}
         for item in self.product_list:
             product_id = item.product.product_id
-            quantity = item.quantity
-            self.original_stock[product_id] = item.product.stock
-
-            # Update stock
-            new_stock = item.product.stock - quantity
-            if new_stock < 0:
-                raise ValueError(
-                    f"Insufficient stock for product: {item.product.name}")
-
-            item.product.stock = new_stock
-            self.product_repository.update(item.product)
+            quantities[product_id] = quantities.get(product_id, 0) + item.quantity
 
+        # Checked against current stock, not the cart's snapshot of it
+        self.product_repository.deduct_stock(quantities)
+        self.deducted = quantities
         return True
 
     def undo(self):
-        # Restore original stock values
-        for product_id, original_stock in self.original_stock.items():
-            product = self.product_repository.get_by_id(product_id)
-            if product:
-                product.stock = original_stock
-                self.product_repository.update(product)
+        # Give back only what this checkout took; other checkouts' changes stay
+        if self.deducted:
+            self.product_repository.restock(self.deducted)
+            self.deducted = {}
+
+    def log_data(self):
+        return {'quantities': {str(product_id): quantity for product_id, quantity in self.deducted.items()}}
 
 
 class ProcessPaymentCommand(OrderCommand):
@@ -127,33 +125,30 @@ class ProcessPaymentCommand(OrderCommand):
             self.payment_service.refund_payment(self.payment_id)
             self.payment_id = None
 
+    def log_data(self):
+        return {'order_id': self.order.order_id, 'payment_id': self.payment_id}
+
 
 class UpdateOrderStatusCommand(OrderCommand):
 
-    def __init__(self, order_repository, order_id, new_status):
+    def __init__(self, order_repository, order_id, new_status, customer_id=None):
         self.order_repository = order_repository
         self.order_id = order_id
         self.new_status = new_status
-        self.previous_status = None
+        self.customer_id = customer_id
+        self.applied = False
 
     def execute(self):
-        # Get current order
-        order = self.order_repository.get_by_id(self.order_id)
-        if not order:
-            raise ValueError(f"Order with ID {self.order_id} not found")
-
-        # Save previous status for potential rollback
-        self.previous_status = order.status
-
-        # Update status
-        order.status = self.new_status
-        self.order_repository.update_order(order)
+        # Guarded single-row update, rejected unless the transition is allowed
+        self.order_repository.transition_status(self.order_id, self.new_status, customer_id=self.customer_id)
+        self.applied = True
         return True
 
     def undo(self):
         # Restore previous status
-        if self.previous_status:
-            order = self.order_repository.get_by_id(self.order_id)
-            if order:
-                order.status = self.previous_status
-                self.order_repository.update_order(order)
+        if self.applied:
+            self.order_repository.revert_status(self.order_id, self.new_status)
+            self.applied = False
+
+    def log_data(self):
+        return {'order_id': self.order_id, 'new_status': self.new_status}
@@ -1,3 +1,6 @@
+from utils.tracing import tracer
+
+
 class OrderInvoker:
 
     def __init__(self):
@@ -6,7 +9,8 @@ class OrderInvoker:
     def execute_command(self, command):
 
         try:
-            result = command.execute()
+            with tracer.span(f"{type(command).__name__}.execute"):
+                result = command.execute()
             self.command_history.append(command)
             return result
         except Exception as e:
@@ -25,5 +29,6 @@ class OrderInvoker:
 
         # Reverse the history to undo in LIFO order
         for command in reversed(self.command_history):
-            command.undo()
+            with tracer.span(f"{type(command).__name__}.undo"):
+                command.undo()
         self.command_history.clear()
@@ -0,0 +1,148 @@
+import logging
+import time
+import uuid
+from command.order_invoker import OrderInvoker
+from utils.metrics import CHECKOUT_STEP_LATENCY
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class SagaStep:
+    """Timing and outcome of one command executed by a saga."""
+
+    def __init__(self, name):
+        self.name = name
+        self.status = 'running'
+        self.duration = None
+        self.compensation_duration = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            'step': self.name,
+            'status': self.status,
+            'duration_ms': round(self.duration * 1000, 3) if self.duration is not None else None,
+            'compensation_ms': round(self.compensation_duration * 1000, 3) if self.compensation_duration is not None else None,
+            'error': self.error,
+        }
+
+
+class OrderSaga(OrderInvoker):
+    """
+    Executes the commands of a single checkout and compensates them in LIFO
+    order if one fails.
+
+    A saga holds the in-memory state of exactly one checkout, so a new one
+    must be created for every request: sharing an instance between threads
+    would let one request's rollback undo another request's commands. It
+    does not isolate database work by itself; that depends on the
+    repositories its commands were given (OrderService binds them to a
+    pooled connection of the checkout's own).
+
+    With a saga repository every step is also written to the saga log
+    (started, then done with the command's log_data), so a recovery worker
+    can finish or compensate the checkout if this process dies mid-way.
+    """
+
+    def __init__(self, saga_id=None, log=None):
+        super().__init__()
+        self.saga_id = saga_id or uuid.uuid4().hex
+        self.log = log
+        self.steps = []
+        # Step of each command in command_history, in the same order
+        self.completed_steps = []
+        self.status = 'running'
+        self.order_id = None
+
+    def begin(self, customer_id, payment_method):
+        if self.log:
+            self.log.create_saga(self.saga_id, customer_id, payment_method)
+
+    def execute_command(self, command):
+        step = SagaStep(type(command).__name__)
+        self.steps.append(step)
+        started_at = time.perf_counter()
+        try:
+            if self.log:
+                self.log.append(self.saga_id, step.name, 'started')
+            with tracer.span(f"{step.name}.execute", attributes={'saga.id': self.saga_id}):
+                result = command.execute()
+        except Exception as e:
+            step.status = 'failed'
+            step.error = str(e)
+            self._observe(step, time.perf_counter() - started_at)
+            self._record(step.name, 'failed', {'error': step.error})
+            self.rollback()
+            raise
+
+        step.status = 'done'
+        self._observe(step, time.perf_counter() - started_at)
+        self.command_history.append(command)
+        self.completed_steps.append(step)
+        try:
+            if self.log:
+                self.log.append(self.saga_id, step.name, 'done', command.log_data())
+        except Exception:
+            # A step that cannot be logged must not survive a crash unrecorded
+            self.rollback()
+            raise
+        return result
+
+    def rollback(self):
+        """
+        Undo every completed command, newest first. A failing compensation is
+        logged and the remaining ones still run.
+        """
+        self.status = 'compensating'
+        # Tells recovery to keep compensating, not resume, if we die mid-way
+        self._record_status()
+        failures = 0
+        for command, step in reversed(list(zip(self.command_history, self.completed_steps))):
+            started_at = time.perf_counter()
+            try:
+                with tracer.span(f"{step.name}.undo", attributes={'saga.id': self.saga_id}):
+                    command.undo()
+                step.status = 'compensated'
+            except Exception as e:
+                failures += 1
+                step.status = 'compensation_failed'
+                step.error = str(e)
+                logger.exception("Compensation of %s failed", step.name, extra={'saga_id': self.saga_id})
+            step.compensation_duration = time.perf_counter() - started_at
+            self._record(step.name, step.status)
+        self.command_history.clear()
+        self.completed_steps.clear()
+        self.status = 'compensation_failed' if failures else 'compensated'
+        self._record_status()
+
+    def complete(self, order_id=None):
+        self.status = 'completed'
+        self.order_id = order_id
+        self.command_history.clear()
+        self.completed_steps.clear()
+        self._record_status()
+
+    def _record(self, step_name, event, data=None):
+        # Best effort: a saga left unfinished in the log is picked up by recovery
+        if not self.log:
+            return
+        try:
+            self.log.append(self.saga_id, step_name, event, data)
+        except Exception as e:
+            logger.warning("Could not log %s %s: %s", step_name, event, e, extra={'saga_id': self.saga_id})
+
+    def _record_status(self):
+        if not self.log:
+            return
+        try:
+            self.log.set_status(self.saga_id, self.status, self.order_id)
+        except Exception as e:
+            logger.warning("Could not record saga status %s: %s", self.status, e, extra={'saga_id': self.saga_id})
+
+    def _observe(self, step, duration):
+        step.duration = duration
+        CHECKOUT_STEP_LATENCY.observe(duration, step=step.name, outcome=step.status)
+
+    def timings(self):
+        return [step.to_dict() for step in self.steps]
@@ -0,0 +1,25 @@
+class OrderStatus:
+    PENDING = 'pending'
+    PAID = 'paid'
+    PAYMENT_FAILED = 'payment_failed'
+    SHIPPED = 'shipped'
+    DELIVERED = 'delivered'
+    CANCELLED = 'cancelled'
+
+    # Statuses whose orders count as sales in the rollups
+    SOLD = (PAID, SHIPPED, DELIVERED)
+
+    # New status -> statuses an order may move to it from
+    TRANSITIONS = {
+        PAID: (PENDING, PAYMENT_FAILED),
+        PAYMENT_FAILED: (PENDING,),
+        SHIPPED: (PAID,),
+        DELIVERED: (SHIPPED,),
+        CANCELLED: (PENDING, PAID, PAYMENT_FAILED),
+    }
+
+    @classmethod
+    def sources(cls, new_status):
+        if new_status not in cls.TRANSITIONS:
+            raise ValueError(f"Unknown order status: {new_status}")
+        return cls.TRANSITIONS[new_status]
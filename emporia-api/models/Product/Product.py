@@ -1,5 +1,8 @@
+from datetime import datetime
+
+
 class Product:
-    def __init__(self, product_id: int, seller_id: int, category_id: str, name: str, description: str, image: str, price: int, stock: int):
+    def __init__(self, product_id: int, seller_id: int, category_id: str, name: str, description: str, image: str, price: int, stock: int, updated_at: datetime = None):
         self.product_id = product_id
         self.seller_id = seller_id
         self.category_id = category_id
@@ -8,6 +11,7 @@ class Product:
         self.image = image
         self.price = price
         self.stock = stock
+        self.updated_at = updated_at
 
     def __str__(self):
         return (f"Product(product_id={self.product_id}, seller_id={self.seller_id}, "
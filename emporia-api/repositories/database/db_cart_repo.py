@@ -1,10 +1,13 @@
 # emporia-api/repositories/database/db_cart_repo.py
+import logging
 from flask import g
 from repositories.interfaces.cart_repo import CartRepository
 from models.Order.ShoppingCart import ShoppingCart
 from models.Order.CartItem import CartItem
 import mysql.connector
 
+logger = logging.getLogger(__name__)
+
 
 class DBCartRepo(CartRepository):
     def __init__(self, db):
@@ -99,12 +102,12 @@ class DBCartRepo(CartRepository):
 
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             raise ValueError(f"Database error: {err}")
 
         except Exception as e:
             self.connection.rollback()
-            print(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise Exception(f"Cart creation failed: {e}")
 
     def add_item(self, cart_id, product_id, quantity):
@@ -151,12 +154,12 @@ class DBCartRepo(CartRepository):
 
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             raise ValueError(f"Database error: {err}")
 
         except Exception as e:
             self.connection.rollback()
-            print(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise Exception(f"Failed to add item to cart: {e}")
 
     def update_item(self, cart_id, product_id, quantity):
@@ -200,12 +203,12 @@ class DBCartRepo(CartRepository):
 
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             raise ValueError(f"Database error: {err}")
 
         except Exception as e:
             self.connection.rollback()
-            print(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise Exception(f"Failed to update cart item: {e}")
 
     def remove_item(self, cart_id, product_id):
@@ -236,12 +239,12 @@ class DBCartRepo(CartRepository):
 
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             raise ValueError(f"Database error: {err}")
 
         except Exception as e:
             self.connection.rollback()
-            print(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise Exception(f"Failed to remove item from cart: {e}")
 
     def clear_cart(self, cart_id):
@@ -260,12 +263,12 @@ class DBCartRepo(CartRepository):
 
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             raise ValueError(f"Database error: {err}")
 
         except Exception as e:
             self.connection.rollback()
-            print(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise Exception(f"Failed to clear cart: {e}")
 
     def _get_customer_id_for_cart(self, cart_id):
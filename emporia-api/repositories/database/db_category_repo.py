@@ -1,8 +1,11 @@
+import logging
 from flask import g
 from repositories.interfaces.category_repo import CategoryRepository
 import mysql.connector
 from models.Product.Category import Category
 
+logger = logging.getLogger(__name__)
+
 class DBCategoryRepo(CategoryRepository):
     def __init__(self, db):
         super().__init__(db)
@@ -28,11 +31,11 @@ class DBCategoryRepo(CategoryRepository):
                 raise ValueError(f"Category '{category.name}' already exists")
             else:
                 # Log the error for debugging
-                print(f"MySQL Error: {err.errno} - {err.msg}")
+                logger.error("MySQL error %s: %s", err.errno, err.msg)
                 raise ValueError(f"Database error: {err}")
         except Exception as e:
             self.connection.rollback()
-            print(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise Exception(f"Category creation failed: {e}")
     
     def get_all_categories(self):
@@ -101,7 +104,7 @@ class DBCategoryRepo(CategoryRepository):
             if err.errno == 1062:  # Duplicate entry error
                 raise ValueError(f"Category name '{category.name}' already exists")
             else:
-                print(f"MySQL Error: {err.errno} - {err.msg}")
+                logger.error("MySQL error %s: %s", err.errno, err.msg)
                 raise ValueError(f"Database error: {err}")
         except Exception as e:
             self.connection.rollback()
@@ -132,7 +135,7 @@ class DBCategoryRepo(CategoryRepository):
             
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             raise ValueError(f"Database error: {err}")
         except Exception as e:
             self.connection.rollback()
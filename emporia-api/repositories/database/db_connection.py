@@ -1,36 +1,244 @@
 import configparser
+import copy
+import logging
+import threading
 import mysql.connector
+from mysql.connector import pooling
+from repositories.database.instrumented_cursor import InstrumentedCursor
+
+logger = logging.getLogger(__name__)
 
 class DatabaseConnection:
   _db_instance = None
-  
+
   def __new__(cls, *args, **kwargs):
     if not cls._db_instance:
       cls._db_instance = super(DatabaseConnection, cls).__new__(cls)
       cls._db_instance.connection = None
       cls._db_instance.cursor = None
+      # Callables notified after every statement: observer(operation, duration, error)
+      cls._db_instance.query_observers = []
+      cls._db_instance.active_streams = 0
+      cls._db_instance._streams_lock = threading.Lock()
+      cls._db_instance._pool = None
+      cls._db_instance._pool_slots = None
+      cls._db_instance._pool_lock = threading.Lock()
+      cls._db_instance.pool_timeout = None
+      cls._db_instance.borrowed_connections = 0
       cls._db_instance._connect()
     return cls._db_instance
-  
+
   def _connect(self):
     try:
-      config = configparser.ConfigParser()
-      config.read('configs/config.ini')
-
-      self.connection = mysql.connector.connect(
-        host=config['database']['host'],
-        user=config['database']['user'],
-        password=config['database']['password'],
-        database=config['database']['database']
-      )
+      self.connection = self.create_connection()
       # Using a buffered cursor to prevent "Commands out of sync" errors
-      self.cursor = self.connection.cursor(buffered=True)
-      print("Database connection established.")
+      self.cursor = self.wrap_cursor(self.connection.cursor(buffered=True))
+      logger.info("Database connection established")
     except mysql.connector.Error as err:
-      print(f"Error: {err}")
+      logger.error("Database connection failed: %s", err)
       self.connection = None
-      self.cursor = None      
+      self.cursor = None
     except configparser.Error as err:
-      print(f"Error reading configuration file: {err}")
-    
-    
+      logger.error("Error reading configuration file: %s", err)
+
+  def connection_settings(self):
+    """
+    MySQL connection settings read from configs/config.ini.
+    """
+    config = configparser.ConfigParser()
+    config.read('configs/config.ini')
+
+    return {
+      'host': config['database']['host'],
+      'user': config['database']['user'],
+      'password': config['database']['password'],
+      'database': config['database']['database']
+    }
+
+  def create_connection(self):
+    """
+    Open a new MySQL connection using the settings in configs/config.ini.
+    """
+    return mysql.connector.connect(**self.connection_settings())
+
+  def init_pool(self, size=10, timeout=10):
+    """
+    Open a pool of connections for units of work that need a transaction of
+    their own (see PooledConnection). Borrowers wait up to timeout seconds
+    for a free connection.
+    """
+    try:
+      self._pool = pooling.MySQLConnectionPool(pool_name='emporia', pool_size=size,
+                                               **self.connection_settings())
+      self._pool_slots = threading.BoundedSemaphore(size)
+      self.pool_timeout = timeout
+      logger.info("Database connection pool opened", extra={'size': size})
+    except (mysql.connector.Error, configparser.Error, KeyError) as err:
+      logger.error("Database connection pool failed: %s", err)
+      self._pool = None
+
+  @property
+  def pooled(self):
+    return self._pool is not None
+
+  def borrow_connection(self):
+    """
+    Take a connection from the pool, waiting for one to be returned if all
+    are in use. Every borrowed connection must go back through
+    return_connection.
+    """
+    if self._pool is None:
+      raise ValueError("Database error: connection pool is not initialized")
+    if not self._pool_slots.acquire(timeout=self.pool_timeout):
+      raise ValueError("Database error: no pooled connection available")
+    try:
+      connection = self._pool.get_connection()
+    except Exception:
+      self._pool_slots.release()
+      raise
+    with self._pool_lock:
+      self.borrowed_connections += 1
+    return connection
+
+  def return_connection(self, connection):
+    try:
+      # Hands a pooled connection back; its session is reset (and any open
+      # transaction rolled back) before the next borrower gets it
+      connection.close()
+    except mysql.connector.Error as err:
+      logger.warning("Could not return pooled connection: %s", err)
+    finally:
+      with self._pool_lock:
+        self.borrowed_connections -= 1
+      self._pool_slots.release()
+
+  def add_query_observer(self, observer):
+    self.query_observers.append(observer)
+
+  def wrap_cursor(self, cursor):
+    """
+    Wrap a raw cursor so its statements are reported to the query observers.
+    """
+    return InstrumentedCursor(cursor, self.query_observers)
+
+  def open_connections(self):
+    """
+    Number of connections currently in use: the shared one, active streams
+    and connections borrowed from the pool.
+    """
+    return (1 if self.connection is not None else 0) + self.active_streams + self.borrowed_connections
+
+  def stream(self, query, params=None, chunk_size=500):
+    """
+    Execute a query on a dedicated connection with an unbuffered cursor and
+    yield its rows one by one, fetching chunk_size rows at a time.
+
+    The shared buffered cursor cannot be used here: an unbuffered result has
+    to be fully read before the connection accepts another statement, so
+    streaming on it would block every other repository call until the
+    consumer finished.
+    """
+    connection = self.create_connection()
+    cursor = self.wrap_cursor(connection.cursor(buffered=False))
+    with self._streams_lock:
+      self.active_streams += 1
+    try:
+      cursor.execute(query, params or ())
+      while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+          break
+        for row in rows:
+          yield row
+    finally:
+      with self._streams_lock:
+        self.active_streams -= 1
+      try:
+        cursor.close()
+        connection.close()
+      except mysql.connector.Error:
+        # The consumer stopped early and left unread rows on the wire
+        connection.disconnect()
+
+
+class DedicatedConnection:
+  """
+  A private connection and buffered cursor for a background worker, exposing
+  the same connection/cursor attributes repositories read from
+  DatabaseConnection. Background threads must not share the request
+  cursor, which is not thread-safe.
+  """
+
+  def __init__(self, db):
+    self.db = db
+    self.connection = None
+    self.cursor = None
+    try:
+      self.connection = db.create_connection()
+      self.cursor = db.wrap_cursor(self.connection.cursor(buffered=True))
+    except (mysql.connector.Error, configparser.Error, KeyError) as err:
+      logger.error("Background database connection failed: %s", err)
+
+  @property
+  def available(self):
+    return self.connection is not None
+
+  def ping(self):
+    """
+    Reconnect if the server dropped the connection, keeping the same objects
+    so repositories built on it stay valid.
+    """
+    self.connection.ping(reconnect=True, attempts=3, delay=1)
+
+  def close(self):
+    if self.connection is not None:
+      try:
+        self.cursor.close()
+        self.connection.close()
+      except mysql.connector.Error:
+        pass
+
+
+class PooledConnection:
+  """
+  A connection borrowed from the pool for one unit of work, such as a
+  single checkout, with the same connection/cursor attributes repositories
+  read from DatabaseConnection. Repositories bound to it run every
+  statement, commit and rollback on this connection only, so concurrent
+  requests cannot commit or roll back each other's work. close() hands
+  the connection back to the pool.
+  """
+
+  def __init__(self, db):
+    self.db = db
+    self.connection = db.borrow_connection()
+    try:
+      self.cursor = db.wrap_cursor(self.connection.cursor(buffered=True))
+    except Exception:
+      db.return_connection(self.connection)
+      raise
+
+  def bind(self, repository):
+    """
+    A copy of repository running on this connection. Listener lists are
+    shared with the original, so change notifications still reach the
+    same caches.
+    """
+    bound = copy.copy(repository)
+    bound.db = self
+    bound.connection = self.connection
+    bound.cursor = self.cursor
+    return bound
+
+  def close(self):
+    try:
+      self.cursor.close()
+    except mysql.connector.Error:
+      pass
+    self.db.return_connection(self.connection)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
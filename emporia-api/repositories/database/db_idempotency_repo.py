@@ -0,0 +1,129 @@
+# emporia-api/repositories/database/db_idempotency_repo.py
+import logging
+from repositories.interfaces.idempotency_repo import IdempotencyRepository
+import mysql.connector
+
+logger = logging.getLogger(__name__)
+
+
+class DBIdempotencyRepo(IdempotencyRepository):
+    def __init__(self, db):
+        super().__init__(db)
+        self.connection = db.connection
+        self.cursor = db.cursor
+
+    def reserve(self, customer_id, key, request_hash, ttl_seconds, lock_seconds):
+        try:
+            if self._insert(customer_id, key, request_hash, ttl_seconds):
+                return None
+
+            self.cursor.execute("""
+                SELECT request_hash, status, response_code, response_body,
+                       expires_at < CURRENT_TIMESTAMP(6) AS expired,
+                       status = 'in_progress'
+                           AND created_at < CURRENT_TIMESTAMP(6) - INTERVAL %s SECOND AS abandoned
+                FROM idempotency_keys
+                WHERE customer_id = %s AND idempotency_key = %s
+            """, (lock_seconds, customer_id, key))
+            row = self.cursor.fetchone()
+            self.connection.commit()
+
+            if row is None or row[4] or row[5]:
+                # Expired, or left in progress by a worker that died: take it
+                # over. The delete repeats the check, so of two retries that
+                # read the same stale row only one removes it; the other would
+                # otherwise delete the winner's fresh claim and run checkout too
+                if row is not None:
+                    self.cursor.execute("""
+                        DELETE FROM idempotency_keys
+                        WHERE customer_id = %s AND idempotency_key = %s
+                          AND (expires_at < CURRENT_TIMESTAMP(6)
+                               OR (status = 'in_progress'
+                                   AND created_at < CURRENT_TIMESTAMP(6) - INTERVAL %s SECOND))
+                    """, (customer_id, key, lock_seconds))
+                    taken_over = self.cursor.rowcount == 1
+                    self.connection.commit()
+                    if not taken_over:
+                        return self._claimed_concurrently(request_hash)
+                if self._insert(customer_id, key, request_hash, ttl_seconds):
+                    return None
+                return self._claimed_concurrently(request_hash)
+
+            return {
+                'request_hash': row[0],
+                'status': row[1],
+                'response_code': row[2],
+                'response_body': row[3]
+            }
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def _claimed_concurrently(self, request_hash):
+        # Another request holds the key now; it is reported as in progress
+        return {
+            'request_hash': request_hash,
+            'status': 'in_progress',
+            'response_code': None,
+            'response_body': None
+        }
+
+    def _insert(self, customer_id, key, request_hash, ttl_seconds):
+        try:
+            self.cursor.execute("""
+                INSERT INTO idempotency_keys (customer_id, idempotency_key, request_hash, expires_at)
+                VALUES (%s, %s, %s, CURRENT_TIMESTAMP(6) + INTERVAL %s SECOND)
+            """, (customer_id, key, request_hash, ttl_seconds))
+            self.connection.commit()
+            return True
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            if err.errno == 1062:  # Duplicate entry error
+                return False
+            raise
+
+    def save_response(self, customer_id, key, response_code, response_body):
+        try:
+            self.cursor.execute("""
+                UPDATE idempotency_keys
+                SET status = 'completed', response_code = %s, response_body = %s
+                WHERE customer_id = %s AND idempotency_key = %s
+            """, (response_code, response_body, customer_id, key))
+            self.connection.commit()
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def release(self, customer_id, key):
+        try:
+            self.cursor.execute("""
+                DELETE FROM idempotency_keys
+                WHERE customer_id = %s AND idempotency_key = %s AND status = 'in_progress'
+            """, (customer_id, key))
+            self.connection.commit()
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def purge_expired(self, limit):
+        try:
+            self.cursor.execute("""
+                DELETE FROM idempotency_keys
+                WHERE expires_at < CURRENT_TIMESTAMP(6)
+                ORDER BY expires_at
+                LIMIT %s
+            """, (limit,))
+            deleted = self.cursor.rowcount
+            self.connection.commit()
+            return deleted
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
@@ -1,55 +1,96 @@
 # emporia-api/repositories/database/db_order_repo.py
+import logging
 from flask import g
 from repositories.interfaces.order_repo import OrderRepository
 import mysql.connector
 from models.Order.Order import Order
+from models.Order.OrderStatus import OrderStatus
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+
+def _checkout_finished(saga_id, saga_status):
+    """
+    Whether the checkout that created an order is over. While its saga is
+    still running, or being compensated in process or by recovery, the
+    saga owns the order's stock and payment: cancelling would restock
+    twice, or leave a captured payment on a cancelled order. A saga row
+    that is gone was purged after finishing.
+    """
+    return saga_id is None or saga_status is None or saga_status == 'completed'
+
+
+def _skip_reason(saga_status):
+    # A failed compensation waits for an admin; anything else is still in flight
+    return 'checkout_failed' if saga_status == 'compensation_failed' else 'checkout_in_progress'
+
+
 class DBOrderRepo(OrderRepository):
     def __init__(self, db):
         super().__init__(db)
         self.connection = db.connection
         self.cursor = db.cursor
+        # Callbacks run with a product ID after cancellation restocks it
+        self.restock_listeners = []
+
+    def add_restock_listener(self, listener):
+        self.restock_listeners.append(listener)
         
-    def create_order(self, order):
+    def create_order(self, order, saga_id=None):
         try:
             # Insert the order
             self.cursor.execute("""
-                INSERT INTO orders (customer_id, order_date, status, total_amount)
-                VALUES (%s, %s, %s, %s)
+                INSERT INTO orders (customer_id, order_date, status, total_amount, saga_id)
+                VALUES (%s, %s, %s, %s, %s)
             """, (
                 order.customer_id,
                 order.date,
                 order.status,
-                order.amount
+                order.amount,
+                saga_id
             ))
             
             order_id = self.cursor.lastrowid
             order.order_id = order_id
             
-            # Insert order items
-            for item in order.product_list:
-                self.cursor.execute("""
-                    INSERT INTO order_items (order_id, product_id, quantity, price)
-                    VALUES (%s, %s, %s, %s)
-                """, (
-                    order_id,
-                    item.product.product_id,
-                    item.quantity,
-                    item.product.price
-                ))
+            # Insert order items; the connector folds executemany of an
+            # INSERT ... VALUES into one multi-row statement (one round-trip)
+            self.cursor.executemany("""
+                INSERT INTO order_items (order_id, product_id, quantity, price)
+                VALUES (%s, %s, %s, %s)
+            """, [(
+                order_id,
+                item.product.product_id,
+                item.quantity,
+                item.product.price
+            ) for item in order.product_list])
+
+            # Denormalized copy keyed by seller, so a seller's orders never
+            # need a scan of the whole order_items history
+            self.cursor.execute("""
+                INSERT INTO seller_order_lines
+                    (order_item_id, seller_id, order_id, customer_id, product_id,
+                     product_name, quantity, price, order_date)
+                SELECT oi.id, p.seller_id, oi.order_id, o.customer_id, oi.product_id,
+                       p.name, oi.quantity, oi.price, o.order_date
+                FROM order_items oi
+                JOIN orders o ON o.id = oi.order_id
+                JOIN products p ON p.id = oi.product_id
+                WHERE oi.order_id = %s
+            """, (order_id,))
             
             self.connection.commit()
             return order
             
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             raise ValueError(f"Database error: {err}")
                 
         except Exception as e:
             self.connection.rollback()
-            print(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise Exception(f"Order creation failed: {e}")
     
     def get_by_id(self, order_id):
@@ -115,6 +156,47 @@ class DBOrderRepo(OrderRepository):
         except Exception as e:
             raise ValueError(f"Error fetching order: {e}")
     
+    def get_order_id_by_saga(self, saga_id):
+        try:
+            self.cursor.execute("""
+                SELECT id FROM orders WHERE saga_id = %s
+            """, (saga_id,))
+
+            row = self.cursor.fetchone()
+            return row[0] if row else None
+
+        except Exception as e:
+            raise ValueError(f"Error fetching order: {e}")
+
+    def get_seller_lines(self, seller_id, before_id=None, limit=50):
+        try:
+            # Walks idx_seller_order_lines_seller backwards from the cursor;
+            # orders is only joined by primary key for the rows returned
+            self.cursor.execute("""
+                SELECT sol.order_item_id, sol.order_id, sol.customer_id, sol.product_id,
+                       sol.product_name, sol.quantity, sol.price, sol.order_date, o.status
+                FROM seller_order_lines sol
+                JOIN orders o ON o.id = sol.order_id
+                WHERE sol.seller_id = %s AND sol.order_item_id < %s
+                ORDER BY sol.order_item_id DESC
+                LIMIT %s
+            """, (seller_id, before_id if before_id is not None else 2 ** 31 - 1, limit))
+
+            return [{
+                'line_id': row[0],
+                'order_id': row[1],
+                'customer_id': row[2],
+                'product_id': row[3],
+                'product_name': row[4],
+                'quantity': row[5],
+                'price': row[6],
+                'order_date': row[7],
+                'status': row[8]
+            } for row in self.cursor.fetchall()]
+
+        except Exception as e:
+            raise ValueError(f"Error fetching seller orders: {e}")
+
     def get_orders_by_customer(self, customer_id):
         try:
             # Get all orders for customer
@@ -158,16 +240,217 @@ class DBOrderRepo(OrderRepository):
             
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             raise ValueError(f"Database error: {err}")
                 
         except Exception as e:
             self.connection.rollback()
             raise Exception(f"Order update failed: {e}")
     
+    def transition_status(self, order_id, new_status, from_statuses=None, customer_id=None,
+                          require_finished_checkout=False):
+        try:
+            from_statuses = from_statuses or OrderStatus.sources(new_status)
+            placeholders = ', '.join(['%s'] * len(from_statuses))
+            # Assignments run left to right, so previous_status keeps the old value
+            query = f"""
+                UPDATE orders
+                SET previous_status = status, status = %s
+                WHERE id = %s AND status IN ({placeholders})
+            """
+            params = [new_status, order_id, *from_statuses]
+            if customer_id is not None:
+                query += " AND customer_id = %s"
+                params.append(customer_id)
+            if require_finished_checkout:
+                # Same rule as _checkout_finished; a subquery keeps this a
+                # single-table UPDATE, whose assignment order is guaranteed
+                query += """
+                  AND NOT EXISTS (
+                      SELECT 1 FROM order_sagas s WHERE s.id = orders.saga_id AND s.status <> 'completed'
+                  )
+                """
+
+            self.cursor.execute(query, tuple(params))
+            if self.cursor.rowcount == 0:
+                self._reject_transition(order_id, new_status, customer_id, require_finished_checkout)
+
+            if new_status == OrderStatus.PAID:
+                self._apply_sales([order_id], 1)
+
+            self.connection.commit()
+            return True
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def _apply_sales(self, order_ids, sign):
+        """
+        Add (sign=1) or subtract (sign=-1) the lines of orders to the daily
+        sales rollup, and queue the change for the recommendation builder,
+        inside the caller's transaction
+        """
+        self.cursor.executemany("""
+            INSERT INTO recommendation_events (order_id, sign) VALUES (%s, %s)
+        """, [(order_id, sign) for order_id in order_ids])
+
+        placeholders = ', '.join(['%s'] * len(order_ids))
+        self.cursor.execute(f"""
+            INSERT INTO sales_daily (day, product_id, seller_id, category_id, units, revenue)
+            SELECT DATE(o.order_date), oi.product_id, p.seller_id, p.category_id,
+                   %s * SUM(oi.quantity), %s * SUM(oi.quantity * oi.price)
+            FROM order_items oi
+            JOIN orders o ON o.id = oi.order_id
+            JOIN products p ON p.id = oi.product_id
+            WHERE oi.order_id IN ({placeholders})
+            GROUP BY DATE(o.order_date), oi.product_id, p.seller_id, p.category_id
+            ON DUPLICATE KEY UPDATE units = units + VALUES(units), revenue = revenue + VALUES(revenue)
+        """, (sign, sign, *order_ids))
+
+    def _reject_transition(self, order_id, new_status, customer_id=None, require_finished_checkout=False):
+        # Only reached when the guarded UPDATE matched nothing
+        self.cursor.execute("""
+            SELECT o.status, o.customer_id, o.saga_id, s.status
+            FROM orders o
+            LEFT JOIN order_sagas s ON s.id = o.saga_id
+            WHERE o.id = %s
+        """, (order_id,))
+        row = self.cursor.fetchone()
+        # End the transaction before raising, so its snapshot is not left
+        # open on the connection
+        self.connection.rollback()
+
+        if not row or (customer_id is not None and row[1] != customer_id):
+            raise ValueError(f"Order with ID {order_id} not found")
+        if require_finished_checkout and not _checkout_finished(row[2], row[3]):
+            raise ValueError(f"Checkout of order {order_id} has not finished ({row[3]})")
+        raise ValueError(f"Cannot change order {order_id} from '{row[0]}' to '{new_status}'")
+
+    def cancel_orders(self, order_ids, customer_id=None, resolve_failed=False):
+        if not order_ids:
+            return {}, {}
+        try:
+            sources = OrderStatus.sources(OrderStatus.CANCELLED)
+            # Lock the cancellable orders (and their sagas) first so only rows
+            # changed by this transaction are restocked, even under concurrent
+            # cancellations or saga recovery
+            query = f"""
+                SELECT o.id, o.status, o.saga_id, s.status
+                FROM orders o
+                LEFT JOIN order_sagas s ON s.id = o.saga_id
+                WHERE o.id IN ({', '.join(['%s'] * len(order_ids))})
+                  AND o.status IN ({', '.join(['%s'] * len(sources))})
+            """
+            params = [*order_ids, *sources]
+            if customer_id is not None:
+                query += " AND o.customer_id = %s"
+                params.append(customer_id)
+            self.cursor.execute(query + " FOR UPDATE", tuple(params))
+
+            cancelled, skipped, failed_sagas = {}, {}, []
+            for order_id, status, saga_id, saga_status in self.cursor.fetchall():
+                if _checkout_finished(saga_id, saga_status):
+                    cancelled[order_id] = status
+                elif resolve_failed and saga_status == 'compensation_failed':
+                    # An admin reviewed the stuck checkout and settles it by cancelling
+                    cancelled[order_id] = status
+                    failed_sagas.append(saga_id)
+                else:
+                    skipped[order_id] = _skip_reason(saga_status)
+            if not cancelled:
+                self.connection.rollback()
+                return {}, skipped
+
+            ids = tuple(cancelled)
+            placeholders = ', '.join(['%s'] * len(ids))
+            self.cursor.execute(f"""
+                UPDATE orders
+                SET previous_status = status, status = %s
+                WHERE id IN ({placeholders})
+            """, (OrderStatus.CANCELLED, *ids))
+
+            # Every line of every cancelled order back in stock, in one statement
+            self.cursor.execute(f"""
+                UPDATE products p
+                JOIN (
+                    SELECT product_id, SUM(quantity) AS quantity
+                    FROM order_items
+                    WHERE order_id IN ({placeholders})
+                    GROUP BY product_id
+                ) restocked ON restocked.product_id = p.id
+                SET p.stock = p.stock + restocked.quantity,
+                    p.updated_at = CURRENT_TIMESTAMP(6)
+            """, ids)
+
+            self.cursor.execute(f"""
+                SELECT DISTINCT product_id FROM order_items WHERE order_id IN ({placeholders})
+            """, ids)
+            product_ids = [row[0] for row in self.cursor.fetchall()]
+
+            # Paid orders were counted as sales when they were paid
+            unsold = [order_id for order_id, status in cancelled.items() if status in OrderStatus.SOLD]
+            if unsold:
+                self._apply_sales(unsold, -1)
+
+            if failed_sagas:
+                # Finished now, so recovery and retention treat them as done
+                self.cursor.execute(f"""
+                    UPDATE order_sagas
+                    SET status = 'compensated', claimed_by = NULL
+                    WHERE id IN ({', '.join(['%s'] * len(failed_sagas))})
+                """, tuple(failed_sagas))
+
+            self.connection.commit()
+            for product_id in product_ids:
+                for listener in self.restock_listeners:
+                    listener(product_id)
+            return cancelled, skipped
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def revert_status(self, order_id, from_status):
+        try:
+            self.cursor.execute("""
+                UPDATE orders
+                SET status = previous_status, previous_status = NULL
+                WHERE id = %s AND status = %s AND previous_status IS NOT NULL
+            """, (order_id, from_status))
+
+            reverted = self.cursor.rowcount > 0
+            if reverted and from_status == OrderStatus.PAID:
+                self._apply_sales([order_id], -1)
+            self.connection.commit()
+            return reverted
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
     def delete_order(self, order_id):
         try:
-            # Delete order items first (foreign key constraint)
+            self.cursor.execute("""
+                SELECT status FROM orders WHERE id = %s FOR UPDATE
+            """, (order_id,))
+            row = self.cursor.fetchone()
+            # A sold order is in sales_daily and queued for product_pairs,
+            # both of which are undone from its items; without them its
+            # counts would stay forever
+            if row and row[0] in OrderStatus.SOLD:
+                self.connection.rollback()
+                raise ValueError(f"Order {order_id} is {row[0]}; revert or cancel it instead of deleting it")
+
+            # Delete seller lines and order items first (foreign key constraints)
+            self.cursor.execute("""
+                DELETE FROM seller_order_lines
+                WHERE order_id = %s
+            """, (order_id,))
+
             self.cursor.execute("""
                 DELETE FROM order_items 
                 WHERE order_id = %s
@@ -187,7 +470,7 @@ class DBOrderRepo(OrderRepository):
             
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             raise ValueError(f"Database error: {err}")
                 
         except Exception as e:
@@ -1,13 +1,40 @@
+import logging
 from flask import g
 from repositories.interfaces.product_repo import ProductRepository
 import mysql.connector
 from models.Product.Product import Product
 
+logger = logging.getLogger(__name__)
+
+# Column order expected by DBProductRepo._row_to_product
+PRODUCT_COLUMNS = "id, category_id, name, description, price, stock, seller_id, image, updated_at"
+
+# API field name -> products column, used to narrow SELECT lists for sparse fieldsets
+PRODUCT_FIELD_COLUMNS = {
+    'product_id': 'id',
+    'category_id': 'category_id',
+    'name': 'name',
+    'description': 'description',
+    'price': 'price',
+    'stock': 'stock',
+    'seller_id': 'seller_id',
+    'image': 'image'
+}
+
 class DBProductRepo(ProductRepository):
     def __init__(self, db):
         super().__init__(db)
         self.connection = db.connection
         self.cursor = db.cursor
+        # Callbacks run with a product ID after an update or delete is committed
+        self.change_listeners = []
+
+    def add_change_listener(self, listener):
+        self.change_listeners.append(listener)
+
+    def _notify_change(self, product_id):
+        for listener in self.change_listeners:
+            listener(product_id)
         
     def create(self, product):
         try:
@@ -32,7 +59,7 @@ class DBProductRepo(ProductRepository):
             
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             
             if err.errno == 1452:  # Foreign key constraint fails
                 if "seller_id" in str(err):
@@ -46,13 +73,14 @@ class DBProductRepo(ProductRepository):
                 
         except Exception as e:
             self.connection.rollback()
-            print(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise Exception(f"Product creation failed: {e}")
     
-    def get_all_products(self, limit=100, offset=0):
+    def get_all_products(self, limit=100, offset=0, fields=None):
         try:
-            self.cursor.execute("""
-                SELECT id, category_id, name, description, price, stock, seller_id, image
+            columns = self._select_columns(fields)
+            self.cursor.execute(f"""
+                SELECT {', '.join(columns)}
                 FROM products
                 LIMIT %s OFFSET %s
             """, (limit, offset))
@@ -61,16 +89,7 @@ class DBProductRepo(ProductRepository):
             products = []
             
             for product_data in products_data:
-                product = Product(
-                    product_id=product_data[0],
-                    category_id=product_data[1],
-                    name=product_data[2],
-                    description=product_data[3],
-                    price=product_data[4],
-                    stock=product_data[5],
-                    seller_id=product_data[6],
-                    image=product_data[7]
-                )
+                product = self._row_to_product(product_data, columns)
                 products.append(product)
                 
             return products
@@ -78,10 +97,30 @@ class DBProductRepo(ProductRepository):
         except Exception as e:
             raise ValueError(f"Error fetching products: {e}")
     
-    def get_by_id(self, product_id):
+    def get_products_after(self, last_id=0, limit=1000):
+        """
+        Keyset page: the next `limit` products with an id greater than last_id.
+        Unlike LIMIT/OFFSET the cost of each page does not grow with its depth.
+        """
         try:
-            self.cursor.execute("""
-                SELECT id, category_id, name, description, price, stock, seller_id, image
+            self.cursor.execute(f"""
+                SELECT {PRODUCT_COLUMNS}
+                FROM products
+                WHERE id > %s
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, limit))
+
+            return [self._row_to_product(product_data) for product_data in self.cursor.fetchall()]
+
+        except Exception as e:
+            raise ValueError(f"Error fetching products: {e}")
+
+    def get_by_id(self, product_id, fields=None):
+        try:
+            columns = self._select_columns(fields)
+            self.cursor.execute(f"""
+                SELECT {', '.join(columns)}
                 FROM products 
                 WHERE id = %s
             """, (product_id,))
@@ -89,26 +128,18 @@ class DBProductRepo(ProductRepository):
             product_data = self.cursor.fetchone()
             
             if product_data:
-                return Product(
-                    product_id=product_data[0],
-                    category_id=product_data[1],
-                    name=product_data[2],
-                    description=product_data[3],
-                    price=product_data[4],
-                    stock=product_data[5],
-                    seller_id=product_data[6],
-                    image=product_data[7]
-                )
+                return self._row_to_product(product_data, columns)
             else:
                 return None
                 
         except Exception as e:
             raise ValueError(f"Error fetching product by ID: {e}")
     
-    def get_by_category(self, category_id):
+    def get_by_category(self, category_id, fields=None):
         try:
-            self.cursor.execute("""
-                SELECT id, category_id, name, description, price, stock, seller_id, image
+            columns = self._select_columns(fields)
+            self.cursor.execute(f"""
+                SELECT {', '.join(columns)}
                 FROM products 
                 WHERE category_id = %s
             """, (category_id,))
@@ -117,16 +148,7 @@ class DBProductRepo(ProductRepository):
             products = []
             
             for product_data in products_data:
-                product = Product(
-                    product_id=product_data[0],
-                    category_id=product_data[1],
-                    name=product_data[2],
-                    description=product_data[3],
-                    price=product_data[4],
-                    stock=product_data[5],
-                    seller_id=product_data[6],
-                    image=product_data[7]
-                )
+                product = self._row_to_product(product_data, columns)
                 products.append(product)
                 
             return products
@@ -134,30 +156,21 @@ class DBProductRepo(ProductRepository):
         except Exception as e:
             raise ValueError(f"Error fetching products by category: {e}")
     
-    def get_by_seller(self, seller_id):
+    def get_by_seller(self, seller_id, fields=None):
         try:
-            print(f"Retrieving products for seller ID: {seller_id}")
-            self.cursor.execute("""
-                SELECT id, category_id, name, description, price, stock, seller_id, image
+            columns = self._select_columns(fields)
+            self.cursor.execute(f"""
+                SELECT {', '.join(columns)}
                 FROM products 
                 WHERE seller_id = %s
             """, (seller_id,))
             
             products_data = self.cursor.fetchall()
-            print(f"Retrieved {len(products_data)} products for seller ID {seller_id}")
+            logger.debug("Fetched seller products", extra={'seller_id': seller_id, 'count': len(products_data)})
             products = []
             
             for product_data in products_data:
-                product = Product(
-                    product_id=product_data[0],
-                    category_id=product_data[1],
-                    name=product_data[2],
-                    description=product_data[3],
-                    price=product_data[4],
-                    stock=product_data[5],
-                    seller_id=product_data[6],
-                    image=product_data[7]
-                )
+                product = self._row_to_product(product_data, columns)
                 products.append(product)
            
             return products
@@ -169,7 +182,8 @@ class DBProductRepo(ProductRepository):
         try:
             self.cursor.execute("""
                 UPDATE products 
-                SET category_id = %s, name = %s, description = %s, price = %s, stock = %s, image = %s
+                SET category_id = %s, name = %s, description = %s, price = %s, stock = %s, image = %s,
+                    updated_at = CURRENT_TIMESTAMP(6)
                 WHERE id = %s AND seller_id = %s
             """, (
                 product.category_id,
@@ -197,6 +211,7 @@ class DBProductRepo(ProductRepository):
                     raise ValueError(f"Product with ID {product.product_id} not found")
                 
             self.connection.commit()
+            self._notify_change(product.product_id)
             return product
             
         except mysql.connector.Error as err:
@@ -208,13 +223,55 @@ class DBProductRepo(ProductRepository):
                 else:
                     raise ValueError(f"Foreign key constraint error: {err}")
             else:
-                print(f"MySQL Error: {err.errno} - {err.msg}")
+                logger.error("MySQL error %s: %s", err.errno, err.msg)
                 raise ValueError(f"Database error: {err}")
                 
         except Exception as e:
             self.connection.rollback()
             raise Exception(f"Product update failed: {e}")
     
+    def deduct_stock(self, quantities):
+        try:
+            # Relative and guarded, so concurrent checkouts cannot lose a
+            # decrement or take stock below zero
+            for product_id, quantity in quantities.items():
+                self.cursor.execute("""
+                    UPDATE products
+                    SET stock = stock - %s, updated_at = CURRENT_TIMESTAMP(6)
+                    WHERE id = %s AND stock >= %s
+                """, (quantity, product_id, quantity))
+
+                if self.cursor.rowcount == 0:
+                    self.connection.rollback()
+                    raise ValueError(f"Insufficient stock for product ID {product_id}")
+
+            self.connection.commit()
+            for product_id in quantities:
+                self._notify_change(product_id)
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def restock(self, quantities):
+        try:
+            # Relative update, so concurrent stock changes are not overwritten
+            self.cursor.executemany("""
+                UPDATE products
+                SET stock = stock + %s, updated_at = CURRENT_TIMESTAMP(6)
+                WHERE id = %s
+            """, [(quantity, product_id) for product_id, quantity in quantities.items()])
+
+            self.connection.commit()
+            for product_id in quantities:
+                self._notify_change(product_id)
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
     def delete(self, product_id, seller_id=None):
         try:
             # If seller_id is provided, ensure product belongs to the seller
@@ -245,15 +302,142 @@ class DBProductRepo(ProductRepository):
                 
                 if self.cursor.rowcount == 0:
                     raise ValueError(f"Product with ID {product_id} not found")
-                
+
+            # Leave a tombstone so the change feed can report the deletion
+            self.cursor.execute("""
+                INSERT INTO product_tombstones (product_id)
+                VALUES (%s)
+                ON DUPLICATE KEY UPDATE deleted_at = CURRENT_TIMESTAMP(6)
+            """, (product_id,))
+
             self.connection.commit()
+            self._notify_change(product_id)
             return True
             
         except mysql.connector.Error as err:
             self.connection.rollback()
-            print(f"MySQL Error: {err.errno} - {err.msg}")
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
             raise ValueError(f"Database error: {err}")
             
         except Exception as e:
             self.connection.rollback()
-            raise Exception(f"Product deletion failed: {e}")
\ No newline at end of file
+            raise Exception(f"Product deletion failed: {e}")
+
+    def get_catalog_version(self):
+        """
+        A cheap version stamp for the whole catalog: the newest product write
+        and the newest deletion. Both are single index lookups.
+        """
+        try:
+            self.cursor.execute("""
+                SELECT
+                    (SELECT MAX(updated_at) FROM products),
+                    (SELECT MAX(deleted_at) FROM product_tombstones)
+            """)
+            return self.cursor.fetchone()
+
+        except Exception as e:
+            raise ValueError(f"Error fetching catalog version: {e}")
+
+    def get_version(self, product_id):
+        """
+        Return a product's updated_at without loading the row, or None if it does not exist.
+        """
+        try:
+            self.cursor.execute("""
+                SELECT updated_at FROM products WHERE id = %s
+            """, (product_id,))
+
+            row = self.cursor.fetchone()
+            return row[0] if row else None
+
+        except Exception as e:
+            raise ValueError(f"Error fetching product version: {e}")
+
+    def get_changes_since(self, changed_at, last_id=0, limit=500, settle_seconds=2):
+        """
+        Fetch up to `limit` product changes ordered by (changed_at, product_id),
+        strictly after the (changed_at, last_id) position.
+
+        Returns a list of (product_id, changed_at, product) tuples where
+        product is None for a deletion. Changes younger than settle_seconds
+        are held back so a transaction that commits late with an earlier
+        timestamp cannot slip behind a cursor that has already moved past it.
+        """
+        try:
+            self.cursor.execute(f"""
+                (SELECT {PRODUCT_COLUMNS}, updated_at AS changed_at
+                 FROM products
+                 WHERE (updated_at > %s OR (updated_at = %s AND id > %s))
+                   AND updated_at < NOW(6) - INTERVAL %s SECOND
+                 ORDER BY updated_at, id
+                 LIMIT %s)
+                UNION ALL
+                (SELECT product_id, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, deleted_at
+                 FROM product_tombstones
+                 WHERE (deleted_at > %s OR (deleted_at = %s AND product_id > %s))
+                   AND deleted_at < NOW(6) - INTERVAL %s SECOND
+                 ORDER BY deleted_at, product_id
+                 LIMIT %s)
+                ORDER BY changed_at, id
+                LIMIT %s
+            """, (
+                changed_at, changed_at, last_id, settle_seconds, limit,
+                changed_at, changed_at, last_id, settle_seconds, limit,
+                limit
+            ))
+
+            changes = []
+            for row in self.cursor.fetchall():
+                deleted = row[8] is None
+                product = None if deleted else self._row_to_product(row)
+                changes.append((row[0], row[9], product))
+
+            return changes
+
+        except Exception as e:
+            raise ValueError(f"Error fetching product changes: {e}")
+
+    def _select_columns(self, fields=None):
+        """
+        Columns to read for the requested API fields; all of them when fields is empty.
+        The id and updated_at columns are always read since callers key and version
+        products by them.
+        """
+        if not fields:
+            return PRODUCT_COLUMNS.split(", ")
+
+        columns = ['id']
+        for field, column in PRODUCT_FIELD_COLUMNS.items():
+            if field in fields and column != 'id':
+                columns.append(column)
+        columns.append('updated_at')
+        return columns
+
+    def _row_to_product(self, product_data, columns=None):
+        if columns is not None:
+            values = dict(zip(columns, product_data))
+            return Product(
+                product_id=values['id'],
+                category_id=values.get('category_id'),
+                name=values.get('name'),
+                description=values.get('description'),
+                price=values.get('price'),
+                stock=values.get('stock'),
+                seller_id=values.get('seller_id'),
+                image=values.get('image'),
+                updated_at=values.get('updated_at')
+            )
+
+        return Product(
+            product_id=product_data[0],
+            category_id=product_data[1],
+            name=product_data[2],
+            description=product_data[3],
+            price=product_data[4],
+            stock=product_data[5],
+            seller_id=product_data[6],
+            image=product_data[7],
+            updated_at=product_data[8]
+        )
+
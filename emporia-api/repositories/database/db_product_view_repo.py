@@ -0,0 +1,32 @@
+# emporia-api/repositories/database/db_product_view_repo.py
+import logging
+from repositories.interfaces.product_view_repo import ProductViewRepository
+import mysql.connector
+
+logger = logging.getLogger(__name__)
+
+
+class DBProductViewRepo(ProductViewRepository):
+    def __init__(self, db):
+        super().__init__(db)
+        self.connection = db.connection
+        self.cursor = db.cursor
+
+    def add_views(self, counts, batch_size=1000):
+        if not counts:
+            return
+        # Key order keeps concurrent flushes from different workers deadlock-free
+        rows = [(day, product_id, views) for (day, product_id), views in sorted(counts.items())]
+        try:
+            for start in range(0, len(rows), batch_size):
+                self.cursor.executemany("""
+                    INSERT INTO product_views (day, product_id, views)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE views = views + VALUES(views)
+                """, rows[start:start + batch_size])
+            self.connection.commit()
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
@@ -0,0 +1,109 @@
+# emporia-api/repositories/database/db_recommendation_repo.py
+import logging
+from repositories.interfaces.recommendation_repo import RecommendationRepository
+import mysql.connector
+
+logger = logging.getLogger(__name__)
+
+
+class DBRecommendationRepo(RecommendationRepository):
+    def __init__(self, db):
+        super().__init__(db)
+        self.connection = db.connection
+        self.cursor = db.cursor
+
+    def lock_builder(self, name):
+        try:
+            self.cursor.execute("""
+                INSERT IGNORE INTO recommendation_state (name) VALUES (%s)
+            """, (name,))
+            self.connection.commit()
+
+            # Held until add_pairs or release: workers building at the same
+            # time wait here instead of counting the same events twice
+            self.cursor.execute("""
+                SELECT name FROM recommendation_state WHERE name = %s FOR UPDATE
+            """, (name,))
+            self.cursor.fetchone()
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def get_events(self, limit):
+        try:
+            # Whole events per batch, so an order's items are never split. An
+            # event committed late with a lower id is simply picked up by a
+            # later batch, since consumed events are deleted, not skipped
+            self.cursor.execute("""
+                SELECT e.id, COALESCE(oi.product_id, 0), e.sign
+                FROM (
+                    SELECT id, order_id, sign FROM recommendation_events
+                    ORDER BY id
+                    LIMIT %s
+                ) e
+                LEFT JOIN order_items oi ON oi.order_id = e.order_id
+                ORDER BY e.id
+            """, (limit,))
+            return self.cursor.fetchall()
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def add_pairs(self, pairs, event_ids, batch_size=5000):
+        try:
+            for start in range(0, len(pairs), batch_size):
+                self.cursor.executemany("""
+                    INSERT INTO product_pairs (product_id, related_id, orders)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE orders = orders + VALUES(orders)
+                """, pairs[start:start + batch_size])
+
+            for start in range(0, len(event_ids), 1000):
+                chunk = event_ids[start:start + 1000]
+                self.cursor.execute(f"""
+                    DELETE FROM recommendation_events WHERE id IN ({', '.join(['%s'] * len(chunk))})
+                """, tuple(chunk))
+            self.connection.commit()
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def release(self):
+        self.connection.rollback()
+
+    def get_changed_products(self, since):
+        try:
+            self.cursor.execute("SELECT CURRENT_TIMESTAMP(6)")
+            now = self.cursor.fetchone()[0]
+            self.cursor.execute("""
+                SELECT DISTINCT product_id FROM product_pairs WHERE updated_at >= %s
+            """, (since,))
+            product_ids = [row[0] for row in self.cursor.fetchall()]
+            self.connection.commit()
+            return now, product_ids
+
+        except Exception as e:
+            raise ValueError(f"Error fetching changed recommendations: {e}")
+
+    def get_pairs(self, product_ids):
+        if not product_ids:
+            return []
+        try:
+            self.cursor.execute(f"""
+                SELECT product_id, related_id, orders
+                FROM product_pairs
+                WHERE product_id IN ({', '.join(['%s'] * len(product_ids))})
+                  AND orders > 0
+            """, tuple(product_ids))
+            rows = self.cursor.fetchall()
+            self.connection.commit()
+            return rows
+
+        except Exception as e:
+            raise ValueError(f"Error fetching product pairs: {e}")
@@ -0,0 +1,133 @@
+# emporia-api/repositories/database/db_saga_repo.py
+import json
+import logging
+from repositories.interfaces.saga_repo import SagaRepository
+import mysql.connector
+
+logger = logging.getLogger(__name__)
+
+# Sagas still owning uncommitted side effects
+UNFINISHED_STATUSES = ('running', 'compensating')
+FINISHED_STATUSES = ('completed', 'compensated')
+
+
+class DBSagaRepo(SagaRepository):
+    def __init__(self, db):
+        super().__init__(db)
+        self.connection = db.connection
+        self.cursor = db.cursor
+
+    def create_saga(self, saga_id, customer_id, payment_method):
+        try:
+            self.cursor.execute("""
+                INSERT INTO order_sagas (id, customer_id, payment_method, status)
+                VALUES (%s, %s, %s, 'running')
+            """, (saga_id, customer_id, payment_method))
+            self.connection.commit()
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def append(self, saga_id, step, event, data=None):
+        try:
+            self.cursor.execute("""
+                INSERT INTO order_saga_log (saga_id, step, event, data)
+                VALUES (%s, %s, %s, %s)
+            """, (saga_id, step, event, json.dumps(data) if data is not None else None))
+            # Heartbeat: recovery only claims sagas that stopped logging
+            self.cursor.execute("""
+                UPDATE order_sagas SET updated_at = CURRENT_TIMESTAMP(6) WHERE id = %s
+            """, (saga_id,))
+            self.connection.commit()
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def set_status(self, saga_id, status, order_id=None):
+        try:
+            self.cursor.execute("""
+                UPDATE order_sagas
+                SET status = %s, order_id = COALESCE(%s, order_id), claimed_by = NULL
+                WHERE id = %s
+            """, (status, order_id, saga_id))
+            self.connection.commit()
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def claim_stalled(self, owner, stale_seconds, limit):
+        try:
+            # A single UPDATE claims the whole batch, so concurrent recovery
+            # workers never pick the same saga
+            self.cursor.execute("""
+                UPDATE order_sagas
+                SET claimed_by = %s, recovery_attempts = recovery_attempts + 1
+                WHERE status IN (%s, %s)
+                  AND updated_at < CURRENT_TIMESTAMP(6) - INTERVAL %s SECOND
+                ORDER BY updated_at
+                LIMIT %s
+            """, (owner, *UNFINISHED_STATUSES, stale_seconds, limit))
+            self.connection.commit()
+
+            self.cursor.execute("""
+                SELECT id, customer_id, payment_method, order_id, status, recovery_attempts
+                FROM order_sagas
+                WHERE claimed_by = %s
+                ORDER BY updated_at
+            """, (owner,))
+            columns = ('id', 'customer_id', 'payment_method', 'order_id', 'status', 'recovery_attempts')
+            return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def get_logs(self, saga_ids):
+        if not saga_ids:
+            return {}
+        try:
+            placeholders = ', '.join(['%s'] * len(saga_ids))
+            self.cursor.execute(f"""
+                SELECT saga_id, step, event, data
+                FROM order_saga_log
+                WHERE saga_id IN ({placeholders})
+                ORDER BY id
+            """, tuple(saga_ids))
+
+            logs = {saga_id: [] for saga_id in saga_ids}
+            for saga_id, step, event, data in self.cursor.fetchall():
+                logs[saga_id].append({
+                    'step': step,
+                    'event': event,
+                    'data': json.loads(data) if data else {}
+                })
+            return logs
+
+        except mysql.connector.Error as err:
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def purge_finished(self, retention_days, limit):
+        try:
+            self.cursor.execute("""
+                DELETE FROM order_sagas
+                WHERE status IN (%s, %s)
+                  AND updated_at < CURRENT_TIMESTAMP(6) - INTERVAL %s DAY
+                ORDER BY updated_at
+                LIMIT %s
+            """, (*FINISHED_STATUSES, retention_days, limit))
+            deleted = self.cursor.rowcount
+            self.connection.commit()
+            return deleted
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
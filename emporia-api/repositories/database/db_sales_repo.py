@@ -0,0 +1,157 @@
+# emporia-api/repositories/database/db_sales_repo.py
+import logging
+from itertools import islice
+from repositories.interfaces.sales_repo import SalesRepository
+import mysql.connector
+from models.Order.OrderStatus import OrderStatus
+
+logger = logging.getLogger(__name__)
+
+# group_by -> (rollup column, query naming the rows of the top groups)
+GROUPS = {
+    'product': ('product_id', "SELECT id, name FROM products WHERE id IN ({})"),
+    'seller': ('seller_id', "SELECT seller_id, store_name FROM sellers WHERE seller_id IN ({})"),
+    'category': ('category_id', "SELECT id, name FROM categories WHERE id IN ({})"),
+}
+
+
+class DBSalesRepo(SalesRepository):
+    """
+    Reads and rebuilds sales_daily, the per product and day rollup of sold
+    order lines. Incremental updates happen in DBOrderRepo, in the same
+    transaction as the status change that causes them.
+    """
+
+    def __init__(self, db):
+        super().__init__(db)
+        self.connection = db.connection
+        self.cursor = db.cursor
+
+    def _filters(self, date_from, date_to, seller_id, category_id):
+        conditions = ["day BETWEEN %s AND %s"]
+        params = [date_from, date_to]
+        if seller_id is not None:
+            conditions.append("seller_id = %s")
+            params.append(seller_id)
+        if category_id is not None:
+            conditions.append("category_id = %s")
+            params.append(category_id)
+        return ' AND '.join(conditions), params
+
+    def get_totals(self, date_from, date_to, seller_id=None, category_id=None):
+        try:
+            where, params = self._filters(date_from, date_to, seller_id, category_id)
+            self.cursor.execute(f"""
+                SELECT COALESCE(SUM(units), 0), COALESCE(SUM(revenue), 0)
+                FROM sales_daily
+                WHERE {where}
+            """, tuple(params))
+            units, revenue = self.cursor.fetchone()
+            return {'units': int(units), 'revenue': revenue}
+
+        except Exception as e:
+            raise ValueError(f"Error fetching sales totals: {e}")
+
+    def get_grouped(self, group_by, date_from, date_to, seller_id=None, category_id=None, limit=20):
+        try:
+            where, params = self._filters(date_from, date_to, seller_id, category_id)
+            if group_by == 'day':
+                self.cursor.execute(f"""
+                    SELECT day, SUM(units), SUM(revenue)
+                    FROM sales_daily
+                    WHERE {where}
+                    GROUP BY day
+                    ORDER BY day
+                """, tuple(params))
+                return [{'day': row[0].isoformat(), 'units': int(row[1]), 'revenue': row[2]}
+                        for row in self.cursor.fetchall()]
+
+            column, _ = GROUPS[group_by]
+            self.cursor.execute(f"""
+                SELECT {column}, SUM(units), SUM(revenue)
+                FROM sales_daily
+                WHERE {where}
+                GROUP BY {column}
+                ORDER BY SUM(revenue) DESC, {column}
+                LIMIT %s
+            """, (*params, limit))
+            rows = self.cursor.fetchall()
+            names = self.get_names(group_by, [row[0] for row in rows])
+
+            return [{f'{group_by}_id': row[0], 'name': names.get(row[0]), 'units': int(row[1]), 'revenue': row[2]}
+                    for row in rows]
+
+        except Exception as e:
+            raise ValueError(f"Error fetching sales: {e}")
+
+    def get_names(self, group_by, ids):
+        # Looked up by primary key, for the returned groups only
+        ids = [group_id for group_id in ids if group_id is not None]
+        if not ids:
+            return {}
+        try:
+            self.cursor.execute(GROUPS[group_by][1].format(', '.join(['%s'] * len(ids))), tuple(ids))
+            return dict(self.cursor.fetchall())
+
+        except Exception as e:
+            raise ValueError(f"Error fetching {group_by} names: {e}")
+
+    def iter_sold_lines(self, date_from, date_to, chunk_size=50000):
+        placeholders = ', '.join(['%s'] * len(OrderStatus.SOLD))
+        # Integers only (epoch seconds, revenue in cents) so each chunk
+        # converts straight into an int64 array
+        rows = self.db.stream(f"""
+            SELECT o.id, o.customer_id, CAST(UNIX_TIMESTAMP(o.order_date) AS SIGNED),
+                   oi.product_id, oi.quantity, CAST(ROUND(oi.quantity * oi.price * 100) AS SIGNED)
+            FROM orders o
+            JOIN order_items oi ON oi.order_id = o.id
+            WHERE o.order_date >= %s AND o.order_date < %s
+              AND o.status IN ({placeholders})
+        """, (date_from, date_to, *OrderStatus.SOLD), chunk_size=chunk_size)
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield chunk
+
+    def get_order_date_range(self):
+        try:
+            self.cursor.execute("""
+                SELECT DATE(MIN(order_date)), DATE(MAX(order_date)) FROM orders
+            """)
+            return self.cursor.fetchone()
+
+        except Exception as e:
+            raise ValueError(f"Error fetching order dates: {e}")
+
+    def rebuild(self, date_from, date_to):
+        try:
+            # Delete and insert in one transaction: the INSERT ... SELECT locks the
+            # orders it reads, so a concurrent payment or cancellation of one of
+            # them waits and then applies its delta on top of the rebuilt rows
+            self.cursor.execute("""
+                DELETE FROM sales_daily WHERE day >= %s AND day < %s
+            """, (date_from, date_to))
+
+            placeholders = ', '.join(['%s'] * len(OrderStatus.SOLD))
+            self.cursor.execute(f"""
+                INSERT INTO sales_daily (day, product_id, seller_id, category_id, units, revenue)
+                SELECT DATE(o.order_date), oi.product_id, p.seller_id, p.category_id,
+                       SUM(oi.quantity), SUM(oi.quantity * oi.price)
+                FROM orders o
+                JOIN order_items oi ON oi.order_id = o.id
+                JOIN products p ON p.id = oi.product_id
+                WHERE o.order_date >= %s AND o.order_date < %s
+                  AND o.status IN ({placeholders})
+                GROUP BY DATE(o.order_date), oi.product_id, p.seller_id, p.category_id
+            """, (date_from, date_to, *OrderStatus.SOLD))
+            rows = self.cursor.rowcount
+
+            self.connection.commit()
+            return rows
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
@@ -0,0 +1,92 @@
+# emporia-api/repositories/database/db_trending_repo.py
+import logging
+from repositories.interfaces.trending_repo import TrendingRepository
+import mysql.connector
+
+logger = logging.getLogger(__name__)
+
+
+class DBTrendingRepo(TrendingRepository):
+    """
+    product_trending holds each score as log(score) + decay * (t - epoch):
+    the log of a decayed score rescaled to a fixed epoch. Rows can then be
+    ranked by the raw column through an index, and two scores are added
+    with a log-sum-exp without knowing when either was last updated.
+    """
+
+    def __init__(self, db):
+        super().__init__(db)
+        self.connection = db.connection
+        self.cursor = db.cursor
+
+    def add_scores(self, scores, batch_size=1000):
+        if not scores:
+            return
+        try:
+            for start in range(0, len(scores), batch_size):
+                batch = scores[start:start + batch_size]
+                # log(e^a + e^b) = max(a, b) + log(1 + e^-|a - b|), without overflow
+                self.cursor.executemany("""
+                    INSERT INTO product_trending (product_id, log_score)
+                    VALUES (%s, %s)
+                    ON DUPLICATE KEY UPDATE log_score =
+                        GREATEST(log_score, VALUES(log_score))
+                        + LN(1 + EXP(-ABS(log_score - VALUES(log_score))))
+                """, batch)
+
+                # Categories come from the catalog so moved products rank where they are now
+                self.cursor.execute(f"""
+                    UPDATE product_trending t
+                    JOIN products p ON p.id = t.product_id
+                    SET t.category_id = p.category_id
+                    WHERE t.product_id IN ({', '.join(['%s'] * len(batch))})
+                """, tuple(product_id for product_id, _ in batch))
+            self.connection.commit()
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
+
+    def get_top(self, category_id=None, limit=100):
+        try:
+            if category_id is None:
+                self.cursor.execute("""
+                    SELECT t.product_id, t.category_id, t.log_score, p.name, p.price, p.image
+                    FROM product_trending t
+                    JOIN products p ON p.id = t.product_id
+                    ORDER BY t.log_score DESC
+                    LIMIT %s
+                """, (limit,))
+            else:
+                self.cursor.execute("""
+                    SELECT t.product_id, t.category_id, t.log_score, p.name, p.price, p.image
+                    FROM product_trending t
+                    JOIN products p ON p.id = t.product_id
+                    WHERE t.category_id = %s
+                    ORDER BY t.log_score DESC
+                    LIMIT %s
+                """, (category_id, limit))
+            rows = self.cursor.fetchall()
+            self.connection.commit()
+            return rows
+
+        except Exception as e:
+            raise ValueError(f"Error fetching trending products: {e}")
+
+    def purge_below(self, log_score, limit):
+        try:
+            self.cursor.execute("""
+                DELETE FROM product_trending
+                WHERE log_score < %s
+                ORDER BY log_score
+                LIMIT %s
+            """, (log_score, limit))
+            deleted = self.cursor.rowcount
+            self.connection.commit()
+            return deleted
+
+        except mysql.connector.Error as err:
+            self.connection.rollback()
+            logger.error("MySQL error %s: %s", err.errno, err.msg)
+            raise ValueError(f"Database error: {err}")
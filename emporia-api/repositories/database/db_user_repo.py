@@ -1,7 +1,10 @@
+import logging
 from flask import g
 from repositories.interfaces.user_repo import UserRepository
 import mysql.connector
 
+logger = logging.getLogger(__name__)
+
 class DBUserRepo(UserRepository):
     def __init__(self, db):
         super().__init__(db)
@@ -47,7 +50,7 @@ class DBUserRepo(UserRepository):
                     
             self.connection.commit()
             
-            print(f"{user.first_name} has joined the {user.role} community!")
+            logger.info("User registered", extra={'user_id': user.id, 'role': user.role})
             
             return user
         
@@ -71,13 +74,13 @@ class DBUserRepo(UserRepository):
                 raise ValueError(f"Table doesn't exist: {err}")
             else:
                 # Log the error for debugging
-                print(f"MySQL Error: {err.errno} - {err.msg}")
+                logger.error("MySQL error %s: %s", err.errno, err.msg)
                 raise ValueError(f"Database error: {err}")
                 
         except Exception as e:
             # Handle other exceptions
             self.connection.rollback()
-            print(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise Exception(f"User creation failed: {e}")
         
     
@@ -90,12 +93,31 @@ class DBUserRepo(UserRepository):
             """, (limit, offset))
             
             users = self.cursor.fetchall()
-            print(f"Fetched {len(users)} users from the database.")
+            logger.debug("Fetched users", extra={'count': len(users)})
                             
             return users
         except Exception as e:
             raise ValueError(f"Error fetching users: {e}")
         
+    def get_users_after(self, last_id=0, limit=500):
+        """
+        Keyset page: the next `limit` user rows with an id greater than last_id.
+        Unlike LIMIT/OFFSET the cost of each page does not grow with its depth.
+        """
+        try:
+            self.cursor.execute("""
+                SELECT id, username, first_name, last_name, email, password, role
+                FROM users
+                WHERE id > %s
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, limit))
+
+            return self.cursor.fetchall()
+
+        except Exception as e:
+            raise ValueError(f"Error fetching users: {e}")
+
     def get_user_by_username(self, username):
         try:
             self.cursor.execute("""
@@ -107,10 +129,10 @@ class DBUserRepo(UserRepository):
             user = self.cursor.fetchone()
             
             if user:
-                print(f"User {username} found in the database.")
+                logger.debug("User lookup hit", extra={'username': username})
                 return user
             else:
-                print(f"User {username} not found in the database.")
+                logger.debug("User lookup miss", extra={'username': username})
                 return None
         except Exception as e:
             raise ValueError(f"Error fetching user by username: {e}")
@@ -126,10 +148,10 @@ class DBUserRepo(UserRepository):
             user = self.cursor.fetchone()
             
             if user:
-                print(f"User {userid} found in the database.")
+                logger.debug("User lookup hit", extra={'user_id': userid})
                 return user
             else:
-                print(f"User {userid} not found in the database.")
+                logger.debug("User lookup miss", extra={'user_id': userid})
                 return None
         except Exception as e:
             raise ValueError(f"Error fetching seller by userid: {e}")
@@ -146,10 +168,10 @@ class DBUserRepo(UserRepository):
             
             
             if user:
-                print(f"User {userid} found in the database.")
+                logger.debug("User lookup hit", extra={'user_id': userid})
                 return user
             else:
-                print(f"User {userid} not found in the database.")
+                logger.debug("User lookup miss", extra={'user_id': userid})
                 return None
         except Exception as e:
             raise ValueError(f"Error fetching user by userid: {e}")
@@ -166,17 +188,16 @@ class DBUserRepo(UserRepository):
             
             
             if user:
-                print(f"User {userid} found in the database.")
+                logger.debug("User lookup hit", extra={'user_id': userid})
                 return user
             else:
-                print(f"User {userid} not found in the database.")
+                logger.debug("User lookup miss", extra={'user_id': userid})
                 return None
         except Exception as e:
             raise ValueError(f"Error fetching user by userid: {e}")
         
     def get_seller_by_user_id(self, user_id):
         try:
-            print(f"Retrieving seller for user ID: {user_id}")
             self.cursor.execute("""
                 SELECT seller_id, store_name, store_desc
                 FROM sellers 
@@ -185,7 +206,7 @@ class DBUserRepo(UserRepository):
             user = self.cursor.fetchone()
 
             if user:
-                print(f"Seller with user ID {user_id} found in the database.")
+                logger.debug("Seller lookup hit", extra={'user_id': user_id})
                 return user
             
         except Exception as e:
@@ -203,17 +224,16 @@ class DBUserRepo(UserRepository):
             user = self.cursor.fetchone()
             
             if user:
-                print(f"User {user_id} found in the database.")
+                logger.debug("User lookup hit", extra={'user_id': user_id})
                 return user
             else:
-                print(f"User {user_id} not found in the database.")
+                logger.debug("User lookup miss", extra={'user_id': user_id})
                 return None
         except Exception as e:
             raise ValueError(f"Error fetching user by username: {e}")
     
     def get_seller_by_seller_id(self, seller_id):
         try:
-            print(f"Retrieving seller for selleralskdjasli; jdois ID: {seller_id}")
             self.cursor.execute("""
                 SELECT seller_id, store_name, store_desc, user_id
                 FROM sellers 
@@ -223,10 +243,10 @@ class DBUserRepo(UserRepository):
             seller = self.cursor.fetchone()
             
             if seller:
-                print(f"Seller with ID {seller_id} found in the database.")
+                logger.debug("Seller lookup hit", extra={'seller_id': seller_id})
                 return seller
             else:
-                print(f"Seller with ID {seller_id} not found in the database.")
+                logger.debug("Seller lookup miss", extra={'seller_id': seller_id})
                 return None
         except Exception as e:
             raise ValueError(f"Error fetching seller by seller ID: {e}")
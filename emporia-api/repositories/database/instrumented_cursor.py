@@ -0,0 +1,42 @@
+import time
+
+
+class InstrumentedCursor:
+  """
+  Proxy around a MySQL cursor that reports every statement to a list of
+  query observers: observer(operation, duration_seconds, error). Everything
+  other than execute/executemany is passed through to the real cursor.
+  """
+
+  def __init__(self, cursor, observers):
+    self._cursor = cursor
+    self._observers = observers
+
+  def execute(self, operation, params=None, *args, **kwargs):
+    return self._observe(self._cursor.execute, operation, params, *args, **kwargs)
+
+  def executemany(self, operation, seq_params, *args, **kwargs):
+    return self._observe(self._cursor.executemany, operation, seq_params, *args, **kwargs)
+
+  def _observe(self, method, operation, params, *args, **kwargs):
+    started_at = time.perf_counter()
+    error = None
+    try:
+      return method(operation, params, *args, **kwargs)
+    except Exception as err:
+      error = err
+      raise
+    finally:
+      duration = time.perf_counter() - started_at
+      for observer in self._observers:
+        try:
+          observer(operation, duration, error)
+        except Exception:
+          # Instrumentation must never break a query
+          pass
+
+  def __iter__(self):
+    return iter(self._cursor)
+
+  def __getattr__(self, name):
+    return getattr(self._cursor, name)
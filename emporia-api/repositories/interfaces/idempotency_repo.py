@@ -0,0 +1,30 @@
+# emporia-api/repositories/interfaces/idempotency_repo.py
+from abc import abstractmethod
+
+
+class IdempotencyRepository:
+    def __init__(self, db):
+        self.db = db
+
+    @abstractmethod
+    def reserve(self, customer_id, key, request_hash, ttl_seconds, lock_seconds):
+        """
+        Claim an idempotency key for a new request. Returns None when claimed,
+        otherwise the stored record (request_hash, status, response_code, response_body)
+        """
+        pass
+
+    @abstractmethod
+    def save_response(self, customer_id, key, response_code, response_body):
+        """Store the response of a finished request under its key"""
+        pass
+
+    @abstractmethod
+    def release(self, customer_id, key):
+        """Forget a key whose request failed unexpectedly, so it can be retried"""
+        pass
+
+    @abstractmethod
+    def purge_expired(self, limit):
+        """Delete up to limit expired keys"""
+        pass
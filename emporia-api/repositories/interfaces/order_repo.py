@@ -6,8 +6,8 @@ class OrderRepository:
         self.db = db
       
     @abstractmethod
-    def create_order(self, order):
-        """Create a new order in the database"""
+    def create_order(self, order, saga_id=None):
+        """Create a new order in the database, tagged with the saga creating it"""
         pass
       
     @abstractmethod
@@ -15,6 +15,16 @@ class OrderRepository:
         """Fetch an order by its ID"""
         pass
       
+    @abstractmethod
+    def get_order_id_by_saga(self, saga_id):
+        """Fetch the ID of the order created by a checkout saga, or None"""
+        pass
+      
+    @abstractmethod
+    def get_seller_lines(self, seller_id, before_id=None, limit=50):
+        """Order lines of a seller's products, newest first, with line ids below before_id"""
+        pass
+
     @abstractmethod
     def get_by_customer(self, customer_id):
         """Fetch orders by customer ID"""
@@ -25,7 +35,35 @@ class OrderRepository:
         """Update an existing order"""
         pass
 
+    @abstractmethod
+    def transition_status(self, order_id, new_status, from_statuses=None, customer_id=None,
+                          require_finished_checkout=False):
+        """
+        Move an order to new_status if its current status is one of from_statuses
+        (by default those allowed by OrderStatus.TRANSITIONS). With
+        require_finished_checkout, also refuse while the order's checkout saga has
+        not completed
+        """
+        pass
+
+    @abstractmethod
+    def cancel_orders(self, order_ids, customer_id=None, resolve_failed=False):
+        """
+        Cancel every cancellable order in order_ids and restock their lines in one
+        transaction. Orders whose checkout saga has not completed are skipped, except
+        that resolve_failed also cancels those whose saga ended compensation_failed
+        and marks the saga compensated.
+        Returns ({order_id: previous_status}, {order_id: skip_reason}), the reason being
+        'checkout_in_progress' or 'checkout_failed'
+        """
+        pass
+
+    @abstractmethod
+    def revert_status(self, order_id, from_status):
+        """Undo the last transition of an order that is still in from_status"""
+        pass
+
     @abstractmethod
     def delete_order(self, order_id):
-        """Delete an order"""
+        """Delete an order, unless its status counts as sold"""
         pass
\ No newline at end of file
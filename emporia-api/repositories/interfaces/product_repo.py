@@ -5,33 +5,62 @@ class ProductRepository:
         self.db = db
       
     @abstractmethod
-    def get_all_products(self, limit=100, offset=0):
+    def get_all_products(self, limit=100, offset=0, fields=None):
         """
         Fetch all products from the database.
+        When fields is given only those product fields are read.
         """
         pass
       
     @abstractmethod
-    def get_by_id(self, product_id):
+    def get_products_after(self, last_id=0, limit=1000):
+        """
+        Fetch the next page of products ordered by ID, starting after last_id.
+        """
+        pass
+
+    @abstractmethod
+    def get_by_id(self, product_id, fields=None):
         """
         Fetch a product by its ID from the database.
         """
         pass
 
     @abstractmethod
-    def get_by_category(self, category_id):
+    def get_by_category(self, category_id, fields=None):
         """
         Fetch products by category ID.
         """
         pass
 
     @abstractmethod
-    def get_by_seller(self, seller_id):
+    def get_by_seller(self, seller_id, fields=None):
         """
         Fetch products by seller ID.
         """
         pass
   
+    @abstractmethod
+    def get_changes_since(self, changed_at, last_id=0, limit=500):
+        """
+        Fetch product updates and deletions after the given (timestamp, ID) position.
+        """
+        pass
+
+    @abstractmethod
+    def get_catalog_version(self):
+        """
+        Fetch a value that changes whenever any product is written or deleted.
+        """
+        pass
+
+    @abstractmethod
+    def get_version(self, product_id):
+        """
+        Fetch the last modification time of a product, or None if it does not exist.
+        """
+        pass
+
     @abstractmethod
     def create(self, product):
         """
@@ -46,6 +75,21 @@ class ProductRepository:
         """
         pass
 
+    @abstractmethod
+    def deduct_stock(self, quantities):
+        """
+        Take quantities ({product_id: quantity}) out of product stock in one transaction,
+        raising ValueError and changing nothing if any product has too little stock.
+        """
+        pass
+
+    @abstractmethod
+    def restock(self, quantities):
+        """
+        Add quantities ({product_id: quantity}) back to product stock in one transaction.
+        """
+        pass
+
     @abstractmethod
     def delete(self, product_id):
         """
@@ -0,0 +1,12 @@
+# emporia-api/repositories/interfaces/product_view_repo.py
+from abc import abstractmethod
+
+
+class ProductViewRepository:
+    def __init__(self, db):
+        self.db = db
+
+    @abstractmethod
+    def add_views(self, counts):
+        """Add {(day, product_id): views} to the stored daily view counts"""
+        pass
@@ -0,0 +1,41 @@
+# emporia-api/repositories/interfaces/recommendation_repo.py
+from abc import abstractmethod
+
+
+class RecommendationRepository:
+    def __init__(self, db):
+        self.db = db
+
+    @abstractmethod
+    def lock_builder(self, name):
+        """Start a transaction holding the builder lock"""
+        pass
+
+    @abstractmethod
+    def get_events(self, limit):
+        """
+        Lines of the oldest limit queued order events, in event order, as
+        (event_id, product_id, sign) tuples; product_id is 0 for an event
+        whose order has no lines
+        """
+        pass
+
+    @abstractmethod
+    def add_pairs(self, pairs, event_ids):
+        """Add (product_id, related_id, orders) counts, delete the consumed events and commit"""
+        pass
+
+    @abstractmethod
+    def release(self):
+        """End the builder transaction without changes"""
+        pass
+
+    @abstractmethod
+    def get_changed_products(self, since):
+        """(database time, ids of products whose pair counts changed at or after since)"""
+        pass
+
+    @abstractmethod
+    def get_pairs(self, product_ids):
+        """(product_id, related_id, orders) counts of the given products"""
+        pass
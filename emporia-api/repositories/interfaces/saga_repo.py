@@ -0,0 +1,37 @@
+# emporia-api/repositories/interfaces/saga_repo.py
+from abc import abstractmethod
+
+
+class SagaRepository:
+    def __init__(self, db):
+        self.db = db
+
+    @abstractmethod
+    def create_saga(self, saga_id, customer_id, payment_method):
+        """Record the start of a checkout saga"""
+        pass
+
+    @abstractmethod
+    def append(self, saga_id, step, event, data=None):
+        """Append a step event to the saga log and refresh the saga's heartbeat"""
+        pass
+
+    @abstractmethod
+    def set_status(self, saga_id, status, order_id=None):
+        """Set the saga status, and its order once one exists"""
+        pass
+
+    @abstractmethod
+    def claim_stalled(self, owner, stale_seconds, limit):
+        """Claim up to limit unfinished sagas idle for stale_seconds and return them"""
+        pass
+
+    @abstractmethod
+    def get_logs(self, saga_ids):
+        """Fetch the log entries of several sagas, keyed by saga ID, oldest first"""
+        pass
+
+    @abstractmethod
+    def purge_finished(self, retention_days, limit):
+        """Delete up to limit finished sagas older than retention_days"""
+        pass
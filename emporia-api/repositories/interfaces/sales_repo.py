@@ -0,0 +1,44 @@
+# emporia-api/repositories/interfaces/sales_repo.py
+from abc import abstractmethod
+
+
+class SalesRepository:
+    def __init__(self, db):
+        self.db = db
+
+    @abstractmethod
+    def get_totals(self, date_from, date_to, seller_id=None, category_id=None):
+        """Units and revenue over the days from date_from to date_to, inclusive"""
+        pass
+
+    @abstractmethod
+    def get_grouped(self, group_by, date_from, date_to, seller_id=None, category_id=None, limit=20):
+        """
+        Units and revenue per day (in date order) or per product, seller or
+        category (best selling first, at most limit rows)
+        """
+        pass
+
+    @abstractmethod
+    def get_names(self, group_by, ids):
+        """{id: name} of the given products, sellers or categories"""
+        pass
+
+    @abstractmethod
+    def iter_sold_lines(self, date_from, date_to, chunk_size=50000):
+        """
+        Stream the lines of orders sold from date_from up to, not including,
+        date_to as lists of at most chunk_size (order_id, customer_id,
+        order epoch seconds, product_id, quantity, revenue cents) tuples
+        """
+        pass
+
+    @abstractmethod
+    def get_order_date_range(self):
+        """First and last day with an order, or (None, None)"""
+        pass
+
+    @abstractmethod
+    def rebuild(self, date_from, date_to):
+        """Recompute the rollup rows of the days from date_from up to, not including, date_to"""
+        pass
@@ -0,0 +1,25 @@
+# emporia-api/repositories/interfaces/trending_repo.py
+from abc import abstractmethod
+
+
+class TrendingRepository:
+    def __init__(self, db):
+        self.db = db
+
+    @abstractmethod
+    def add_scores(self, scores):
+        """Merge (product_id, log_score) increments into the stored trending scores"""
+        pass
+
+    @abstractmethod
+    def get_top(self, category_id=None, limit=100):
+        """
+        (product_id, category_id, log_score, name, price, image) of the highest
+        scores, optionally in one category
+        """
+        pass
+
+    @abstractmethod
+    def purge_below(self, log_score, limit):
+        """Delete up to limit products whose score has decayed below log_score"""
+        pass
@@ -11,6 +11,13 @@ class UserRepository:
         """
         pass
       
+    @abstractmethod
+    def get_users_after(self, last_id=0, limit=500):
+        """
+        Fetch the next limit user rows with an id greater than last_id, in id order.
+        """
+        pass
+
     @abstractmethod
     def get_by_id(self, user_id):
         """
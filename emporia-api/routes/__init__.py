@@ -1,3 +1,4 @@
+import logging
 # Import all blueprints
 from routes.auth.authenticate import auth_bp
 from routes.users.user_routes import user_bp
@@ -5,6 +6,11 @@ from routes.categories.category_routes import category_bp
 from routes.products.product_routes import product_bp
 from routes.orders.order_routes import order_bp
 from routes.cart.cart_routes import cart_bp
+from routes.metrics.metrics_routes import metrics_bp
+from routes.admin.admin_routes import admin_bp
+from routes.seller.seller_routes import seller_bp
+
+logger = logging.getLogger(__name__)
 
 # Function to register all blueprints with the Flask app
 def register_blueprints(app):
@@ -14,5 +20,8 @@ def register_blueprints(app):
     app.register_blueprint(product_bp)
     app.register_blueprint(order_bp)
     app.register_blueprint(cart_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(seller_bp)
     
-    print("All route blueprints registered successfully")
\ No newline at end of file
+    logger.info("All route blueprints registered")
\ No newline at end of file
@@ -0,0 +1,198 @@
+import os
+from flask import Blueprint, Response, current_app, request, jsonify, send_from_directory
+from utils.auth_decorators import role_required
+from utils.streaming import csv_lines
+from services.analytics_services import TABLES
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+@admin_bp.route('/profiles/token', methods=['POST'])
+@role_required('admin')
+def issue_profile_token():
+    """Issue a signed X-Profile header value that profiles the requests carrying it"""
+    try:
+        data = request.get_json(silent=True) or {}
+        return jsonify(current_app.profiler.issue_token(data.get('ttl', 300))), 201
+    except (TypeError, ValueError) as e:
+        return jsonify({'message': str(e)}), 400
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+@role_required('admin')
+def list_profiles():
+    """List stored request profiles, newest first"""
+    return jsonify({'profiles': current_app.profiler.list_profiles()}), 200
+
+
+@admin_bp.route('/profiles/<name>', methods=['GET'])
+@role_required('admin')
+def get_profile(name):
+    """Download a profile as .pstats, or ?format=text for a pstats report"""
+    try:
+        profiler = current_app.profiler
+        path = profiler.profile_path(name)
+
+        if request.args.get('format') == 'text':
+            sort = request.args.get('sort', 'cumulative')
+            limit = request.args.get('limit', default=50, type=int)
+            return Response(profiler.summary(name, sort, limit), mimetype='text/plain')
+
+        return send_from_directory(os.path.abspath(os.path.dirname(path)), name,
+                                   as_attachment=True, mimetype='application/octet-stream')
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 404
+    except KeyError as e:
+        return jsonify({'message': f'Unknown sort key: {e}'}), 400
+
+
+@admin_bp.route('/memory', methods=['GET'])
+@role_required('admin')
+def memory_status():
+    """tracemalloc state, RSS and stored snapshots of this worker"""
+    return jsonify(current_app.memory_diagnostics.status()), 200
+
+
+@admin_bp.route('/memory/tracing', methods=['POST'])
+@role_required('admin')
+def toggle_memory_tracing():
+    """Start or stop tracemalloc: {"action": "start"|"stop", "frames": 10}"""
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    diagnostics = current_app.memory_diagnostics
+
+    if action == 'start':
+        frames = data.get('frames')
+        if frames is not None and (not isinstance(frames, int) or not 1 <= frames <= 100):
+            return jsonify({'message': 'frames must be an integer between 1 and 100'}), 400
+        return jsonify(diagnostics.start(frames)), 200
+    if action == 'stop':
+        return jsonify(diagnostics.stop()), 200
+    return jsonify({'message': 'action must be "start" or "stop"'}), 400
+
+
+@admin_bp.route('/memory/snapshots', methods=['POST'])
+@role_required('admin')
+def take_memory_snapshot():
+    """Take a tracemalloc snapshot"""
+    try:
+        return jsonify(current_app.memory_diagnostics.take_snapshot()), 201
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+
+@admin_bp.route('/memory/snapshots/<int:snapshot_id>', methods=['GET'])
+@role_required('admin')
+def get_memory_snapshot(snapshot_id):
+    """Top allocation sites of a snapshot"""
+    try:
+        limit = request.args.get('limit', default=25, type=int)
+        group_by = request.args.get('group_by', 'lineno')
+        return jsonify(current_app.memory_diagnostics.top(snapshot_id, limit, group_by)), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 404 if 'not found' in str(e) else 400
+
+
+@admin_bp.route('/memory/diff', methods=['GET'])
+@role_required('admin')
+def diff_memory_snapshots():
+    """Allocation growth between two snapshots: ?from=<id>&to=<id>"""
+    try:
+        limit = request.args.get('limit', default=25, type=int)
+        group_by = request.args.get('group_by', 'lineno')
+        return jsonify(current_app.memory_diagnostics.diff(
+            request.args.get('from'), request.args.get('to'), limit, group_by)), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 404 if 'not found' in str(e) else 400
+
+
+@admin_bp.route('/memory/objects', methods=['GET'])
+@role_required('admin')
+def memory_object_counts():
+    """Live model instances and OrderInvoker history sizes"""
+    return jsonify(current_app.memory_diagnostics.object_counts()), 200
+
+
+@admin_bp.route('/orders/cancel', methods=['POST'])
+@role_required('admin')
+def bulk_cancel_orders():
+    """
+    Cancel and restock many orders at once: {"order_ids": [1, 2, 3]}. Add
+    "resolve_failed_checkouts": true to also cancel orders skipped as checkout_failed
+    """
+    data = request.get_json(silent=True) or {}
+    order_ids = data.get('order_ids')
+    resolve_failed = data.get('resolve_failed_checkouts', False)
+    if (not isinstance(order_ids, list) or not order_ids
+            or not all(isinstance(order_id, int) and not isinstance(order_id, bool) for order_id in order_ids)):
+        return jsonify({'message': 'order_ids must be a non-empty list of integers'}), 400
+    if len(order_ids) > 5000:
+        return jsonify({'message': 'At most 5000 orders can be cancelled per request'}), 400
+    if not isinstance(resolve_failed, bool):
+        return jsonify({'message': 'resolve_failed_checkouts must be a boolean'}), 400
+
+    try:
+        return jsonify(current_app.order_service.cancel_orders(order_ids, resolve_failed=resolve_failed)), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': f'Error cancelling orders: {str(e)}'}), 500
+
+
+@admin_bp.route('/sales', methods=['GET'])
+@role_required('admin')
+def get_sales():
+    """Units and revenue from the daily rollup: ?group_by=day|product|seller|category&from=&to="""
+    try:
+        report = current_app.sales_service.get_sales_report(
+            request.args.get('group_by', 'day'),
+            request.args.get('from'),
+            request.args.get('to'),
+            seller_id=request.args.get('seller_id', type=int),
+            category_id=request.args.get('category_id', type=int),
+            limit=max(1, min(request.args.get('limit', 20, type=int), 500))
+        )
+        return jsonify(report), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': f'Error retrieving sales: {str(e)}'}), 500
+
+
+@admin_bp.route('/reports/sales', methods=['GET'])
+@role_required('admin')
+def get_sales_report():
+    """
+    Revenue by period, order value statistics, top products and cohorts over
+    ?from=&to=, as JSON or one of them as CSV (?format=csv&table=...)
+    """
+    analytics = current_app.analytics_service
+    if not analytics.available:
+        return jsonify({'message': "Analytics reports need NumPy; install it with 'pip install numpy'"}), 501
+
+    export_format = request.args.get('format', 'json').lower()
+    table = request.args.get('table', 'revenue_by_period')
+    if export_format not in ('json', 'csv'):
+        return jsonify({'message': "Unsupported report format. Use 'json' or 'csv'"}), 400
+    if export_format == 'csv' and table not in TABLES:
+        return jsonify({'message': f"table must be one of: {', '.join(TABLES)}"}), 400
+
+    try:
+        report = analytics.get_sales_report(
+            request.args.get('from'),
+            request.args.get('to'),
+            period=request.args.get('period', 'month'),
+            top=max(1, min(request.args.get('top', 10, type=int), 1000))
+        )
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': f'Error building sales report: {str(e)}'}), 500
+
+    if export_format == 'json':
+        return jsonify(report), 200
+
+    response = Response(csv_lines(report[table], TABLES[table]), mimetype='text/csv')
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="{table}-{report["from"]}-{report["to"]}.csv"')
+    return response
@@ -1,6 +1,9 @@
+import logging
 from flask import Blueprint, current_app, request, jsonify
 from utils.auth_decorators import token_required, role_required
 
+logger = logging.getLogger(__name__)
+
 cart_bp = Blueprint('cart', __name__, url_prefix='/cart')
 
 
@@ -44,14 +47,11 @@ def add_to_cart():
         if not customer_id:
             return jsonify({'message': 'Customer ID not found'}), 401
 
-        # --- MORE DEBUGGING ADDED ---
-        # Print the raw request body to the server console to see exactly what is being sent.
         raw_data = request.data
-        print(f"DEBUG: Raw request data received: {raw_data}")
 
         # Use force=True to bypass potential mimetype/header issues during JSON parsing.
         data = request.get_json(force=True)
-        print(f"DEBUG: Parsed JSON data: {data}")
+        logger.debug("Add to cart request", extra={'customer_id': customer_id, 'body_size': len(raw_data)})
         
         if not data:
             return jsonify({'message': 'No JSON data provided in the request body'}), 400
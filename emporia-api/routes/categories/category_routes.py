@@ -1,10 +1,12 @@
 from flask import Blueprint, current_app, request, jsonify
 from utils.auth_decorators import token_required, role_required
+from utils.http_cache import conditional
 
 category_bp = Blueprint('categories', __name__, url_prefix='/categories')
 
 
 @category_bp.route('/', methods=['GET'], strict_slashes=False)
+@conditional(max_age=300, stale_while_revalidate=600)
 def get_all_categories():
     """Get all categories - no authentication required"""
     try:
@@ -15,6 +17,7 @@ def get_all_categories():
 
 
 @category_bp.route('/<int:category_id>', methods=['GET'], strict_slashes=False)
+@conditional(max_age=300, stale_while_revalidate=600)
 def get_category(category_id):
     """Get single category - no authentication required"""
     try:
@@ -0,0 +1,18 @@
+import hmac
+import os
+from flask import Blueprint, Response, request, jsonify
+from utils.metrics import registry
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'], strict_slashes=False)
+def get_metrics():
+    """Prometheus scrape endpoint - bearer token required when METRICS_TOKEN is set"""
+    token = os.getenv('METRICS_TOKEN')
+    if token:
+        auth_header = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(auth_header, f'Bearer {token}'):
+            return jsonify({'message': 'Invalid metrics token'}), 401
+
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -1,13 +1,18 @@
+import hashlib
+import hmac
+import os
 from flask import Blueprint, current_app, request, jsonify
 from utils.auth_decorators import token_required, role_required
+from utils.idempotency import idempotent
 
 order_bp = Blueprint('orders', __name__, url_prefix='/orders')
 
 
 @order_bp.route('/', methods=['POST'],strict_slashes=False)
 @role_required('customer')
+@idempotent
 def place_order():
-    """Place a new order"""
+    """Place a new order (retry-safe with an Idempotency-Key header)"""
     try:
         data = request.get_json()
         if not data:
@@ -87,3 +92,32 @@ def cancel_order(order_id):
             return jsonify({'message': result['message']}), 400
     except Exception as e:
         return jsonify({'message': f'Error cancelling order: {str(e)}'}), 500
+
+
+@order_bp.route('/payments/callback', methods=['POST'], strict_slashes=False)
+def payment_callback():
+    """Payment provider webhook: {"order_id": 1, "status": "succeeded"|"failed", "payment_id": "..."}"""
+    secret = os.getenv('PAYMENT_WEBHOOK_SECRET')
+    if not secret:
+        return jsonify({'message': 'Payment callbacks are not configured'}), 403
+
+    # Signed over the raw body: X-Payment-Signature = hex HMAC-SHA256
+    expected = hmac.new(secret.encode('utf-8'), request.get_data(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(request.headers.get('X-Payment-Signature', ''), expected):
+        return jsonify({'message': 'Invalid payment signature'}), 401
+
+    try:
+        data = request.get_json(silent=True) or {}
+        order_id = data.get('order_id')
+        status = data.get('status')
+        if not isinstance(order_id, int) or status not in ('succeeded', 'failed'):
+            return jsonify({'message': 'order_id and status (succeeded|failed) are required'}), 400
+
+        result = current_app.order_service.handle_payment_callback(
+            order_id, status == 'succeeded', data.get('payment_id'))
+
+        if result['success']:
+            return jsonify({'message': result['message'], 'status': result['status']}), 200
+        return jsonify({'message': result['message']}), 409
+    except Exception as e:
+        return jsonify({'message': f'Error handling payment callback: {str(e)}'}), 500
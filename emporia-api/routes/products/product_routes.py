@@ -1,41 +1,155 @@
-from flask import Blueprint, current_app, request, jsonify
+from functools import wraps
+from flask import Blueprint, Response, current_app, request, jsonify, make_response, stream_with_context
 from utils.auth_decorators import token_required, role_required
+from utils.streaming import ndjson_lines, csv_lines, gzip_chunks
+from utils.http_cache import conditional
+from services.product_services import PRODUCT_FIELDS, InvalidFieldsError
 
 product_bp = Blueprint('products', __name__, url_prefix='/products')
 
 
+def records_view(f):
+    """
+    Count a product page view for every successful answer, 304
+    revalidations included: @conditional returns those before the view
+    runs, so this must be applied above it.
+    """
+    @wraps(f)
+    def decorated(product_id, *args, **kwargs):
+        response = make_response(f(product_id, *args, **kwargs))
+        if response.status_code in (200, 304):
+            current_app.product_view_service.record(product_id)
+        return response
+    return decorated
+
+
 @product_bp.route('/', methods=['GET'], strict_slashes=False)
+@conditional(version=lambda: current_app.product_service.get_catalog_version(),
+             max_age=30, stale_while_revalidate=60)
 def get_all_products():
     """Get all products - no authentication required for browsing"""
     try:
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
+        fields = request.args.get('fields')
 
-        products = current_app.product_service.get_all_products(limit, offset)
-        print(f"Retrieved {len(products)} products with limit={limit} and offset={offset}")
+        if not fields and current_app.product_service.fragment_cache:
+            body = current_app.product_service.get_all_products_json(limit, offset)
+            return Response(body, mimetype='application/json'), 200
+
+        products = current_app.product_service.get_all_products(limit, offset, fields)
         return jsonify({'products': products}), 200
+    except InvalidFieldsError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Error retrieving products: {str(e)}'}), 500
 
 
+@product_bp.route('/export', methods=['GET'], strict_slashes=False)
+def export_products():
+    """Stream the whole catalog as NDJSON or CSV - no authentication required"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    use_gzip = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+
+    if export_format == 'ndjson':
+        mimetype = 'application/x-ndjson'
+        encode = ndjson_lines
+    elif export_format == 'csv':
+        mimetype = 'text/csv'
+        encode = lambda items: csv_lines(items, PRODUCT_FIELDS)
+    else:
+        return jsonify({'message': "Unsupported export format. Use 'ndjson' or 'csv'"}), 400
+
+    chunk_size = request.args.get('chunk_size', 1000, type=int)
+    chunk_size = max(1, min(chunk_size, 5000))
+
+    body = encode(current_app.product_service.scan_products(chunk_size))
+    if use_gzip:
+        body = gzip_chunks(body)
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="products.{export_format}"'
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+@product_bp.route('/changes', methods=['GET'], strict_slashes=False)
+def get_product_changes():
+    """Get product changes since a feed cursor - no authentication required"""
+    try:
+        since = request.args.get('since')
+        limit = request.args.get('limit', 500, type=int)
+        limit = max(1, min(limit, 1000))
+
+        feed = current_app.product_service.get_product_changes(since, limit)
+        return jsonify(feed), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': f'Error retrieving product changes: {str(e)}'}), 500
+
+
+@product_bp.route('/trending', methods=['GET'], strict_slashes=False)
+def get_trending_products():
+    """Get products ranked by recent views and orders - no authentication required"""
+    try:
+        category_id = request.args.get('category_id', type=int)
+        limit = request.args.get('limit', 20, type=int)
+        limit = max(1, min(limit, 100))
+
+        products = current_app.trending_service.get_trending(category_id, limit)
+        return jsonify({'category_id': category_id, 'products': products}), 200
+    except Exception as e:
+        return jsonify({'message': f'Error retrieving trending products: {str(e)}'}), 500
+
+
 @product_bp.route('/<int:product_id>', methods=['GET'], strict_slashes=False)
+@records_view
+@conditional(version=lambda product_id: current_app.product_service.get_product_version(product_id),
+             max_age=60, stale_while_revalidate=300)
 def get_product(product_id):
     """Get single product - no authentication required"""
     try:
-        product = current_app.product_service.get_product_by_id(product_id)
+        fields = request.args.get('fields')
+        product = current_app.product_service.get_product_by_id(product_id, fields)
         return jsonify({'product': product}), 200
+    except InvalidFieldsError as e:
+        return jsonify({'message': str(e)}), 400
     except ValueError as e:
         return jsonify({'message': str(e)}), 404
     except Exception as e:
         return jsonify({'message': f'Error retrieving product: {str(e)}'}), 500
 
 
+@product_bp.route('/<int:product_id>/related', methods=['GET'], strict_slashes=False)
+def get_related_products(product_id):
+    """Get products frequently bought together with this one - no authentication required"""
+    recommendations = current_app.recommendation_service
+    if not recommendations.available:
+        return jsonify({'message': "Recommendations need NumPy; install it with 'pip install numpy'"}), 501
+
+    limit = request.args.get('limit', 10, type=int)
+    related = recommendations.get_related(product_id, max(1, limit))
+    return jsonify({'product_id': product_id, 'related': related}), 200
+
+
 @product_bp.route('/category/<int:category_id>', methods=['GET'], strict_slashes=False)
+@conditional(version=lambda category_id: current_app.product_service.get_catalog_version(),
+             max_age=30, stale_while_revalidate=60)
 def get_products_by_category(category_id):
     """Get products by category - no authentication required"""
     try:
-        products = current_app.product_service.get_products_by_category(category_id)
+        fields = request.args.get('fields')
+
+        if not fields and current_app.product_service.fragment_cache:
+            body = current_app.product_service.get_products_by_category_json(category_id)
+            return Response(body, mimetype='application/json'), 200
+
+        products = current_app.product_service.get_products_by_category(category_id, fields)
         return jsonify({'products': products}), 200
+    except InvalidFieldsError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Error retrieving products: {str(e)}'}), 500
 
@@ -44,13 +158,14 @@ def get_products_by_category(category_id):
 def get_products_by_seller(user_id):
     """Get products by seller - no authentication required"""
     try:
-        # print(f"Retrieved seller ID: {seller_id}")
-        
         seller = current_app.user_service.get_seller_by_user_id(user_id)
         if not seller:
             return jsonify({'message': 'Seller not found'}), 404
-        products = current_app.product_service.get_products_by_seller(seller.seller_id)
+        fields = request.args.get('fields')
+        products = current_app.product_service.get_products_by_seller(seller.seller_id, fields)
         return jsonify({'products': products}), 200
+    except InvalidFieldsError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Error retrieving products: {str(e)}'}), 500
 
@@ -0,0 +1,48 @@
+from flask import Blueprint, current_app, request, jsonify
+from utils.auth_decorators import role_required
+
+seller_bp = Blueprint('seller', __name__, url_prefix='/seller')
+
+
+@seller_bp.route('/orders', methods=['GET'], strict_slashes=False)
+@role_required('seller')
+def get_seller_orders():
+    """Get order lines for the current seller's products, newest first"""
+    try:
+        seller_id = request.current_user.get('seller_id')
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', 50, type=int)
+        limit = max(1, min(limit, 200))
+
+        page = current_app.order_service.get_seller_orders(seller_id, cursor, limit)
+        return jsonify(page), 200
+    except ValueError as e:
+        if str(e) == "Invalid cursor":
+            return jsonify({'message': str(e)}), 400
+        return jsonify({'message': str(e)}), 500
+    except Exception as e:
+        return jsonify({'message': f'Error retrieving seller orders: {str(e)}'}), 500
+
+
+@seller_bp.route('/sales', methods=['GET'], strict_slashes=False)
+@role_required('seller')
+def get_seller_sales():
+    """Units and revenue of the current seller's products: ?group_by=day|product|category&from=&to="""
+    try:
+        group_by = request.args.get('group_by', 'day')
+        if group_by == 'seller':
+            return jsonify({'message': 'group_by must be one of: day, product, category'}), 400
+
+        report = current_app.sales_service.get_sales_report(
+            group_by,
+            request.args.get('from'),
+            request.args.get('to'),
+            seller_id=request.current_user.get('seller_id'),
+            category_id=request.args.get('category_id', type=int),
+            limit=max(1, min(request.args.get('limit', 20, type=int), 500))
+        )
+        return jsonify(report), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': f'Error retrieving sales: {str(e)}'}), 500
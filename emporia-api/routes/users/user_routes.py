@@ -1,14 +1,20 @@
 from flask import Blueprint, current_app, request, jsonify
+from utils.streaming import stream_json_array
 
 user_bp = Blueprint('users', __name__, url_prefix='/users')
 
 
 @user_bp.route('/', methods=['GET'], strict_slashes=False)
 def get_all_users():
-
+    """Page through users by id: ?limit=&after_id= (the last id of the previous page)"""
     try:
-        users = current_app.user_service.get_all_users()
-        return jsonify({'users': users}), 200
+        limit = request.args.get('limit', 100, type=int)
+        after_id = request.args.get('after_id', 0, type=int)
+        limit = max(1, min(limit, 1000))
+        after_id = max(0, after_id)
+
+        users = current_app.user_service.iter_users(limit, after_id)
+        return stream_json_array('users', users), 200
     except Exception as e:
         return jsonify({'message': f'Error retrieving users: {str(e)}'}), 500
 
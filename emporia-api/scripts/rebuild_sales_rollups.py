@@ -0,0 +1,47 @@
+"""
+Recompute the sales_daily rollup from orders and order_items.
+
+Incremental updates keep the rollup current; run this after migration 006,
+after fixing order data by hand, or if the rollup is ever suspected to have
+drifted. Days are rebuilt in chunks, each in its own short transaction, so
+it is safe to run while the shop takes orders.
+
+Run from emporia-api/:
+    python scripts/rebuild_sales_rollups.py [--from 2026-01-01] [--to 2026-01-31] [--chunk-days 7]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from repositories.database.db_connection import DatabaseConnection
+from repositories.database.db_sales_repo import DBSalesRepo
+from services.sales_services import SalesService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--from', dest='date_from', help='first day to rebuild (default: first order)')
+    parser.add_argument('--to', dest='date_to', help='last day to rebuild (default: last order)')
+    parser.add_argument('--chunk-days', type=int, default=7)
+    args = parser.parse_args()
+
+    db = DatabaseConnection()
+    if db.connection is None:
+        sys.exit('Database connection failed; check configs/config.ini')
+
+    started_at = time.perf_counter()
+
+    def progress(chunk_start, chunk_end, rows):
+        print(f'  {chunk_start} .. {chunk_end}  {rows} rows so far')
+
+    service = SalesService(DBSalesRepo(db))
+    rows = service.rebuild(args.date_from, args.date_to, max(1, args.chunk_days), progress)
+    print(f'{rows} rollup rows written in {time.perf_counter() - started_at:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+import logging
+from datetime import date, timedelta
+from utils.tracing import traced_methods
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only the analytics reports need it
+    np = None
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('day', 'week', 'month')
+PERCENTILES = (50, 90, 95, 99)
+
+# table -> CSV columns, for exporting one table of a report
+TABLES = {
+    'revenue_by_period': ['period', 'orders', 'units', 'revenue'],
+    'top_products': ['product_id', 'name', 'orders', 'units', 'revenue'],
+    'cohorts': ['cohort', 'customers', 'repeat_customers', 'repeat_rate', 'orders', 'revenue'],
+}
+
+# Column order of the rows streamed by SalesRepository.iter_sold_lines
+ORDER_ID, CUSTOMER_ID, ORDERED_AT, PRODUCT_ID, QUANTITY, CENTS = range(6)
+
+
+def _money(cents):
+    return round(float(cents) / 100, 2)
+
+
+@traced_methods
+class SalesAnalyticsService:
+    """
+    Sales reports computed with NumPy over every sold order line in a date
+    range.
+
+    Lines are streamed from the database in chunks of integers and packed
+    into one array per column; every figure is then a vectorized pass
+    (unique/bincount/percentile) over those arrays, never a Python loop over
+    orders. Cohorts group customers by the month of their first order in
+    the range.
+    """
+
+    def __init__(self, sales_repository, chunk_size=50000, max_days=366):
+        self.sales_repository = sales_repository
+        self.chunk_size = chunk_size
+        self.max_days = max_days
+
+    @property
+    def available(self):
+        return np is not None
+
+    def _date_range(self, date_from, date_to):
+        try:
+            date_to = date.fromisoformat(date_to) if date_to else date.today()
+            date_from = date.fromisoformat(date_from) if date_from else date_to - timedelta(days=29)
+        except ValueError:
+            raise ValueError("Dates must be formatted as YYYY-MM-DD")
+        if date_from > date_to:
+            raise ValueError("'from' must not be after 'to'")
+        if (date_to - date_from).days >= self.max_days:
+            raise ValueError(f"Date range must not exceed {self.max_days} days")
+        return date_from, date_to
+
+    def load_lines(self, date_from, date_to):
+        """Sold order lines of [date_from, date_to] as {column: array}"""
+        chunks = [np.array(chunk, dtype=np.int64).reshape(-1, 6)
+                  for chunk in self.sales_repository.iter_sold_lines(
+                      date_from, date_to + timedelta(days=1), self.chunk_size)]
+        lines = np.concatenate(chunks) if chunks else np.empty((0, 6), dtype=np.int64)
+        return {
+            'order_id': lines[:, ORDER_ID],
+            'customer_id': lines[:, CUSTOMER_ID],
+            'ordered_at': lines[:, ORDERED_AT].astype('datetime64[s]'),
+            'product_id': lines[:, PRODUCT_ID],
+            'quantity': lines[:, QUANTITY],
+            'cents': lines[:, CENTS],
+        }
+
+    def get_sales_report(self, date_from=None, date_to=None, period='month', top=10):
+        if not self.available:
+            raise RuntimeError("Analytics reports need NumPy; install it with 'pip install numpy'")
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of: {', '.join(PERIODS)}")
+        date_from, date_to = self._date_range(date_from, date_to)
+
+        try:
+            lines = self.load_lines(date_from, date_to)
+            orders = self._orders(lines)
+            return {
+                'from': date_from.isoformat(),
+                'to': date_to.isoformat(),
+                'period': period,
+                'summary': self._summary(lines, orders),
+                'revenue_by_period': self._revenue_by_period(lines, orders, period),
+                'top_products': self._top_products(lines, top),
+                'cohorts': self._cohorts(orders),
+            }
+        except Exception as e:
+            raise ValueError(f"Failed to build sales report: {str(e)}")
+
+    def _orders(self, lines):
+        # One entry per order; every line of an order shares its customer and date
+        order_ids, index = np.unique(lines['order_id'], return_inverse=True)
+        customer_id = np.zeros(len(order_ids), dtype=np.int64)
+        customer_id[index] = lines['customer_id']
+        ordered_at = np.zeros(len(order_ids), dtype='datetime64[s]')
+        ordered_at[index] = lines['ordered_at']
+        return {
+            'order_id': order_ids,
+            'customer_id': customer_id,
+            'ordered_at': ordered_at,
+            'cents': np.bincount(index, weights=lines['cents'], minlength=len(order_ids)),
+        }
+
+    def _summary(self, lines, orders):
+        count = len(orders['order_id'])
+        values = orders['cents']
+        return {
+            'orders': count,
+            'customers': len(np.unique(orders['customer_id'])),
+            'units': int(lines['quantity'].sum()),
+            'revenue': _money(lines['cents'].sum()),
+            'average_order_value': _money(values.mean()) if count else 0.0,
+            'order_value_percentiles': {
+                f'p{p}': _money(value)
+                for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES) if count else [0] * len(PERCENTILES))
+            },
+        }
+
+    def _bucket(self, ordered_at, period):
+        days = ordered_at.astype('datetime64[D]')
+        if period == 'day':
+            return days
+        if period == 'week':
+            # Monday of the ISO week; 1970-01-01 was a Thursday
+            return days - (days.astype(np.int64) + 3) % 7
+        return days.astype('datetime64[M]')
+
+    def _revenue_by_period(self, lines, orders, period):
+        periods, index = np.unique(self._bucket(lines['ordered_at'], period), return_inverse=True)
+        order_index = np.searchsorted(periods, self._bucket(orders['ordered_at'], period))
+        revenue = np.bincount(index, weights=lines['cents'], minlength=len(periods))
+        units = np.bincount(index, weights=lines['quantity'], minlength=len(periods))
+        order_counts = np.bincount(order_index, minlength=len(periods))
+        return [{
+            'period': str(periods[i]),
+            'orders': int(order_counts[i]),
+            'units': int(units[i]),
+            'revenue': _money(revenue[i]),
+        } for i in range(len(periods))]
+
+    def _top_products(self, lines, top):
+        product_ids, index = np.unique(lines['product_id'], return_inverse=True)
+        if not len(product_ids):
+            return []
+        revenue = np.bincount(index, weights=lines['cents'], minlength=len(product_ids))
+        units = np.bincount(index, weights=lines['quantity'], minlength=len(product_ids))
+        # Orders containing each product: distinct (order, product) pairs
+        pairs = np.unique(lines['order_id'] * (int(product_ids.max()) + 1) + lines['product_id'])
+        order_counts = np.bincount(np.searchsorted(product_ids, pairs % (int(product_ids.max()) + 1)),
+                                   minlength=len(product_ids))
+
+        top = min(top, len(product_ids))
+        best = np.argpartition(-revenue, top - 1)[:top]
+        best = best[np.lexsort((product_ids[best], -revenue[best]))]
+        names = self.sales_repository.get_names('product', [int(product_id) for product_id in product_ids[best]])
+        return [{
+            'product_id': int(product_ids[i]),
+            'name': names.get(int(product_ids[i])),
+            'orders': int(order_counts[i]),
+            'units': int(units[i]),
+            'revenue': _money(revenue[i]),
+        } for i in best]
+
+    def _cohorts(self, orders):
+        if not len(orders['order_id']):
+            return []
+        # Orders sorted by customer, then date: the first of each run is the
+        # customer's first order and the run length their order count
+        order = np.lexsort((orders['ordered_at'], orders['customer_id']))
+        customers = orders['customer_id'][order]
+        starts = np.flatnonzero(np.r_[True, customers[1:] != customers[:-1]])
+        order_counts = np.diff(np.r_[starts, len(customers)])
+        spent = np.add.reduceat(orders['cents'][order], starts)
+        first_month = orders['ordered_at'][order][starts].astype('datetime64[M]')
+
+        cohorts, index = np.unique(first_month, return_inverse=True)
+        size = np.bincount(index, minlength=len(cohorts))
+        repeat = np.bincount(index, weights=order_counts > 1, minlength=len(cohorts))
+        cohort_orders = np.bincount(index, weights=order_counts, minlength=len(cohorts))
+        revenue = np.bincount(index, weights=spent, minlength=len(cohorts))
+        return [{
+            'cohort': str(cohorts[i]),
+            'customers': int(size[i]),
+            'repeat_customers': int(repeat[i]),
+            'repeat_rate': round(float(repeat[i] / size[i]), 4),
+            'orders': int(cohort_orders[i]),
+            'revenue': _money(revenue[i]),
+        } for i in range(len(cohorts))]
@@ -1,3 +1,7 @@
+from utils.tracing import traced_methods
+
+
+@traced_methods
 class CartService:
     """Service for managing shopping carts"""
 
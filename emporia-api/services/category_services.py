@@ -1,5 +1,7 @@
 from models.Product.Category import Category
+from utils.tracing import traced_methods
 
+@traced_methods
 class CategoryService:
     def __init__(self, category_repository):
         self.category_repository = category_repository
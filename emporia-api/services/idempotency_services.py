@@ -0,0 +1,73 @@
+import json
+import logging
+from utils.tracing import traced_methods
+
+logger = logging.getLogger(__name__)
+
+
+@traced_methods
+class IdempotencyService:
+    """
+    Remembers the response of each keyed request, so a client retrying after
+    a timeout gets the original result instead of running it a second time.
+
+    Keys are scoped to the customer and kept for ttl_seconds. A key whose
+    request is still running is refused; one left in progress for longer than
+    lock_seconds is assumed abandoned by a dead worker and can be reused.
+    """
+
+    def __init__(self, idempotency_repository, ttl_seconds=86400, lock_seconds=300, purge_batch=1000):
+        self.idempotency_repository = idempotency_repository
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.purge_batch = purge_batch
+
+    def begin(self, customer_id, key, request_hash):
+        """
+        Claim key for a request. Returns {'state': 'new'} when the request
+        should run, 'completed' with the stored response to replay, or
+        'in_progress' / 'mismatch' when it must be refused
+        """
+        try:
+            record = self.idempotency_repository.reserve(
+                customer_id, key, request_hash, self.ttl_seconds, self.lock_seconds)
+        except Exception as e:
+            raise ValueError(f"Failed to reserve idempotency key: {str(e)}")
+
+        if record is None:
+            return {'state': 'new'}
+        if record['request_hash'] != request_hash:
+            return {'state': 'mismatch'}
+        if record['status'] != 'completed':
+            return {'state': 'in_progress'}
+        return {
+            'state': 'completed',
+            'status_code': record['response_code'],
+            'body': json.loads(record['response_body']) if record['response_body'] else None
+        }
+
+    def complete(self, customer_id, key, status_code, body):
+        try:
+            self.idempotency_repository.save_response(customer_id, key, status_code, json.dumps(body))
+        except Exception as e:
+            # The request already ran; a retry will see the key as in progress
+            # until lock_seconds pass instead of replaying it
+            logger.error("Could not store response for idempotency key: %s", e)
+
+    def release(self, customer_id, key):
+        try:
+            self.idempotency_repository.release(customer_id, key)
+        except Exception as e:
+            logger.error("Could not release idempotency key: %s", e)
+
+    def purge_expired(self):
+        """Delete every expired key, purge_batch rows per statement"""
+        total = 0
+        while True:
+            deleted = self.idempotency_repository.purge_expired(self.purge_batch)
+            total += deleted
+            if deleted < self.purge_batch:
+                break
+        if total:
+            logger.info("Purged %d expired idempotency keys", total)
+        return total
@@ -1,4 +1,6 @@
-from command.order_invoker import OrderInvoker
+import logging
+from contextlib import contextmanager
+from command.order_saga import OrderSaga
 from command.order_commands import (
     ValidateOrderCommand,
     CreateOrderCommand,
@@ -6,59 +8,113 @@ from command.order_commands import (
     ProcessPaymentCommand,
     UpdateOrderStatusCommand
 )
+from models.Order.OrderStatus import OrderStatus
+from utils.metrics import CHECKOUTS
+from utils.tracing import traced_methods
 
+logger = logging.getLogger(__name__)
 
+# Why an order was not cancelled, as told to the customer
+SKIP_MESSAGES = {
+    'not_cancellable': "Order with ID {order_id} not found or can no longer be cancelled",
+    'checkout_in_progress': "Order with ID {order_id} is still being checked out, try again shortly",
+    'checkout_failed': "Order with ID {order_id} is under review and cannot be cancelled yet",
+}
+
+
+@traced_methods
 class OrderService:
     """Service class for handling order operations using command pattern"""
 
-    def __init__(self, order_repository, product_repository, payment_service):
+    def __init__(self, order_repository, product_repository, payment_service, saga_repository=None,
+                 connections=None):
         self.order_repository = order_repository
         self.product_repository = product_repository
         self.payment_service = payment_service
-        self.invoker = OrderInvoker()
+        # Durable saga log; without it compensation only happens in memory
+        self.saga_repository = saga_repository
+        # Opens the connection each checkout runs on (e.g. PooledConnection);
+        # without it checkouts share the repositories' own connection
+        self.connections = connections
+        # Callbacks run with each successfully placed order
+        self.order_listeners = []
+
+    def add_order_listener(self, listener):
+        self.order_listeners.append(listener)
+
+    def _notify_order(self, order):
+        for listener in self.order_listeners:
+            try:
+                listener(order)
+            except Exception as e:
+                # The order is placed; a failing listener must not undo that
+                logger.warning("Order listener failed: %s", e, extra={'order_id': order.order_id})
+
+    @contextmanager
+    def _checkout_repositories(self):
+        """The order, product and saga repositories of one checkout"""
+        if self.connections is None:
+            yield self.order_repository, self.product_repository, self.saga_repository
+            return
+
+        # Another request's commit or rollback on a shared connection would
+        # end this checkout's transaction too
+        with self.connections() as connection:
+            yield (connection.bind(self.order_repository),
+                   connection.bind(self.product_repository),
+                   connection.bind(self.saga_repository) if self.saga_repository else None)
 
     def place_order(self, shopping_cart, customer_id, payment_method):
         """Place a new order using the command pattern"""
+        # Execution state belongs to this checkout only
+        saga = OrderSaga()
         try:
-            # Create all commands in sequence
-            validate_command = ValidateOrderCommand(shopping_cart, customer_id)
-
-            create_order_command = CreateOrderCommand(
-                self.order_repository,
-                customer_id,
-                shopping_cart.items,
-                shopping_cart.total_price
-            )
-
-            update_inventory_command = UpdateInventoryCommand(
-                self.product_repository,
-                shopping_cart.items
-            )
-
-            # Execute initial commands
-            self.invoker.execute_command(validate_command)
-
-            order = self.invoker.execute_command(create_order_command)
-            self.invoker.execute_command(update_inventory_command)
-            print("Order validated successfully")
-
-            print("Order created:", order)
-            # Process payment
-            payment_command = ProcessPaymentCommand(
-                self.payment_service,
-                order,
-                payment_method
-            )
-            self.invoker.execute_command(payment_command)
-
-            # Update order status to "paid"
-            update_status_command = UpdateOrderStatusCommand(
-                self.order_repository,
-                order.order_id,
-                "paid"
-            )
-            self.invoker.execute_command(update_status_command)
+            with self._checkout_repositories() as (order_repository, product_repository, saga_repository):
+                saga.log = saga_repository
+                saga.begin(customer_id, payment_method)
+
+                # Create all commands in sequence
+                validate_command = ValidateOrderCommand(shopping_cart, customer_id)
+
+                create_order_command = CreateOrderCommand(
+                    order_repository,
+                    customer_id,
+                    shopping_cart.items,
+                    shopping_cart.total_price,
+                    saga_id=saga.saga_id
+                )
+
+                update_inventory_command = UpdateInventoryCommand(
+                    product_repository,
+                    shopping_cart.items
+                )
+
+                # Execute initial commands
+                saga.execute_command(validate_command)
+
+                order = saga.execute_command(create_order_command)
+                saga.execute_command(update_inventory_command)
+                # Process payment
+                payment_command = ProcessPaymentCommand(
+                    self.payment_service,
+                    order,
+                    payment_method
+                )
+                saga.execute_command(payment_command)
 
+                # Update order status to "paid"
+                update_status_command = UpdateOrderStatusCommand(
+                    order_repository,
+                    order.order_id,
+                    OrderStatus.PAID
+                )
+                saga.execute_command(update_status_command)
+                saga.complete(order.order_id)
+
+            CHECKOUTS.inc(outcome="success")
+            self._notify_order(order)
+            logger.info("Order placed", extra={'order_id': order.order_id, 'saga_id': saga.saga_id,
+                                               'steps': saga.timings()})
             return {
                 "success": True,
                 "message": "Order placed successfully",
@@ -66,44 +122,83 @@ class OrderService:
             }
 
         except Exception as e:
-            # If any command fails, the invoker will automatically roll back
+            # If any command fails, the saga has already rolled back its own steps
+            CHECKOUTS.inc(outcome="failure")
+            logger.warning("Order placement failed: %s", e, extra={'saga_id': saga.saga_id,
+                                                                   'saga_status': saga.status,
+                                                                   'steps': saga.timings()})
             return {
                 "success": False,
                 "message": f"Order placement failed: {str(e)}"
             }
 
     def cancel_order(self, order_id, customer_id=None):
-        """Cancel an existing order"""
+        """Cancel an existing order and put its items back in stock"""
         try:
-            order = self.order_repository.get_by_id(order_id)
-            if not order:
+            # The customer check is part of the guarded update, so another
+            # customer's order is reported like a missing one
+            cancelled, skipped = self.order_repository.cancel_orders([order_id], customer_id=customer_id)
+            if order_id not in cancelled:
+                reason = skipped.get(order_id, 'not_cancellable')
                 return {
                     "success": False,
-                    "message": f"Order with ID {order_id} not found"
+                    "message": SKIP_MESSAGES[reason].format(order_id=order_id)
                 }
 
-            if customer_id and order.customer_id != customer_id:
-                return {
-                    "success": False,
-                    "message": "You do not have permission to cancel this order"
-                }
-            update_status_command = UpdateOrderStatusCommand(
-                self.order_repository,
-                order_id,
-                "cancelled"
-            )
-            self.invoker.execute_command(update_status_command)
+            # Refunds for orders that were already paid are still handled manually
+            return {
+                "success": True,
+                "message": "Order cancelled successfully",
+                "previous_status": cancelled[order_id]
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Order cancellation failed: {str(e)}"
+            }
 
-            # Could add additional commands for refund processing, inventory restoration, etc.
+    def cancel_orders(self, order_ids, batch_size=200, resolve_failed=False):
+        """
+        Cancel many orders at once (admin), one transaction per batch. With
+        resolve_failed, orders whose checkout compensation failed are cancelled too
+        """
+        try:
+            order_ids = list(dict.fromkeys(order_ids))
+            cancelled, skipped = {}, {}
+            for start in range(0, len(order_ids), batch_size):
+                batch_cancelled, batch_skipped = self.order_repository.cancel_orders(
+                    order_ids[start:start + batch_size], resolve_failed=resolve_failed)
+                cancelled.update(batch_cancelled)
+                skipped.update(batch_skipped)
+
+            logger.info("Bulk cancellation", extra={'requested': len(order_ids), 'cancelled': len(cancelled)})
+            return {
+                'cancelled': [{'order_id': order_id, 'previous_status': status}
+                              for order_id, status in cancelled.items()],
+                'skipped': [{'order_id': order_id, 'reason': skipped.get(order_id, 'not_cancellable')}
+                            for order_id in order_ids if order_id not in cancelled]
+            }
+        except Exception as e:
+            raise ValueError(f"Failed to cancel orders: {str(e)}")
 
+    def handle_payment_callback(self, order_id, succeeded, payment_id=None):
+        """Apply an asynchronous payment result reported by the payment provider"""
+        new_status = OrderStatus.PAID if succeeded else OrderStatus.PAYMENT_FAILED
+        try:
+            # A checkout still running or being compensated owns the order:
+            # marking it paid would record sales for an order about to be deleted
+            self.order_repository.transition_status(order_id, new_status, require_finished_checkout=True)
+            logger.info("Payment callback applied", extra={'order_id': order_id, 'status': new_status,
+                                                            'payment_id': payment_id})
             return {
                 "success": True,
-                "message": "Order cancelled successfully"
+                "message": f"Order marked {new_status}",
+                "status": new_status
             }
         except Exception as e:
             return {
                 "success": False,
-                "message": f"Order cancellation failed: {str(e)}"
+                "message": f"Payment callback rejected: {str(e)}"
             }
 
     def get_customer_orders(self, customer_id):
@@ -128,6 +223,34 @@ class OrderService:
         except Exception as e:
             raise ValueError(f"Failed to fetch customer orders: {str(e)}")
 
+    def get_seller_orders(self, seller_id, cursor=None, limit=50):
+        """
+        Page of order lines for a seller's products, newest first. The
+        returned next_cursor resumes after the last line of the page.
+        """
+        try:
+            before_id = int(cursor) if cursor else None
+        except ValueError:
+            raise ValueError("Invalid cursor")
+
+        try:
+            # One extra row tells whether another page follows
+            lines = self.order_repository.get_seller_lines(seller_id, before_id, limit + 1)
+            has_more = len(lines) > limit
+            lines = lines[:limit]
+            return {
+                'lines': [{
+                    **line,
+                    'order_date': line['order_date'].strftime('%Y-%m-%d %H:%M:%S') if line['order_date'] else None,
+                    'subtotal': line['price'] * line['quantity']
+                } for line in lines],
+                'next_cursor': str(lines[-1]['line_id']) if has_more else None,
+                'has_more': has_more
+            }
+
+        except Exception as e:
+            raise ValueError(f"Failed to fetch seller orders: {str(e)}")
+
     def get_order(self, order_id, customer_id=None):
         """Get a specific order by ID"""
         try:
@@ -1,10 +1,13 @@
 # emporia-api/services/payment_service.py
+from utils.tracing import traced_methods
+
 class PaymentResult:
     def __init__(self, success, payment_id=None, error_message=None):
         self.success = success
         self.payment_id = payment_id
         self.error_message = error_message
 
+@traced_methods
 class PaymentService:
     """Service to handle payment processing"""
     
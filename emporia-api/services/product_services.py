@@ -1,9 +1,21 @@
+import base64
+from datetime import datetime
 from models.Product.Product import Product
+from utils.tracing import traced_methods
 
+# Fields a product can be serialized with, in response order
+PRODUCT_FIELDS = ['product_id', 'seller_id', 'category_id', 'name', 'description', 'price', 'stock', 'image']
 
+
+class InvalidFieldsError(ValueError):
+    """A sparse fieldset named fields a product does not have"""
+
+
+@traced_methods
 class ProductService:
-    def __init__(self, product_repository):
+    def __init__(self, product_repository, fragment_cache=None):
         self.product_repository = product_repository
+        self.fragment_cache = fragment_cache
 
     def create_product(self, product_data, seller_id):
         """
@@ -41,58 +53,170 @@ class ProductService:
         except Exception as e:
             raise ValueError(f"Failed to create product: {str(e)}")
 
-    def get_all_products(self, limit=100, offset=0):
+    def get_all_products(self, limit=100, offset=0, fields=None):
         """
         Get all products with pagination.
         """
+        fields = self.parse_fields(fields)
         try:
-            products = self.product_repository.get_all_products(limit, offset)
+            products = self.product_repository.get_all_products(limit, offset, fields)
 
             # Convert to dictionary for API response
-            return [self._convert_to_dict(product) for product in products]
+            return [self._convert_to_dict(product, fields) for product in products]
 
         except Exception as e:
             raise ValueError(f"Failed to fetch products: {str(e)}")
 
-    def get_product_by_id(self, product_id):
+    def get_all_products_json(self, limit=100, offset=0):
+        """
+        Get a page of products as an encoded {"products": [...]} JSON body,
+        stitched together from cached per-product fragments.
+        """
+        try:
+            products = self.product_repository.get_all_products(limit, offset)
+            return self._stitch_products_json(products)
+
+        except Exception as e:
+            raise ValueError(f"Failed to fetch products: {str(e)}")
+
+    def get_products_by_category_json(self, category_id):
+        """
+        Get a category's products as an encoded {"products": [...]} JSON body.
+        """
+        try:
+            products = self.product_repository.get_by_category(category_id)
+            return self._stitch_products_json(products)
+
+        except Exception as e:
+            raise ValueError(f"Failed to fetch products by category: {str(e)}")
+
+    def _stitch_products_json(self, products):
+        # Each product is encoded at most once per version; unchanged products
+        # are copied into the response as already-encoded bytes
+        fragments = [
+            self.fragment_cache.get_or_encode(
+                product.product_id,
+                product.updated_at,
+                lambda product=product: self._convert_to_dict(product)
+            )
+            for product in products
+        ]
+        return b'{"products":[' + b','.join(fragments) + b']}'
+
+    def scan_products(self, chunk_size=1000):
+        """
+        Yield every product as a dictionary using a chunked keyset scan.
+        Each chunk is a short indexed query, so no connection is held open
+        for the duration of a slow download.
+        """
+        last_id = 0
+        while True:
+            products = self.product_repository.get_products_after(last_id, chunk_size)
+            for product in products:
+                yield self._convert_to_dict(product)
+
+            if len(products) < chunk_size:
+                return
+            last_id = products[-1].product_id
+
+    def get_product_by_id(self, product_id, fields=None):
         """
         Get a specific product by ID.
         """
+        fields = self.parse_fields(fields)
         try:
-            product = self.product_repository.get_by_id(product_id)
+            product = self.product_repository.get_by_id(product_id, fields)
 
             if not product:
                 raise ValueError(f"Product with ID {product_id} not found")
 
-            return self._convert_to_dict(product)
+            return self._convert_to_dict(product, fields)
 
         except Exception as e:
             raise ValueError(f"Failed to fetch product: {str(e)}")
 
-    def get_products_by_category(self, category_id):
+    def get_products_by_category(self, category_id, fields=None):
         """
         Get products by category ID.
         """
+        fields = self.parse_fields(fields)
         try:
-            products = self.product_repository.get_by_category(category_id)
+            products = self.product_repository.get_by_category(category_id, fields)
 
-            return [self._convert_to_dict(product) for product in products]
+            return [self._convert_to_dict(product, fields) for product in products]
 
         except Exception as e:
             raise ValueError(f"Failed to fetch products by category: {str(e)}")
 
-    def get_products_by_seller(self, seller_id):
+    def get_products_by_seller(self, seller_id, fields=None):
         """
         Get products by seller ID.
         """
+        fields = self.parse_fields(fields)
         try:
-            products = self.product_repository.get_by_seller(seller_id)
+            products = self.product_repository.get_by_seller(seller_id, fields)
 
-            return [self._convert_to_dict(product) for product in products]
+            return [self._convert_to_dict(product, fields) for product in products]
 
         except Exception as e:
             raise ValueError(f"Failed to fetch products by seller: {str(e)}")
 
+    def get_catalog_version(self):
+        """
+        Get a version stamp that changes with any product write or deletion.
+        """
+        return self.product_repository.get_catalog_version()
+
+    def get_product_version(self, product_id):
+        """
+        Get a product's version stamp, or None if the product does not exist.
+        """
+        return self.product_repository.get_version(product_id)
+
+    def get_product_changes(self, since=None, limit=500):
+        """
+        Get product updates and deletions after the given feed cursor.
+        Returns the changes together with the cursor to resume from.
+        """
+        try:
+            changed_at, last_id = self._decode_change_cursor(since)
+            changes = self.product_repository.get_changes_since(changed_at, last_id, limit)
+
+            next_cursor = since
+            if changes:
+                product_id, changed_at, _ = changes[-1]
+                next_cursor = self._encode_change_cursor(changed_at, product_id)
+
+            return {
+                'changes': [{
+                    'product_id': product_id,
+                    'deleted': product is None,
+                    'changed_at': changed_at.isoformat(),
+                    'product': self._convert_to_dict(product) if product else None
+                } for product_id, changed_at, product in changes],
+                'next_cursor': next_cursor,
+                'has_more': len(changes) == limit
+            }
+
+        except Exception as e:
+            raise ValueError(f"Failed to fetch product changes: {str(e)}")
+
+    def _encode_change_cursor(self, changed_at, product_id):
+        raw = f"{changed_at.isoformat()}|{product_id}"
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    def _decode_change_cursor(self, cursor):
+        # No cursor means "from the beginning"
+        if not cursor:
+            return datetime(1970, 1, 1), 0
+
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+            changed_at, product_id = raw.split("|")
+            return datetime.fromisoformat(changed_at), int(product_id)
+        except Exception:
+            raise ValueError("Invalid change feed cursor")
+
     def update_product(self, product_id, product_data, seller_id):
         """
         Update an existing product. Only the seller who created the product can update it.
@@ -153,11 +277,29 @@ class ProductService:
         except Exception as e:
             raise ValueError(f"Failed to delete product: {str(e)}")
 
-    def _convert_to_dict(self, product):
+    def parse_fields(self, fields):
+        """
+        Parse a comma separated sparse fieldset such as "name,price,image".
+        Returns None when every field is wanted. product_id is always included.
+        """
+        if not fields:
+            return None
+
+        requested = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in requested if field not in PRODUCT_FIELDS]
+        if unknown:
+            raise InvalidFieldsError(f"Unknown product fields: {', '.join(unknown)}")
+
+        return [field for field in PRODUCT_FIELDS if field == 'product_id' or field in requested]
+
+    def _convert_to_dict(self, product, fields=None):
         """
         Convert a Product object to a dictionary.
         This now uses 'product_id' to match the frontend's expectation.
         """
+        if fields:
+            return {field: getattr(product, field) for field in fields}
+
         return {
             'product_id': product.product_id, # <-- CORRECTED KEY
             'seller_id': product.seller_id,
@@ -0,0 +1,80 @@
+import logging
+import threading
+from collections import Counter, deque
+from datetime import date
+from utils.tracing import traced_methods
+
+logger = logging.getLogger(__name__)
+
+
+@traced_methods
+class ProductViewService:
+    """
+    Per-product daily view counts, buffered in process.
+
+    record() only increments an in-memory counter. flush() moves the
+    counter onto a bounded queue and writes the queued batches with one
+    batched upsert each, oldest first; batches stay queued while the
+    database is unreachable, and the oldest are dropped once max_queue of
+    them are waiting. Listeners see every view as it is recorded.
+    """
+
+    def __init__(self, view_repository, max_pending=50000, max_queue=30):
+        self.view_repository = view_repository
+        self.max_pending = max_pending
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._pending = Counter()
+        self._queue = deque()
+        self._lock = threading.Lock()
+        # One flush at a time: the periodic task and the shutdown flush
+        self._flush_lock = threading.Lock()
+        # Callbacks run with a product ID on every recorded view
+        self.view_listeners = []
+
+    def add_view_listener(self, listener):
+        self.view_listeners.append(listener)
+
+    def record(self, product_id):
+        key = (date.today(), product_id)
+        with self._lock:
+            if key in self._pending or len(self._pending) < self.max_pending:
+                self._pending[key] += 1
+            else:
+                self.dropped += 1
+        for listener in self.view_listeners:
+            listener(product_id)
+
+    def pending(self):
+        with self._lock:
+            return sum(self._pending.values()) + sum(sum(batch.values()) for batch in self._queue)
+
+    def flush(self):
+        """Write every buffered view; returns the number written"""
+        with self._flush_lock:
+            with self._lock:
+                if self._pending:
+                    self._queue.append(self._pending)
+                    self._pending = Counter()
+                while len(self._queue) > self.max_queue:
+                    lost = self._queue.popleft()
+                    self.dropped += sum(lost.values())
+                    logger.warning("View counter queue full, dropped %d views", sum(lost.values()))
+
+            written = 0
+            while self._queue:
+                batch = self._queue[0]
+                self.view_repository.add_views(batch)
+                written += sum(batch.values())
+                with self._lock:
+                    self._queue.popleft()
+            return written
+
+    def shutdown(self):
+        """Final flush at exit, so buffered views are not lost on a graceful stop"""
+        try:
+            written = self.flush()
+            if written:
+                logger.info("Flushed %d buffered product views at shutdown", written)
+        except Exception as e:
+            logger.error("Could not flush %d product views at shutdown: %s", self.pending(), e)
@@ -0,0 +1,193 @@
+import logging
+from datetime import datetime, timedelta
+from utils.tracing import traced_methods
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, recommendations are off without it
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:  # scipy is optional, co_occurrence falls back to numpy
+    sparse = None
+
+logger = logging.getLogger(__name__)
+
+# Name of the recommendation_state row serializing builders
+BUILDER = 'product_pairs'
+
+
+def co_occurrence(order_ids, product_ids):
+    """
+    Count, for every ordered pair of distinct products, the orders holding
+    both. Returns (product_ids, related_ids, orders) arrays.
+
+    With scipy this is B.T @ B for the sparse order x product incidence
+    matrix B; without it the pairs of each order are expanded with index
+    arithmetic and counted with np.unique.
+    """
+    if not len(order_ids):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    orders, order_index = np.unique(order_ids, return_inverse=True)
+    products, product_index = np.unique(product_ids, return_inverse=True)
+
+    if sparse is not None:
+        incidence = sparse.csr_matrix(
+            (np.ones(len(order_index), dtype=np.int64), (order_index, product_index)),
+            shape=(len(orders), len(products)))
+        # A product listed twice in an order still counts once
+        incidence.data[:] = 1
+        counts = (incidence.T @ incidence).tocoo()
+        keep = counts.row != counts.col
+        return products[counts.row[keep]], products[counts.col[keep]], counts.data[keep].astype(np.int64)
+
+    lines = np.unique(np.stack([order_index, product_index], axis=1), axis=0)
+    line_orders, line_products = lines[:, 0], lines[:, 1]
+    starts = np.flatnonzero(np.r_[True, line_orders[1:] != line_orders[:-1]])
+    sizes = np.diff(np.r_[starts, len(lines)])
+
+    # Every line paired with every line of its own order
+    partners = np.repeat(sizes, sizes)
+    left = np.repeat(np.arange(len(lines)), partners)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(partners) - partners, partners)
+    right = np.repeat(np.repeat(starts, sizes), partners) + offsets
+    keep = left != right
+
+    pairs, counts = np.unique(
+        np.stack([line_products[left[keep]], line_products[right[keep]]], axis=1), axis=0, return_counts=True)
+    return products[pairs[:, 0]], products[pairs[:, 1]], counts.astype(np.int64)
+
+
+def top_k(product_ids, related_ids, counts, k):
+    """{product_id: ((related_id, orders), ...)} keeping the k most co-ordered per product"""
+    order = np.lexsort((related_ids, -counts, product_ids))
+    product_ids, related_ids, counts = product_ids[order], related_ids[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, product_ids[1:] != product_ids[:-1]])
+    rank = np.arange(len(product_ids)) - np.repeat(starts, np.diff(np.r_[starts, len(product_ids)]))
+    keep = rank < k
+
+    neighbours = {}
+    for product_id, related_id, count in zip(product_ids[keep].tolist(), related_ids[keep].tolist(),
+                                             counts[keep].tolist()):
+        neighbours.setdefault(product_id, []).append((related_id, count))
+    return {product_id: tuple(related) for product_id, related in neighbours.items()}
+
+
+@traced_methods
+class RecommendationService:
+    """
+    "Frequently bought together" from product co-occurrence in sold orders.
+
+    Paying an order queues a +1 event for it and un-paying one (a cancelled
+    or reverted sale) a -1 event, in the same transaction as the status
+    change, whenever and however that happens: at checkout, from a payment
+    callback or from saga recovery. build() folds the queued events into
+    the product_pairs counts, batch_size at a time, and deletes them, so
+    history is never rescanned. refresh() then reloads the top-K neighbours
+    of the products whose counts changed into memory, where get_related
+    serves them with a dict lookup.
+    """
+
+    def __init__(self, recommendation_repository, top_k=10, batch_size=10000,
+                 max_order_products=100, refresh_overlap=120):
+        self.recommendation_repository = recommendation_repository
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self.max_order_products = max_order_products
+        self.refresh_overlap = refresh_overlap
+        self._related = {}
+        self._refreshed_at = datetime(1970, 1, 1)
+
+    @property
+    def available(self):
+        return np is not None
+
+    def get_related(self, product_id, limit=None):
+        related = self._related.get(product_id, ())
+        return [{'product_id': related_id, 'orders': orders} for related_id, orders in related[:limit]]
+
+    def run(self):
+        return {'pairs': self.build(), 'products': self.refresh()}
+
+    def build(self):
+        """Count the pairs of every queued order event"""
+        total = 0
+        while True:
+            pairs, done = self._build_batch()
+            total += pairs
+            if done:
+                break
+        if total:
+            logger.info("Counted %d product pairs", total)
+        return total
+
+    def _build_batch(self):
+        repository = self.recommendation_repository
+        repository.lock_builder(BUILDER)
+        try:
+            lines = repository.get_events(self.batch_size)
+            if not lines:
+                repository.release()
+                return 0, True
+
+            rows = np.array(lines, dtype=np.int64).reshape(-1, 3)
+            event_ids = np.unique(rows[:, 0])
+            pairs = self._count(*self._baskets(rows))
+            repository.add_pairs(pairs, event_ids.tolist())
+            return len(pairs), len(event_ids) < self.batch_size
+        except Exception:
+            repository.release()
+            raise
+
+    def _baskets(self, rows):
+        """
+        (event ids, product ids, signs) of the lines to count from
+        (event_id, product_id, sign) rows: one entry per distinct product of
+        each event, leaving out events without lines and bulk orders
+        """
+        rows = np.unique(rows[rows[:, 1] != 0], axis=0)
+        if len(rows):
+            # Bulk orders pair everything with everything; leave them out
+            _, index, sizes = np.unique(rows[:, 0], return_inverse=True, return_counts=True)
+            rows = rows[sizes[index.reshape(-1)] <= self.max_order_products]
+        return rows[:, 0], rows[:, 1], rows[:, 2]
+
+    def _count(self, event_ids, product_ids, signs):
+        """Net (product_id, related_id, orders) changes: paid orders add, unpaid ones subtract"""
+        parts = []
+        for sign in (1, -1):
+            keep = signs == sign
+            product, related, orders = co_occurrence(event_ids[keep], product_ids[keep])
+            parts.append((product, related, orders * sign))
+        product_ids, related_ids, orders = (np.concatenate(column) for column in zip(*parts))
+        if not len(product_ids):
+            return []
+
+        pairs, index = np.unique(np.stack([product_ids, related_ids], axis=1), axis=0, return_inverse=True)
+        totals = np.bincount(index.reshape(-1), weights=orders, minlength=len(pairs)).astype(np.int64)
+        keep = totals != 0
+        return list(zip(pairs[keep, 0].tolist(), pairs[keep, 1].tolist(), totals[keep].tolist()))
+
+    def refresh(self, chunk_size=500):
+        """Reload the neighbours of products whose counts changed since the last refresh"""
+        # Counts committed a little late can carry an older updated_at
+        since = self._refreshed_at - timedelta(seconds=self.refresh_overlap)
+        now, product_ids = self.recommendation_repository.get_changed_products(since)
+
+        for start in range(0, len(product_ids), chunk_size):
+            chunk = product_ids[start:start + chunk_size]
+            rows = self.recommendation_repository.get_pairs(chunk)
+            pairs = np.array(rows, dtype=np.int64).reshape(-1, 3)
+            related = top_k(pairs[:, 0], pairs[:, 1], pairs[:, 2], self.top_k)
+            for product_id in chunk:
+                if product_id in related:
+                    self._related[product_id] = related[product_id]
+                else:
+                    # Every pair of the product was cancelled out
+                    self._related.pop(product_id, None)
+
+        self._refreshed_at = now
+        return len(product_ids)
@@ -0,0 +1,152 @@
+import logging
+import uuid
+from command.order_commands import UpdateOrderStatusCommand
+from models.Order.OrderStatus import OrderStatus
+
+logger = logging.getLogger(__name__)
+
+# Once payment is captured the checkout is finished forward, not undone
+PAYMENT_STEP = 'ProcessPaymentCommand'
+STATUS_STEP = 'UpdateOrderStatusCommand'
+# Compensated newest first, mirroring OrderSaga.rollback
+COMPENSABLE_STEPS = ['UpdateOrderStatusCommand', 'ProcessPaymentCommand', 'UpdateInventoryCommand',
+                     'CreateOrderCommand']
+
+
+class SagaRecoveryService:
+    """
+    Finishes checkouts whose worker died mid-saga, using the durable saga log.
+
+    Stalled sagas (unfinished and silent for stale_seconds) are claimed in
+    batches. A saga whose payment went through is resumed by marking its
+    order paid; any other is compensated from the data logged by its
+    completed steps.
+    """
+
+    def __init__(self, saga_repository, order_repository, product_repository, payment_service,
+                 stale_seconds=60, batch_size=100, max_attempts=5, retention_days=7):
+        self.saga_repository = saga_repository
+        self.order_repository = order_repository
+        self.product_repository = product_repository
+        self.payment_service = payment_service
+        self.stale_seconds = stale_seconds
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retention_days = retention_days
+
+    def run(self):
+        """Recover every stalled saga, one claimed batch at a time"""
+        totals = {'resumed': 0, 'compensated': 0, 'failed': 0}
+        while True:
+            sagas = self.saga_repository.claim_stalled(uuid.uuid4().hex, self.stale_seconds, self.batch_size)
+            if not sagas:
+                break
+
+            logs = self.saga_repository.get_logs([saga['id'] for saga in sagas])
+            for saga in sagas:
+                totals[self.recover(saga, logs.get(saga['id'], []))] += 1
+
+            if len(sagas) < self.batch_size:
+                break
+
+        self.saga_repository.purge_finished(self.retention_days, self.batch_size * 10)
+        if any(totals.values()):
+            logger.info("Saga recovery finished", extra=totals)
+        return totals
+
+    def recover(self, saga, entries):
+        saga_id = saga['id']
+        steps = self._step_states(entries)
+        try:
+            if saga['recovery_attempts'] > self.max_attempts:
+                logger.error("Giving up on saga after %d attempts", saga['recovery_attempts'],
+                             extra={'saga_id': saga_id})
+                self.saga_repository.set_status(saga_id, 'compensation_failed')
+                return 'failed'
+
+            if saga['status'] == 'running' and steps.get(PAYMENT_STEP, {}).get('event') == 'done':
+                return self._resume(saga, steps)
+            return self._compensate(saga, steps)
+
+        except Exception as e:
+            # Left claimed; it becomes stale again and is retried later
+            logger.exception("Saga recovery failed: %s", e, extra={'saga_id': saga_id})
+            return 'failed'
+
+    def _step_states(self, entries):
+        # Latest event per step, keeping the data logged when the step was done
+        steps = {}
+        for entry in entries:
+            state = steps.setdefault(entry['step'], {'data': {}})
+            state['event'] = entry['event']
+            if entry['event'] == 'done':
+                state['data'] = entry['data']
+        return steps
+
+    def _order_id(self, saga, steps):
+        logged = steps.get('CreateOrderCommand', {}).get('data', {}).get('order_id')
+        # Also finds an order inserted just before the worker died
+        return logged or saga['order_id'] or self.order_repository.get_order_id_by_saga(saga['id'])
+
+    def _resume(self, saga, steps):
+        order_id = self._order_id(saga, steps)
+        if steps.get(STATUS_STEP, {}).get('event') != 'done':
+            try:
+                UpdateOrderStatusCommand(self.order_repository, order_id, OrderStatus.PAID).execute()
+            except ValueError as e:
+                # E.g. a payment callback already moved the order on
+                logger.warning("Order %s not moved to paid: %s", order_id, e, extra={'saga_id': saga['id']})
+            self.saga_repository.append(saga['id'], STATUS_STEP, 'done', {'order_id': order_id, 'recovered': True})
+
+        self.saga_repository.set_status(saga['id'], 'completed', order_id)
+        logger.info("Resumed checkout", extra={'saga_id': saga['id'], 'order_id': order_id})
+        return 'resumed'
+
+    def _compensate(self, saga, steps):
+        saga_id = saga['id']
+        order_id = self._order_id(saga, steps)
+        self.saga_repository.set_status(saga_id, 'compensating')
+
+        # The order is deleted last, so a missing order means an earlier
+        # rollback already undid every step
+        if 'CreateOrderCommand' in steps and order_id is None:
+            self.saga_repository.set_status(saga_id, 'compensated')
+            return 'compensated'
+
+        # Stock may or may not have been taken, so restocking could oversell;
+        # the customer may or may not have been charged, with no payment_id
+        # to refund, so deleting the order could lose a paid checkout
+        for step in (PAYMENT_STEP, 'UpdateInventoryCommand'):
+            if steps.get(step, {}).get('event') == 'started':
+                logger.error("%s of a stalled saga has an unknown outcome, review order %s", step, order_id,
+                             extra={'saga_id': saga_id})
+                self.saga_repository.set_status(saga_id, 'compensation_failed', order_id)
+                return 'failed'
+
+        for step in COMPENSABLE_STEPS:
+            state = steps.get(step)
+            if not state or state['event'] not in ('done', 'started', 'failed'):
+                continue
+            self._undo(step, state, order_id)
+            self.saga_repository.append(saga_id, step, 'compensated', {'recovered': True})
+
+        self.saga_repository.set_status(saga_id, 'compensated', order_id)
+        logger.info("Compensated checkout", extra={'saga_id': saga_id, 'order_id': order_id})
+        return 'compensated'
+
+    def _undo(self, step, state, order_id):
+        data = state['data']
+        if step == STATUS_STEP:
+            # Takes the sale back out of the rollups before the order is deleted
+            if state['event'] == 'done' and order_id is not None:
+                self.order_repository.revert_status(order_id, OrderStatus.PAID)
+        elif step == 'ProcessPaymentCommand':
+            if data.get('payment_id'):
+                self.payment_service.refund_payment(data['payment_id'])
+        elif step == 'UpdateInventoryCommand':
+            if state['event'] == 'done':
+                self.product_repository.restock(
+                    {int(product_id): quantity for product_id, quantity in data['quantities'].items()})
+        elif step == 'CreateOrderCommand':
+            if order_id is not None:
+                self.order_repository.delete_order(order_id)
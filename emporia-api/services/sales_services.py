@@ -0,0 +1,72 @@
+import logging
+from datetime import date, timedelta
+from utils.tracing import traced_methods
+
+logger = logging.getLogger(__name__)
+
+GROUP_BY = ('day', 'product', 'seller', 'category')
+
+
+@traced_methods
+class SalesService:
+    """Sales dashboards read from the daily rollup, and its chunked rebuild"""
+
+    def __init__(self, sales_repository, default_days=30, max_days=366):
+        self.sales_repository = sales_repository
+        self.default_days = default_days
+        self.max_days = max_days
+
+    def _date_range(self, date_from, date_to):
+        try:
+            date_to = date.fromisoformat(date_to) if date_to else date.today()
+            date_from = date.fromisoformat(date_from) if date_from else date_to - timedelta(days=self.default_days - 1)
+        except ValueError:
+            raise ValueError("Dates must be formatted as YYYY-MM-DD")
+        if date_from > date_to:
+            raise ValueError("'from' must not be after 'to'")
+        if (date_to - date_from).days >= self.max_days:
+            raise ValueError(f"Date range must not exceed {self.max_days} days")
+        return date_from, date_to
+
+    def get_sales_report(self, group_by='day', date_from=None, date_to=None,
+                         seller_id=None, category_id=None, limit=20):
+        """Units sold and revenue over a date range, in total and per group_by"""
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY)}")
+        date_from, date_to = self._date_range(date_from, date_to)
+
+        try:
+            return {
+                'from': date_from.isoformat(),
+                'to': date_to.isoformat(),
+                'group_by': group_by,
+                'totals': self.sales_repository.get_totals(date_from, date_to, seller_id, category_id),
+                'rows': self.sales_repository.get_grouped(group_by, date_from, date_to,
+                                                          seller_id, category_id, limit)
+            }
+        except Exception as e:
+            raise ValueError(f"Failed to fetch sales report: {str(e)}")
+
+    def rebuild(self, date_from=None, date_to=None, chunk_days=7, progress=None):
+        """
+        Recompute the rollup from orders, chunk_days at a time so each
+        transaction (and the order rows it locks) stays small. Defaults to
+        every day with an order.
+        """
+        first_day, last_day = self.sales_repository.get_order_date_range()
+        date_from = date.fromisoformat(date_from) if date_from else first_day
+        date_to = date.fromisoformat(date_to) if date_to else last_day
+        if date_from is None or date_to is None:
+            return 0
+
+        rows = 0
+        chunk_start = date_from
+        while chunk_start <= date_to:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days), date_to + timedelta(days=1))
+            rows += self.sales_repository.rebuild(chunk_start, chunk_end)
+            if progress:
+                progress(chunk_start, chunk_end, rows)
+            chunk_start = chunk_end
+
+        logger.info("Rebuilt sales rollup from %s to %s", date_from, date_to, extra={'rows': rows})
+        return rows
@@ -0,0 +1,124 @@
+import logging
+import math
+import threading
+import time
+from utils.tracing import traced_methods
+
+logger = logging.getLogger(__name__)
+
+# Stored scores are rescaled to this instant (2026-01-01 UTC)
+EPOCH = 1767225600
+
+
+@traced_methods
+class TrendingService:
+    """
+    Popularity scores that decay exponentially with a half-life, fed by
+    product views and placed orders.
+
+    Each event adds its weight scaled by e^(decay * (t - base)), so scores
+    never have to be decayed one by one: ranking by the scaled value is
+    ranking by the decayed one. Events are summed in memory per product and
+    merged every interval into product_trending, shared by all workers and
+    kept across restarts. Rankings are read back from there and cached for
+    cache_seconds, so requests are served from memory.
+    """
+
+    def __init__(self, trending_repository, half_life=21600, view_weight=1.0, order_weight=5.0,
+                 max_pending=100000, ranking_size=100, cache_seconds=30, min_score=0.01,
+                 max_cached_rankings=1000):
+        self.trending_repository = trending_repository
+        self.decay = math.log(2) / half_life
+        self.view_weight = view_weight
+        self.order_weight = order_weight
+        self.max_pending = max_pending
+        self.ranking_size = ranking_size
+        self.cache_seconds = cache_seconds
+        self.min_score = min_score
+        self.max_cached_rankings = max_cached_rankings
+        self.dropped = 0
+        self._pending = {}
+        self._base = time.time()
+        self._lock = threading.Lock()
+        # The repository's connection is shared with the background flush
+        self._db_lock = threading.Lock()
+        self._rankings = {}
+
+    def record_view(self, product_id):
+        """View listener: every counted page view, 304 revalidations included, counts view_weight"""
+        self.record(product_id, self.view_weight)
+
+    def record_order(self, order):
+        """Order listener: every unit bought counts order_weight"""
+        for item in order.product_list:
+            self.record(item.product.product_id, self.order_weight * item.quantity)
+
+    def record(self, product_id, weight, at=None):
+        if weight <= 0:
+            return
+        at = at or time.time()
+        with self._lock:
+            if product_id not in self._pending and len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            scaled = weight * math.exp(self.decay * (at - self._base))
+            self._pending[product_id] = self._pending.get(product_id, 0.0) + scaled
+
+    def flush(self):
+        """Merge the scores gathered since the last flush into the shared table"""
+        with self._lock:
+            pending, base = self._pending, self._base
+            self._pending, self._base = {}, time.time()
+        if not pending:
+            return 0
+
+        # In log form, rescaled from this interval's base to EPOCH
+        offset = self.decay * (base - EPOCH)
+        scores = sorted((product_id, math.log(scaled) + offset) for product_id, scaled in pending.items())
+        try:
+            with self._db_lock:
+                self.trending_repository.add_scores(scores)
+        except Exception:
+            # Keep the events for the next flush
+            for product_id, scaled in pending.items():
+                self.record(product_id, scaled, at=base)
+            raise
+        return len(scores)
+
+    def run(self):
+        flushed = self.flush()
+        with self._db_lock:
+            purged = self.trending_repository.purge_below(self._log_score(self.min_score), 1000)
+        return {'flushed': flushed, 'purged': purged}
+
+    def _log_score(self, score, now=None):
+        return math.log(score) + self.decay * ((now or time.time()) - EPOCH)
+
+    def _load(self, category_id):
+        with self._db_lock:
+            rows = self.trending_repository.get_top(category_id, self.ranking_size)
+        ranking = (time.time(), rows)
+        if category_id in self._rankings or len(self._rankings) < self.max_cached_rankings:
+            self._rankings[category_id] = ranking
+        return ranking
+
+    def get_trending(self, category_id=None, limit=20):
+        """The highest decayed scores, overall or in one category"""
+        ranking = self._rankings.get(category_id)
+        if ranking is None or time.time() - ranking[0] > self.cache_seconds:
+            try:
+                ranking = self._load(category_id)
+            except Exception as e:
+                if ranking is None:
+                    raise ValueError(f"Failed to fetch trending products: {str(e)}")
+                logger.warning("Serving stale trending ranking: %s", e)
+
+        now = self._log_score(1.0)
+        return [{
+            'product_id': product_id,
+            'category_id': product_category_id,
+            'name': name,
+            'price': price,
+            'image': image,
+            'score': round(math.exp(log_score - now), 4)
+        } for product_id, product_category_id, log_score, name, price, image in ranking[1][:limit]]
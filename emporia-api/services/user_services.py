@@ -1,3 +1,4 @@
+import logging
 import hashlib
 import re
 from models.Users.User import User
@@ -6,7 +7,11 @@ from models.Users.Admin import Admin
 from models.Users.Customer import Customer
 from factories.UserFactory.UserFactory import UserFactory
 from utils.jwt_utils import JWTManager
+from utils.tracing import traced_methods
 
+logger = logging.getLogger(__name__)
+
+@traced_methods
 class UserService:
     def __init__(self, user_repository):
         self.user_repository = user_repository
@@ -48,8 +53,24 @@ class UserService:
 
         return user_json_array
     
+    def iter_users(self, limit=100, after_id=0, chunk_size=500):
+        """
+        Yield up to limit users with an id greater than after_id as JSON-ready
+        dictionaries, fetched in keyset chunks of chunk_size
+        """
+        last_id = after_id
+        while limit > 0:
+            size = min(chunk_size, limit)
+            rows = self.user_repository.get_users_after(last_id, size)
+            for user_data in rows:
+                yield self._convert_array_to_user(user_data).to_json()
+
+            if len(rows) < size:
+                return
+            limit -= len(rows)
+            last_id = rows[-1][0]
+
     def get_seller_by_user_id(self, user_id): 
-        print(f"Retrieving seller for user ID: {user_id}")
         raw_user = self.user_repository.get_user_by_id(user_id)
         if not raw_user:
             raise ValueError("User not found")
@@ -59,9 +80,8 @@ class UserService:
         seller = self.user_repository.get_seller_by_username(user.id)
 
         seller = self._convert_array_to_seller(seller, user)
-        print(f"Retrieved seller {seller.seller_id} for user ID {user.id}")
         if seller:
-            print(f"Retrieved seller {seller.seller_id} for user ID {user.id}")
+            logger.debug("Resolved seller", extra={'user_id': user.id, 'seller_id': seller.seller_id})
         return seller
 
      
@@ -0,0 +1,561 @@
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from command.order_saga import OrderSaga
+from command.order_command import OrderCommand
+from models.Order.CartItem import CartItem
+from models.Order.ShoppingCart import ShoppingCart
+from models.Product.Product import Product
+from repositories.database.db_connection import PooledConnection
+from repositories.database.db_order_repo import DBOrderRepo
+from repositories.database.db_product_repo import DBProductRepo
+from repositories.database.db_saga_repo import DBSagaRepo
+from services.order_services import OrderService
+from services.payment_services import PaymentResult
+from services.saga_recovery_services import SagaRecoveryService
+
+CHECKOUTS = 40
+
+
+class InMemoryOrderRepo:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.orders = {}
+        self.deleted = set()
+        self.next_id = 1
+
+    def create_order(self, order, saga_id=None):
+        with self.lock:
+            order.order_id = self.next_id
+            self.next_id += 1
+            self.orders[order.order_id] = order
+        return order
+
+    def delete_order(self, order_id):
+        with self.lock:
+            self.deleted.add(order_id)
+            self.orders.pop(order_id)
+
+    def get_by_id(self, order_id):
+        return self.orders.get(order_id)
+
+    def transition_status(self, order_id, new_status, from_statuses=None, customer_id=None):
+        order = self.orders[order_id]
+        order.previous_status, order.status = order.status, new_status
+
+    def revert_status(self, order_id, from_status):
+        order = self.orders[order_id]
+        order.status = order.previous_status
+
+
+class InMemoryProductRepo:
+    def __init__(self, products):
+        self.lock = threading.Lock()
+        self.stock = {product.product_id: product.stock for product in products}
+
+    def deduct_stock(self, quantities):
+        with self.lock:
+            if any(self.stock[product_id] < quantity for product_id, quantity in quantities.items()):
+                raise ValueError("Insufficient stock")
+            for product_id, quantity in quantities.items():
+                self.stock[product_id] -= quantity
+
+    def restock(self, quantities):
+        with self.lock:
+            for product_id, quantity in quantities.items():
+                self.stock[product_id] += quantity
+
+    def get_by_id(self, product_id):
+        return Product(product_id, 1, 1, f"product-{product_id}", "", "", 10, self.stock[product_id])
+
+
+class FlakyPaymentService:
+    """Declines every customer with an odd id, after all checkouts are in flight."""
+
+    def __init__(self, parties):
+        self.barrier = threading.Barrier(parties)
+
+    def process_payment(self, amount, payment_method, order_id):
+        # Hold every checkout here so their sagas overlap
+        self.barrier.wait(timeout=10)
+        if payment_method == 'declined':
+            return PaymentResult(success=False, error_message="card declined")
+        return PaymentResult(success=True, payment_id=f"PAYMENT-{order_id}")
+
+    def refund_payment(self, payment_id):
+        return True
+
+
+def _cart(customer_id, product):
+    cart = ShoppingCart(customer_id, customer_id)
+    cart.items.append(CartItem(product, 2))
+    cart.total_price = product.price * 2
+    return cart
+
+
+def test_concurrent_checkouts_only_roll_back_their_own_steps():
+    products = [Product(customer_id, 1, 1, f"product-{customer_id}", "", "", 10, 5)
+                for customer_id in range(1, CHECKOUTS + 1)]
+    order_repo = InMemoryOrderRepo()
+    product_repo = InMemoryProductRepo(products)
+    service = OrderService(order_repo, product_repo, FlakyPaymentService(CHECKOUTS))
+
+    def checkout(product):
+        customer_id = product.product_id
+        method = 'declined' if customer_id % 2 else 'card'
+        return customer_id, service.place_order(_cart(customer_id, product), customer_id, method)
+
+    with ThreadPoolExecutor(max_workers=CHECKOUTS) as pool:
+        results = dict(pool.map(checkout, products))
+
+    for customer_id, result in results.items():
+        if customer_id % 2:
+            assert not result['success']
+            # Inventory restored for the declined checkout only
+            assert product_repo.stock[customer_id] == 5
+        else:
+            assert result['success'], result['message']
+            assert product_repo.stock[customer_id] == 3
+            assert order_repo.orders[result['order_id']].status == 'paid'
+
+    # Exactly the declined checkouts' orders were compensated
+    assert len(order_repo.deleted) == CHECKOUTS // 2
+    assert all(order.customer_id % 2 == 0 for order in order_repo.orders.values())
+
+
+class FakeServer:
+    """Committed state of a MySQL server: product stock and order statuses."""
+
+    def __init__(self, stock):
+        self.lock = threading.Lock()
+        self.stock = dict(stock)
+        self.orders = {}
+        self.order_customers = {}
+        self.next_order_id = 1
+        self.lowest_stock = min(stock.values())
+
+    def add_stock(self, product_id, quantity):
+        self.stock[product_id] += quantity
+        self.lowest_stock = min(self.lowest_stock, self.stock[product_id])
+
+
+class FakeConnection:
+    """
+    One MySQL session: writes stay pending until commit, and rollback
+    discards every pending write of the session, whoever issued it.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.pending = []
+        # Guarded stock updates apply at once, as the row lock would
+        # serialize them, and are reverted on rollback
+        self.undo = []
+        self.statements = 0
+        self.orders = set()
+        self.products = set()
+        self.returned = False
+
+    def cursor(self, buffered=True):
+        return FakeCursor(self)
+
+    def commit(self):
+        with self.server.lock:
+            for write in self.pending:
+                write()
+        self.pending = []
+        self.undo = []
+
+    def rollback(self):
+        with self.server.lock:
+            for undo in self.undo:
+                undo()
+        self.pending = []
+        self.undo = []
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.server = connection.server
+        self.rowcount = 0
+        self.lastrowid = None
+        self.row = None
+
+    def execute(self, operation, params=()):
+        statement = ' '.join(operation.split())
+        connection, server = self.connection, self.server
+        connection.statements += 1
+        self.rowcount = 1
+        # Let other checkouts run between a statement and its commit, as
+        # they would against a real server
+        time.sleep(0.001)
+
+        if statement.startswith('INSERT INTO orders'):
+            with server.lock:
+                order_id = server.next_order_id
+                server.next_order_id += 1
+                server.order_customers[order_id] = params[0]
+            self.lastrowid = order_id
+            connection.orders.add(order_id)
+            connection.pending.append(lambda: server.orders.__setitem__(order_id, params[2]))
+        elif statement.startswith('UPDATE orders SET previous_status = status'):
+            new_status, order_id = params[0], params[1]
+            connection.orders.add(order_id)
+            connection.pending.append(lambda: server.orders.__setitem__(order_id, new_status))
+        elif statement.startswith('DELETE FROM orders'):
+            order_id = params[0]
+            connection.orders.add(order_id)
+            connection.pending.append(lambda: server.orders.pop(order_id))
+        elif statement.startswith('UPDATE products SET stock = stock -'):
+            quantity, product_id = params[0], params[1]
+            connection.products.add(product_id)
+            with server.lock:
+                self.rowcount = 1 if server.stock[product_id] >= quantity else 0
+                if self.rowcount:
+                    server.add_stock(product_id, -quantity)
+                    connection.undo.append(lambda: server.add_stock(product_id, quantity))
+        elif statement.startswith('SELECT status FROM orders'):
+            with server.lock:
+                self.row = (server.orders[params[0]],) if params[0] in server.orders else None
+        elif statement.startswith('SELECT id, category_id'):
+            product_id = params[0]
+            connection.products.add(product_id)
+            with server.lock:
+                stock = server.stock[product_id]
+            self.row = (product_id, 1, f"product-{product_id}", "", 10, stock, 1, "", None)
+
+    def executemany(self, operation, seq_params):
+        statement = ' '.join(operation.split())
+        connection, server = self.connection, self.server
+        connection.statements += 1
+        if statement.startswith('UPDATE products SET stock = stock +'):
+            for quantity, product_id in seq_params:
+                connection.products.add(product_id)
+                connection.pending.append(lambda q=quantity, p=product_id: server.add_stock(p, q))
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    """Stands in for DatabaseConnection's pool: a new session per borrower."""
+
+    def __init__(self, server):
+        self.server = server
+        self.lock = threading.Lock()
+        self.borrowed = []
+
+    def borrow_connection(self):
+        connection = FakeConnection(self.server)
+        with self.lock:
+            self.borrowed.append(connection)
+        return connection
+
+    def return_connection(self, connection):
+        connection.returned = True
+
+    def wrap_cursor(self, cursor):
+        return cursor
+
+
+class SharedConnection:
+    """The request-wide DatabaseConnection the repositories are built on."""
+
+    def __init__(self, server):
+        self.connection = FakeConnection(server)
+        self.cursor = self.connection.cursor()
+
+
+def test_checkouts_on_pooled_connections_commit_and_roll_back_independently():
+    products = [Product(customer_id, 1, 1, f"product-{customer_id}", "", "", 10, 5)
+                for customer_id in range(1, CHECKOUTS + 1)]
+    server = FakeServer({product.product_id: 5 for product in products})
+    shared = SharedConnection(server)
+    pool = FakePool(server)
+    service = OrderService(DBOrderRepo(shared), DBProductRepo(shared), FlakyPaymentService(CHECKOUTS),
+                           DBSagaRepo(shared), connections=lambda: PooledConnection(pool))
+
+    def checkout(product):
+        customer_id = product.product_id
+        method = 'declined' if customer_id % 2 else 'card'
+        return customer_id, service.place_order(_cart(customer_id, product), customer_id, method)
+
+    with ThreadPoolExecutor(max_workers=CHECKOUTS) as pool_threads:
+        results = dict(pool_threads.map(checkout, products))
+
+    # Nothing ran on the shared connection, and every borrowed one went back
+    assert shared.connection.statements == 0
+    assert len(pool.borrowed) == CHECKOUTS
+    assert all(connection.returned for connection in pool.borrowed)
+
+    # Each session only touched its own checkout's product and order
+    for connection in pool.borrowed:
+        assert len(connection.products) == 1
+        customer_id = next(iter(connection.products))
+        assert all(server.order_customers[order_id] == customer_id for order_id in connection.orders)
+
+    for customer_id, result in results.items():
+        if customer_id % 2:
+            assert not result['success']
+            assert server.stock[customer_id] == 5
+        else:
+            assert result['success'], result['message']
+            assert server.stock[customer_id] == 3
+            assert server.orders[result['order_id']] == 'paid'
+
+    # Declined checkouts' orders were deleted, paid ones all committed
+    assert len(server.orders) == CHECKOUTS // 2
+    assert all(server.order_customers[order_id] % 2 == 0 for order_id in server.orders)
+
+
+class ApprovingPaymentService:
+    def process_payment(self, amount, payment_method, order_id):
+        return PaymentResult(success=True, payment_id=f"PAYMENT-{order_id}")
+
+    def refund_payment(self, payment_id):
+        return True
+
+
+def test_concurrent_checkouts_of_one_product_never_oversell():
+    # Every cart saw 15 in stock, enough for 7 of the 40 checkouts of 2
+    product = Product(1, 1, 1, "product-1", "", "", 10, 15)
+    server = FakeServer({1: 15})
+    shared = SharedConnection(server)
+    service = OrderService(DBOrderRepo(shared), DBProductRepo(shared), ApprovingPaymentService(),
+                           DBSagaRepo(shared), connections=lambda: PooledConnection(FakePool(server)))
+
+    def checkout(customer_id):
+        return service.place_order(_cart(customer_id, product), customer_id, 'card')
+
+    with ThreadPoolExecutor(max_workers=CHECKOUTS) as pool_threads:
+        results = list(pool_threads.map(checkout, range(1, CHECKOUTS + 1)))
+
+    sold = [result for result in results if result['success']]
+    assert len(sold) == 7
+    assert server.stock[1] == 15 - 2 * len(sold)
+    assert server.lowest_stock >= 0
+    # Checkouts that found no stock left no order behind
+    assert sorted(server.orders) == sorted(result['order_id'] for result in sold)
+    assert all("Insufficient stock" in result['message'] for result in results if not result['success'])
+
+
+class RecordingCommand(OrderCommand):
+    def __init__(self, name, log, fail=False):
+        self.name = name
+        self.log = log
+        self.fail = fail
+
+    def execute(self):
+        if self.fail:
+            raise ValueError(f"{self.name} failed")
+        self.log.append(f"do {self.name}")
+        return self.name
+
+    def undo(self):
+        self.log.append(f"undo {self.name}")
+
+
+def test_saga_compensates_in_reverse_and_records_timings():
+    log = []
+    saga = OrderSaga()
+    saga.execute_command(RecordingCommand('a', log))
+    saga.execute_command(RecordingCommand('b', log))
+
+    try:
+        saga.execute_command(RecordingCommand('c', log, fail=True))
+        assert False, "expected the failing step to raise"
+    except ValueError:
+        pass
+
+    assert log == ['do a', 'do b', 'undo b', 'undo a']
+    assert saga.status == 'compensated'
+    assert [step['status'] for step in saga.timings()] == ['compensated', 'compensated', 'failed']
+    assert all(step['duration_ms'] is not None for step in saga.timings())
+
+
+class ScriptedCursor:
+    """Answers the cancellation's locking SELECT with fixed rows and records the rest."""
+
+    def __init__(self, locked_rows):
+        self.locked_rows = locked_rows
+        self.statements = []
+        self.rows = []
+        self.rowcount = 1
+
+    def execute(self, operation, params=()):
+        statement = ' '.join(operation.split())
+        self.statements.append((statement, params))
+        if statement.startswith(('SELECT o.id, o.status', 'SELECT o.status', 'SELECT status')):
+            self.rows = self.locked_rows
+        elif statement.startswith('SELECT DISTINCT product_id'):
+            self.rows = [(order_id,) for order_id in params]
+        else:
+            self.rows = []
+
+    def executemany(self, operation, seq_params):
+        self.statements.append((' '.join(operation.split()), seq_params))
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class ScriptedConnection:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class ScriptedDatabase:
+    def __init__(self, locked_rows):
+        self.connection = ScriptedConnection()
+        self.cursor = ScriptedCursor(locked_rows)
+
+
+def test_cancellation_skips_orders_whose_checkout_saga_is_unfinished():
+    db = ScriptedDatabase([
+        (1, 'pending', 'saga-running', 'running'),
+        (2, 'pending', 'saga-compensating', 'compensating'),
+        (3, 'pending', 'saga-completed', 'completed'),
+        (4, 'paid', 'saga-purged', None),
+        (5, 'pending', None, None),
+    ])
+    repo = DBOrderRepo(db)
+    restocked = []
+    repo.add_restock_listener(restocked.append)
+
+    cancelled, skipped = repo.cancel_orders([1, 2, 3, 4, 5])
+
+    assert cancelled == {3: 'pending', 4: 'paid', 5: 'pending'}
+    assert skipped == {1: 'checkout_in_progress', 2: 'checkout_in_progress'}
+    updates = [params for statement, params in db.cursor.statements if statement.startswith('UPDATE')]
+    # Status change and restock only cover the orders whose checkout is over
+    assert updates[0] == ('cancelled', 3, 4, 5)
+    assert updates[1] == (3, 4, 5)
+    assert sorted(restocked) == [3, 4, 5]
+
+
+def test_cancellation_during_a_running_checkout_changes_nothing():
+    db = ScriptedDatabase([(1, 'pending', 'saga-running', 'running')])
+    repo = DBOrderRepo(db)
+
+    assert repo.cancel_orders([1]) == ({}, {1: 'checkout_in_progress'})
+    assert [statement for statement, params in db.cursor.statements if not statement.startswith('SELECT')] == []
+    assert db.connection.rollbacks == 1 and db.connection.commits == 0
+
+
+def test_admin_resolves_an_order_whose_checkout_compensation_failed():
+    rows = [(1, 'pending', 'saga-failed', 'compensation_failed'), (2, 'pending', None, None)]
+    db = ScriptedDatabase(rows)
+    service = OrderService(DBOrderRepo(db), None, None)
+
+    # Reported, not silently dropped, until an admin settles it
+    assert service.cancel_orders([1, 2, 3]) == {
+        'cancelled': [{'order_id': 2, 'previous_status': 'pending'}],
+        'skipped': [{'order_id': 1, 'reason': 'checkout_failed'},
+                    {'order_id': 3, 'reason': 'not_cancellable'}],
+    }
+    assert "under review" in service.cancel_order(1, customer_id=7)['message']
+
+    db.cursor.statements.clear()
+    db.cursor.locked_rows = rows[:1]
+    result = service.cancel_orders([1], resolve_failed=True)
+
+    assert result == {'cancelled': [{'order_id': 1, 'previous_status': 'pending'}], 'skipped': []}
+    updates = [(statement, params) for statement, params in db.cursor.statements if statement.startswith('UPDATE')]
+    assert updates[0][1] == ('cancelled', 1)
+    # The stuck saga is closed, so recovery and retention treat it as done
+    assert updates[-1] == ("UPDATE order_sagas SET status = 'compensated', claimed_by = NULL WHERE id IN (%s)",
+                           ('saga-failed',))
+
+
+def test_payment_callback_waits_for_an_unfinished_checkout():
+    db = ScriptedDatabase([('pending', 7, 'saga-running', 'running')])
+    # The saga guard in the UPDATE matches nothing
+    db.cursor.rowcount = 0
+    service = OrderService(DBOrderRepo(db), None, None)
+
+    result = service.handle_payment_callback(1, True, 'PAYMENT-1')
+
+    assert not result['success']
+    assert "has not finished" in result['message']
+    statements = [statement for statement, params in db.cursor.statements]
+    assert "NOT EXISTS" in statements[0]
+    # No sales or recommendation events for an order compensation may delete
+    assert not any(statement.startswith('INSERT') for statement in statements)
+    assert db.connection.rollbacks == 1 and db.connection.commits == 0
+
+
+class RecordingRecoveryRepo:
+    """Saga, order, product and payment stand-in that records every call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args))
+
+
+def test_recovery_leaves_a_saga_whose_payment_outcome_is_unknown_for_review():
+    repo = RecordingRecoveryRepo()
+    recovery = SagaRecoveryService(repo, repo, repo, repo)
+    saga = {'id': 'saga-1', 'status': 'running', 'order_id': 7, 'recovery_attempts': 1}
+    entries = [
+        {'step': 'CreateOrderCommand', 'event': 'done', 'data': {'order_id': 7}},
+        {'step': 'UpdateInventoryCommand', 'event': 'done', 'data': {'quantities': {'1': 2}}},
+        {'step': 'ProcessPaymentCommand', 'event': 'started', 'data': None},
+    ]
+
+    assert recovery.recover(saga, entries) == 'failed'
+    # The charge may have gone through: no restock, no order deletion
+    assert repo.calls == [('set_status', ('saga-1', 'compensating')),
+                          ('set_status', ('saga-1', 'compensation_failed', 7))]
+
+
+def test_a_sold_order_is_not_deleted():
+    db = ScriptedDatabase([('paid',)])
+
+    try:
+        DBOrderRepo(db).delete_order(1)
+        assert False, "expected deleting a paid order to be refused"
+    except Exception as e:
+        assert "revert or cancel" in str(e)
+
+    # Its sales and product pairs are still undone from the items it kept
+    assert not any(statement.startswith('DELETE') for statement, params in db.cursor.statements)
+    assert db.connection.commits == 0
+
+
+def test_recovery_reverts_a_paid_order_before_deleting_it():
+    repo = RecordingRecoveryRepo()
+    recovery = SagaRecoveryService(repo, repo, repo, repo)
+    saga = {'id': 'saga-1', 'status': 'compensating', 'order_id': 7, 'recovery_attempts': 1}
+    entries = [
+        {'step': 'CreateOrderCommand', 'event': 'done', 'data': {'order_id': 7}},
+        {'step': 'UpdateInventoryCommand', 'event': 'done', 'data': {'quantities': {'1': 2}}},
+        {'step': 'ProcessPaymentCommand', 'event': 'done', 'data': {'order_id': 7, 'payment_id': 'PAYMENT-7'}},
+        {'step': 'UpdateOrderStatusCommand', 'event': 'done', 'data': {'order_id': 7, 'new_status': 'paid'}},
+    ]
+
+    assert recovery.recover(saga, entries) == 'compensated'
+    undone = [(name, args) for name, args in repo.calls if name != 'append' and name != 'set_status']
+    assert undone == [('revert_status', (7, 'paid')), ('refund_payment', ('PAYMENT-7',)),
+                      ('restock', ({1: 2},)), ('delete_order', (7,))]
@@ -0,0 +1,131 @@
+import sys
+import os
+import random
+from collections import Counter
+from itertools import permutations
+
+import pytest
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+np = pytest.importorskip('numpy')
+
+from services import recommendation_services
+from services.recommendation_services import RecommendationService, co_occurrence, top_k
+
+
+def _random_orders(seed, orders=300, products=40):
+    rng = random.Random(seed)
+    order_ids, product_ids = [], []
+    for order_id in range(1, orders + 1):
+        # Some orders list a product twice; it still counts once
+        for _ in range(rng.randint(1, 6)):
+            order_ids.append(order_id)
+            product_ids.append(rng.randint(1, products))
+    return np.array(order_ids, dtype=np.int64), np.array(product_ids, dtype=np.int64)
+
+
+def _brute_force(order_ids, product_ids):
+    baskets = {}
+    for order_id, product_id in zip(order_ids.tolist(), product_ids.tolist()):
+        baskets.setdefault(order_id, set()).add(product_id)
+    return Counter(pair for basket in baskets.values() for pair in permutations(sorted(basket), 2))
+
+
+def _as_counter(product_ids, related_ids, counts):
+    return Counter(dict(zip(zip(product_ids.tolist(), related_ids.tolist()), counts.tolist())))
+
+
+@pytest.mark.parametrize('use_scipy', [True, False])
+def test_co_occurrence_matches_brute_force(monkeypatch, use_scipy):
+    if use_scipy:
+        pytest.importorskip('scipy')
+    else:
+        monkeypatch.setattr(recommendation_services, 'sparse', None)
+
+    for seed in range(5):
+        order_ids, product_ids = _random_orders(seed)
+        assert _as_counter(*co_occurrence(order_ids, product_ids)) == _brute_force(order_ids, product_ids)
+
+
+def test_top_k_keeps_the_most_co_ordered_per_product():
+    order_ids, product_ids = _random_orders(7)
+    pairs = _brute_force(order_ids, product_ids)
+    products, related, counts = (np.array(column, dtype=np.int64)
+                                 for column in zip(*((p, r, c) for (p, r), c in pairs.items())))
+
+    neighbours = top_k(products, related, counts, 3)
+
+    for product_id in set(products.tolist()):
+        expected = sorted(((r, c) for (p, r), c in pairs.items() if p == product_id),
+                          key=lambda pair: (-pair[1], pair[0]))[:3]
+        assert list(neighbours[product_id]) == expected
+
+
+def test_baskets_drop_lineless_events_and_bulk_orders():
+    service = RecommendationService(None, max_order_products=3)
+    rows = np.array([
+        (1, 10, 1), (1, 11, 1), (1, 10, 1),           # duplicate line counts once
+        (2, 0, 1),                                      # order without lines
+        (3, 10, -1), (3, 11, -1), (3, 12, -1), (3, 13, -1),  # bulk order
+        (4, 12, -1), (4, 13, -1),
+    ], dtype=np.int64)
+
+    event_ids, product_ids, signs = service._baskets(rows)
+
+    assert list(zip(event_ids.tolist(), product_ids.tolist(), signs.tolist())) == [
+        (1, 10, 1), (1, 11, 1), (4, 12, -1), (4, 13, -1)]
+
+
+def test_cancelled_orders_are_subtracted_from_the_pair_counts():
+    service = RecommendationService(None)
+    # Order A (10, 11) and order B (10, 12) are paid; A is cancelled later,
+    # and order C (10, 11) is paid after that
+    events = [(1, 10, 1), (1, 11, 1), (2, 10, 1), (2, 12, 1),
+              (3, 10, -1), (3, 11, -1), (4, 10, 1), (4, 11, 1)]
+    counts = Counter()
+    for batch in (events[:4], events[4:6], events[6:]):
+        rows = np.array(batch, dtype=np.int64)
+        for product_id, related_id, orders in service._count(*service._baskets(rows)):
+            counts[(product_id, related_id)] += orders
+
+    assert +counts == Counter({(10, 11): 1, (11, 10): 1, (10, 12): 1, (12, 10): 1})
+    # A paid and cancelled order in the same batch nets out to nothing
+    rows = np.array(events[:2] + events[4:6], dtype=np.int64)
+    assert service._count(*service._baskets(rows)) == []
+
+
+class QueueRepo:
+    """Holds queued events and pair counts in memory, like the tables behind DBRecommendationRepo."""
+
+    def __init__(self, events):
+        self.events = list(events)
+        self.pairs = Counter()
+
+    def lock_builder(self, name):
+        pass
+
+    def get_events(self, limit):
+        ids = sorted({event_id for event_id, _, _ in self.events})[:limit]
+        return [event for event in self.events if event[0] in ids]
+
+    def add_pairs(self, pairs, event_ids):
+        for product_id, related_id, orders in pairs:
+            self.pairs[(product_id, related_id)] += orders
+        self.events = [event for event in self.events if event[0] not in set(event_ids)]
+
+    def release(self):
+        pass
+
+
+def test_build_consumes_every_queued_event_in_batches():
+    order_ids, product_ids = _random_orders(11, orders=50)
+    repo = QueueRepo([(order_id, product_id, 1)
+                      for order_id, product_id in zip(order_ids.tolist(), product_ids.tolist())])
+    service = RecommendationService(repo, batch_size=7)
+
+    service.build()
+
+    assert repo.events == []
+    assert +repo.pairs == _brute_force(order_ids, product_ids)
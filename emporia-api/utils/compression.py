@@ -0,0 +1,126 @@
+import gzip
+from flask import request
+from utils.streaming import gzip_chunks
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+DEFAULT_MIMETYPES = [
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'application/javascript'
+]
+
+
+def brotli_chunks(chunks, quality=4):
+    """Incrementally brotli-compress a stream of str/bytes chunks."""
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class Compress:
+    """
+    Response compression for every blueprint.
+
+    Responses are gzip (or brotli, when the package is installed and the
+    client prefers it) encoded if their mimetype is in COMPRESS_MIMETYPES
+    and the body is at least COMPRESS_MIN_SIZE bytes. Streamed responses are
+    compressed chunk by chunk without buffering.
+
+    A strong ETag gets an encoding suffix ("<etag>-gzip") since the encoded
+    bytes differ from the identity ones. The suffix is removed from
+    incoming If-None-Match headers before the views see them, so the
+    conditional request handling in utils/http_cache keeps working
+    unchanged.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BR_LEVEL', 4)
+        app.config.setdefault('COMPRESS_ALGORITHMS', ['br', 'gzip'])
+
+        self.app = app
+        app.before_request(self._strip_if_none_match_suffixes)
+        app.after_request(self._compress_response)
+
+    def _algorithms(self):
+        return [algorithm for algorithm in self.app.config['COMPRESS_ALGORITHMS']
+                if algorithm == 'gzip' or (algorithm == 'br' and brotli is not None)]
+
+    def _negotiate(self):
+        return request.accept_encodings.best_match(self._algorithms())
+
+    def _strip_if_none_match_suffixes(self):
+        header = request.environ.get('HTTP_IF_NONE_MATCH')
+        if not header:
+            return
+
+        for algorithm in self._algorithms():
+            header = header.replace(f'-{algorithm}"', '"')
+        request.environ['HTTP_IF_NONE_MATCH'] = header
+
+    def _compress_response(self, response):
+        config = self.app.config
+
+        if response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if 'Content-Encoding' in response.headers or response.direct_passthrough:
+            return response
+
+        encoding = self._negotiate()
+        if not encoding:
+            return response
+
+        if response.status_code == 304:
+            # Echo the same variant ETag a 200 for this client would have carried
+            self._suffix_etag(response, encoding)
+            return response
+
+        if response.status_code < 200 or response.status_code >= 300 or response.status_code == 204:
+            return response
+
+        if response.is_streamed:
+            if encoding == 'br':
+                response.response = brotli_chunks(response.response, config['COMPRESS_BR_LEVEL'])
+            else:
+                response.response = gzip_chunks(response.response, config['COMPRESS_LEVEL'])
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESS_MIN_SIZE']:
+                return response
+
+            if encoding == 'br':
+                response.set_data(brotli.compress(data, quality=config['COMPRESS_BR_LEVEL']))
+            else:
+                response.set_data(gzip.compress(data, compresslevel=config['COMPRESS_LEVEL']))
+
+        response.headers['Content-Encoding'] = encoding
+        self._suffix_etag(response, encoding)
+        return response
+
+    def _suffix_etag(self, response, encoding):
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f'{etag}-{encoding}')
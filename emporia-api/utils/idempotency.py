@@ -0,0 +1,64 @@
+import hashlib
+from functools import wraps
+from flask import current_app, jsonify, request
+
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint():
+    """sha256 of the method, path and raw body of the current request"""
+    digest = hashlib.sha256()
+    digest.update(request.method.encode('utf-8'))
+    digest.update(b'\n')
+    digest.update(request.path.encode('utf-8'))
+    digest.update(b'\n')
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def idempotent(f):
+    """
+    Decorator making a customer endpoint safe to retry with an Idempotency-Key
+    header. Must be applied below role_required, as keys are scoped to the
+    customer. Responses below 500 are stored and replayed for the same key
+    (with Idempotent-Replayed: true); server errors release the key so the
+    request can be retried. Requests without the header run as usual.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return f(*args, **kwargs)
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({'message': f'Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters'}), 400
+
+        service = current_app.idempotency_service
+        customer_id = request.current_user.get('customer_id')
+        try:
+            claim = service.begin(customer_id, key, request_fingerprint())
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 500
+
+        if claim['state'] == 'mismatch':
+            return jsonify({'message': 'Idempotency-Key was already used with a different request'}), 422
+        if claim['state'] == 'in_progress':
+            return jsonify({'message': 'A request with this Idempotency-Key is still being processed'}), 409
+        if claim['state'] == 'completed':
+            response = jsonify(claim['body'])
+            response.status_code = claim['status_code']
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except Exception:
+            service.release(customer_id, key)
+            raise
+
+        if response.status_code >= 500 or not response.is_json:
+            service.release(customer_id, key)
+        else:
+            service.complete(customer_id, key, response.status_code, response.get_json())
+        return response
+    return decorated
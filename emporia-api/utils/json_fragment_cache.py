@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+
+
+class JSONFragmentCache:
+    """
+    Bounded LRU cache of pre-encoded JSON fragments keyed by (key, version).
+
+    A fragment is only returned when the stored version matches the one the
+    caller read from the database, so a stale fragment is never served even
+    when another worker changed the row. Explicit invalidation just frees the
+    entry early.
+    """
+
+    def __init__(self, dumps, max_entries=10000):
+        self.dumps = dumps
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, fragment):
+        with self._lock:
+            self._entries[key] = (version, fragment)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_encode(self, key, version, build):
+        """Return the cached fragment, or encode build() and cache the result."""
+        fragment = self.get(key, version)
+        if fragment is None:
+            fragment = self.dumps(build()).encode('utf-8')
+            self.put(key, version, fragment)
+        return fragment
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
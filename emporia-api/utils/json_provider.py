@@ -0,0 +1,70 @@
+import dataclasses
+import decimal
+import json
+import os
+import uuid
+from datetime import date, datetime, time
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is used without it
+    orjson = None
+
+
+def _default(o):
+    """Encode the non-JSON types our rows and models carry."""
+    if isinstance(o, decimal.Decimal):
+        # MySQL DECIMAL prices; the UI treats prices as numbers
+        return float(o)
+
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+
+    if isinstance(o, uuid.UUID):
+        return str(o)
+
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider used by jsonify and every blueprint.
+
+    Encodes with orjson when it is installed (or the stdlib json module
+    otherwise), serializing Decimal as a number and dates as ISO 8601 on
+    both backends so responses look the same whichever one is active.
+    Set JSON_BACKEND=json to force the stdlib encoder.
+    """
+
+    sort_keys = False
+    ensure_ascii = False
+
+    def __init__(self, app, backend=None):
+        super().__init__(app)
+        backend = backend or os.getenv('JSON_BACKEND', 'orjson')
+        self.use_orjson = backend == 'orjson' and orjson is not None
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and set(kwargs) <= {'indent', 'separators'}:
+            option = orjson.OPT_NON_STR_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_default, option=option).decode('utf-8')
+
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
@@ -0,0 +1,166 @@
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from command.order_invoker import OrderInvoker
+
+try:
+    import resource
+except ImportError:  # resource is Unix-only; max_rss is reported as None without it
+    resource = None
+
+# Allocations made by the diagnostics themselves are noise in every report
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+GROUP_BY = ('lineno', 'filename', 'traceback')
+
+
+def current_rss():
+    """Resident set size of this process in bytes (0 where /proc is unavailable)."""
+    if resource is None:
+        return 0
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def max_rss():
+    """Peak resident set size of this process in bytes, or None where it is unavailable."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _format_stat(stat):
+    frames = [{'file': frame.filename, 'line': frame.lineno} for frame in stat.traceback]
+    entry = {'size': stat.size, 'count': stat.count, 'frames': frames}
+    if hasattr(stat, 'size_diff'):
+        entry['size_diff'] = stat.size_diff
+        entry['count_diff'] = stat.count_diff
+    return entry
+
+
+class MemoryDiagnostics:
+    """
+    tracemalloc snapshots, snapshot diffs and live object counts for one
+    worker process. Only the newest max_snapshots snapshots are kept since
+    each holds every traced allocation.
+    """
+
+    def __init__(self, tracked_classes, max_snapshots=4, frames=10):
+        self.tracked_classes = list(tracked_classes)
+        self.max_snapshots = max_snapshots
+        self.frames = frames
+        self._snapshots = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def status(self):
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            'pid': os.getpid(),
+            'tracing': tracemalloc.is_tracing(),
+            'frames': tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else 0,
+            'traced_current': current,
+            'traced_peak': peak,
+            'rss': current_rss(),
+            'max_rss': max_rss(),
+            'snapshots': [self._describe(snapshot_id) for snapshot_id in list(self._snapshots)],
+        }
+
+    def start(self, frames=None):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or self.frames)
+        return self.status()
+
+    def stop(self):
+        # Stopping tracemalloc frees its traces; stored snapshots stay usable
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return self.status()
+
+    def take_snapshot(self):
+        if not tracemalloc.is_tracing():
+            raise ValueError("tracemalloc is not tracing, start it first")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        summary = {
+            'taken_at': time.time(),
+            'size': sum(trace.size for trace in snapshot.traces),
+            'blocks': len(snapshot.traces),
+        }
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = (summary, snapshot)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return self._describe(snapshot_id)
+
+    def _describe(self, snapshot_id):
+        return {'id': snapshot_id, **self._snapshots[snapshot_id][0]}
+
+    def _get(self, snapshot_id):
+        try:
+            return self._snapshots[int(snapshot_id)][1]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Snapshot {snapshot_id} not found")
+
+    def _check_group_by(self, group_by):
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY)}")
+
+    def top(self, snapshot_id, limit=25, group_by='lineno'):
+        """Largest allocation sites of one snapshot."""
+        self._check_group_by(group_by)
+        stats = self._get(snapshot_id).statistics(group_by)
+        return {**self._describe(int(snapshot_id)),
+                'top': [_format_stat(stat) for stat in stats[:limit]]}
+
+    def diff(self, from_id, to_id, limit=25, group_by='lineno'):
+        """Allocation sites that grew (or shrank) the most between two snapshots."""
+        self._check_group_by(group_by)
+        stats = self._get(to_id).compare_to(self._get(from_id), group_by)
+        return {
+            'from': self._describe(int(from_id)),
+            'to': self._describe(int(to_id)),
+            'size_diff': sum(stat.size_diff for stat in stats),
+            'top': [_format_stat(stat) for stat in stats[:limit]],
+        }
+
+    def object_counts(self):
+        """
+        Live instances of the tracked classes (subclasses count toward their
+        own class), plus the number of commands held by OrderInvoker histories.
+        """
+        counts = {cls.__name__: 0 for cls in self.tracked_classes}
+        tracked = tuple(self.tracked_classes)
+        invokers = 0
+        invoker_history = 0
+
+        gc.collect()
+        for obj in gc.get_objects():
+            if isinstance(obj, tracked):
+                name = type(obj).__name__
+                counts[name] = counts.get(name, 0) + 1
+            elif isinstance(obj, OrderInvoker):
+                invokers += 1
+                invoker_history += len(obj.command_history)
+
+        return {
+            'pid': os.getpid(),
+            'rss': current_rss(),
+            'objects': counts,
+            'order_invokers': invokers,
+            'order_invoker_history': invoker_history,
+            'gc_counts': gc.get_count(),
+        }
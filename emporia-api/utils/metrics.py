@@ -0,0 +1,193 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+SQL_OPERATIONS = {'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE'}
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                yield (f'{self.name}_bucket',
+                       _format_labels(self.labelnames, key, ('le', _format_value(bound))),
+                       cumulative)
+            yield f'{self.name}_count', _format_labels(self.labelnames, key), cumulative
+            yield f'{self.name}_sum', _format_labels(self.labelnames, key), series[-1]
+
+
+class CallbackMetric:
+    """A gauge or counter whose samples are read from a callback at scrape time."""
+
+    def __init__(self, name, help, labelnames, callback, type='gauge'):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.type = type
+
+    def samples(self):
+        for key, value in self.callback().items():
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text exposition format.
+    Updates take a single uncontended lock, so collection is cheap enough to
+    leave on. Each worker process exposes its own series.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, labelnames, callback, type='gauge'):
+        return self.register(CallbackMetric(name, help, labelnames, callback, type))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            try:
+                for name, labels, value in metric.samples():
+                    lines.append(f'{name}{labels} {_format_value(value)}')
+            except Exception:
+                # A failing callback must not break the whole scrape
+                continue
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    'emporia_http_requests_total', 'HTTP requests by route and status code',
+    ['blueprint', 'endpoint', 'method', 'status'])
+HTTP_LATENCY = registry.histogram(
+    'emporia_http_request_duration_seconds', 'HTTP request latency',
+    ['blueprint', 'endpoint', 'method'])
+DB_QUERIES = registry.counter(
+    'emporia_db_queries_total', 'SQL statements executed',
+    ['operation', 'outcome'])
+DB_QUERY_LATENCY = registry.histogram(
+    'emporia_db_query_duration_seconds', 'SQL statement latency',
+    ['operation'], buckets=DB_BUCKETS)
+CHECKOUTS = registry.counter(
+    'emporia_checkouts_total', 'Order placements by outcome',
+    ['outcome'])
+CHECKOUT_STEP_LATENCY = registry.histogram(
+    'emporia_checkout_step_duration_seconds', 'Duration of each order saga step',
+    ['step', 'outcome'])
+
+
+def observe_query(operation, duration, error):
+    """Query observer for DatabaseConnection.add_query_observer."""
+    keyword = operation.lstrip(' \n\t(').split(None, 1)[0].upper() if operation else ''
+    keyword = keyword if keyword in SQL_OPERATIONS else 'OTHER'
+
+    DB_QUERIES.inc(operation=keyword, outcome='error' if error else 'ok')
+    DB_QUERY_LATENCY.observe(duration, operation=keyword)
+
+
+def init_app(app):
+    """Record request counts and latency for every blueprint."""
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started_at = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started_at = g.pop('metrics_started_at', None)
+        if started_at is None:
+            return response
+
+        blueprint = request.blueprint or ''
+        endpoint = request.endpoint or 'unmatched'
+        HTTP_REQUESTS.inc(blueprint=blueprint, endpoint=endpoint,
+                          method=request.method, status=response.status_code)
+        HTTP_LATENCY.observe(time.perf_counter() - started_at, blueprint=blueprint,
+                             endpoint=endpoint, method=request.method)
+        return response
@@ -0,0 +1,151 @@
+import cProfile
+import hashlib
+import hmac
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from flask import g, request
+
+PROFILE_NAME = re.compile(r'^[\w.-]+\.pstats$')
+
+
+class RequestProfiler:
+    """
+    Opt-in cProfile capture of single live requests.
+
+    A request is profiled when it carries a valid X-Profile token (issued to
+    admins by issue_token) or is picked by PROFILE_SAMPLE_RATE. The profile is
+    written to PROFILE_DIR as a .pstats file and its name returned in the
+    X-Profile-ID response header. Only one request is profiled at a time;
+    concurrent candidates are served unprofiled.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILE_DIR', 'profiles')
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_MAX_FILES', 50)
+        app.config.setdefault('PROFILE_TOKEN_MAX_TTL', 3600)
+
+        self.app = app
+        app.before_request(self._start)
+        app.after_request(self._stop)
+        app.teardown_request(self._discard)
+
+    @property
+    def directory(self):
+        return self.app.config['PROFILE_DIR']
+
+    def _secret(self):
+        secret = self.app.config.get('PROFILE_SECRET') or self.app.config.get('SECRET_KEY')
+        if not secret:
+            raise ValueError("PROFILE_SECRET or SECRET_KEY must be set to sign profile tokens")
+        return secret.encode('utf-8')
+
+    def _sign(self, expires):
+        return hmac.new(self._secret(), f'profile:{expires}'.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def issue_token(self, ttl=300):
+        """Return an X-Profile header value valid for ttl seconds."""
+        ttl = max(1, min(int(ttl), self.app.config['PROFILE_TOKEN_MAX_TTL']))
+        expires = int(time.time()) + ttl
+        return {'token': f'{expires}.{self._sign(expires)}', 'expires_at': expires}
+
+    def verify_token(self, token):
+        try:
+            expires, signature = token.split('.', 1)
+            expires = int(expires)
+        except (AttributeError, ValueError):
+            return False
+        if expires < time.time():
+            return False
+        try:
+            return hmac.compare_digest(signature, self._sign(expires))
+        except ValueError:
+            return False
+
+    def _wanted(self):
+        token = request.headers.get('X-Profile')
+        if token:
+            return self.verify_token(token)
+        rate = float(self.app.config['PROFILE_SAMPLE_RATE'])
+        return rate > 0 and random.random() < rate
+
+    def _start(self):
+        if not self._wanted() or not self._lock.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        g.request_profile = profile
+        profile.enable()
+
+    def _stop(self, response):
+        profile = g.pop('request_profile', None)
+        if profile is None:
+            return response
+        try:
+            profile.disable()
+            response.headers['X-Profile-ID'] = self._save(profile)
+        finally:
+            self._lock.release()
+        return response
+
+    def _discard(self, error=None):
+        # The handler raised before after_request ran
+        profile = g.pop('request_profile', None)
+        if profile is not None:
+            profile.disable()
+            self._lock.release()
+
+    def _save(self, profile):
+        os.makedirs(self.directory, exist_ok=True)
+        endpoint = re.sub(r'[^\w-]', '_', request.endpoint or 'unmatched')
+        # The request id may come from the client, keep it filename-safe
+        tag = re.sub(r'[^\w-]', '_', g.get('request_id') or uuid.uuid4().hex)[:32]
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{request.method}-{endpoint}-{tag}.pstats"
+        profile.dump_stats(os.path.join(self.directory, name))
+        self._prune()
+        return name
+
+    def _prune(self):
+        profiles = self.list_profiles()
+        for stale in profiles[self.app.config['PROFILE_MAX_FILES']:]:
+            try:
+                os.remove(os.path.join(self.directory, stale['name']))
+            except OSError:
+                pass
+
+    def list_profiles(self):
+        """Stored profiles, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and PROFILE_NAME.match(entry.name):
+                stat = entry.stat()
+                profiles.append({'name': entry.name, 'size': stat.st_size, 'created_at': stat.st_mtime})
+        profiles.sort(key=lambda profile: profile['created_at'], reverse=True)
+        return profiles
+
+    def profile_path(self, name):
+        if not PROFILE_NAME.match(name or ''):
+            raise ValueError("Invalid profile name")
+        path = os.path.join(self.directory, name)
+        if not os.path.isfile(path):
+            raise ValueError("Profile not found")
+        return path
+
+    def summary(self, name, sort='cumulative', limit=50):
+        """Text report of a stored profile, as printed by pstats."""
+        output = io.StringIO()
+        stats = pstats.Stats(self.profile_path(name), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
@@ -0,0 +1,73 @@
+import csv
+import io
+import itertools
+import logging
+import zlib
+from flask import Response, current_app, stream_with_context
+
+logger = logging.getLogger(__name__)
+
+
+def stream_json_array(key, items):
+    """
+    Stream {"<key>": [...]} one element at a time so large listings are
+    never held in memory as a single list or encoded string.
+
+    The first item is read before the response is built, so a failing query
+    raises here and can still be answered with an error status. A failure
+    after the headers are sent closes the array and adds an "error" member,
+    so clients can tell a truncated listing from a complete one.
+    """
+    items = iter(items)
+    first = list(itertools.islice(items, 1))
+
+    def generate():
+        yield '{"%s":[' % key
+        try:
+            for index, item in enumerate(itertools.chain(first, items)):
+                if index:
+                    yield ','
+                yield current_app.json.dumps(item)
+        except Exception as e:
+            logger.exception("Streaming %s failed: %s", key, e)
+            yield '],"error":%s}' % current_app.json.dumps(f"Listing truncated: {str(e)}")
+            return
+        yield ']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def ndjson_lines(items):
+    """Encode each item as one line of newline-delimited JSON."""
+    for item in items:
+        yield current_app.json.dumps(item) + '\n'
+
+
+def csv_lines(items, fieldnames):
+    """Encode items as CSV, emitting the header and then one row per item."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+
+    writer.writeheader()
+    for item in items:
+        writer.writerow(item)
+        # Hand over whatever the writer produced and reuse the buffer
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining
+
+
+def gzip_chunks(chunks, level=6):
+    """Incrementally gzip a stream of str/bytes chunks."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,387 @@
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """A single timed operation within a trace."""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'kind',
+                 'start_ns', 'end_ns', 'attributes', 'status', 'status_message')
+
+    def __init__(self, trace_id, parent_id, name, kind=SPAN_KIND_INTERNAL, attributes=None, start_ns=None):
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status = None
+        self.status_message = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'attributes': self.attributes,
+            'status': 'error' if self.status == STATUS_ERROR else 'ok',
+            'status_message': self.status_message,
+        }
+
+
+class JSONLinesExporter:
+    """Append finished spans to a local file, one JSON object per line."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans):
+        with open(self.path, 'a', encoding='utf-8') as trace_file:
+            for span in spans:
+                trace_file.write(json.dumps(span.to_dict(), default=str) + '\n')
+
+
+class OTLPHTTPExporter:
+    """
+    POST finished spans as OTLP/JSON to a collector's /v1/traces endpoint.
+    """
+
+    def __init__(self, endpoint, service_name='emporia-api', timeout=5):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans):
+        body = json.dumps(self._encode(spans), default=str).encode('utf-8')
+        req = urllib.request.Request(self.endpoint, data=body, method='POST',
+                                     headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            response.read()
+
+    def _encode(self, spans):
+        return {'resourceSpans': [{
+            'resource': {'attributes': self._attributes({'service.name': self.service_name})},
+            'scopeSpans': [{
+                'scope': {'name': 'emporia.tracing'},
+                'spans': [self._encode_span(span) for span in spans],
+            }],
+        }]}
+
+    def _encode_span(self, span):
+        encoded = {
+            'traceId': span.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': span.kind,
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': self._attributes(span.attributes),
+            'status': {'code': span.status or STATUS_OK},
+        }
+        if span.parent_id:
+            encoded['parentSpanId'] = span.parent_id
+        if span.status_message:
+            encoded['status']['message'] = span.status_message
+        return encoded
+
+    def _attributes(self, attributes):
+        encoded = []
+        for key, value in attributes.items():
+            if isinstance(value, bool):
+                encoded.append({'key': key, 'value': {'boolValue': value}})
+            elif isinstance(value, int):
+                encoded.append({'key': key, 'value': {'intValue': str(value)}})
+            elif isinstance(value, float):
+                encoded.append({'key': key, 'value': {'doubleValue': value}})
+            else:
+                encoded.append({'key': key, 'value': {'stringValue': str(value)}})
+        return encoded
+
+
+class BatchSpanProcessor:
+    """
+    Queue finished spans and hand them to the exporter in batches from a
+    background thread. Spans are dropped, not waited on, when the queue is full.
+    """
+
+    def __init__(self, exporter, max_queue_size=2048, batch_size=512, interval=2.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+        self._thread.start()
+
+    def on_end(self, span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._stopped.wait(self.interval)
+            self.flush()
+
+    def flush(self):
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            try:
+                self.exporter.export(batch)
+            except Exception as e:
+                logger.warning("Failed to export %d spans: %s", len(batch), e)
+
+    def shutdown(self):
+        self._stopped.set()
+        self._thread.join(timeout=self.interval + 1)
+        self.flush()
+
+
+class Tracer:
+    """
+    Creates spans and tracks the active one per request/thread. Until a
+    processor is configured every call is a cheap no-op.
+    """
+
+    def __init__(self):
+        self.processor = None
+        self.sample_rate = 0.0
+
+    @property
+    def enabled(self):
+        return self.processor is not None
+
+    def configure(self, processor, sample_rate):
+        self.processor = processor
+        self.sample_rate = sample_rate
+
+    def current_span(self):
+        return _current_span.get()
+
+    def should_sample(self, trace_id):
+        # Decide on the trace id so every service sharing it agrees
+        return int(trace_id[:16], 16) < self.sample_rate * (1 << 64)
+
+    def start_trace(self, name, kind=SPAN_KIND_SERVER, attributes=None, trace_id=None, parent_id=None, sampled=None):
+        """
+        Start a root span (or continue a remote parent) and make it current.
+        Returns a token for end_span, or None when the trace is not sampled.
+        """
+        if not self.enabled:
+            return None
+        trace_id = trace_id or '%032x' % random.getrandbits(128)
+        if sampled is None:
+            sampled = self.should_sample(trace_id)
+        if not sampled:
+            return None
+        span = Span(trace_id, parent_id, name, kind, attributes)
+        return span, _current_span.set(span)
+
+    def start_span(self, name, kind=SPAN_KIND_INTERNAL, attributes=None):
+        """
+        Start a child of the current span and make it current. Returns None
+        when there is no sampled span to attach to.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        span = Span(parent.trace_id, parent.span_id, name, kind, attributes)
+        return span, _current_span.set(span)
+
+    def end_span(self, started, error=None):
+        if started is None:
+            return
+        span, token = started
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.record_error(error)
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Ended from a different context (e.g. after a streamed response)
+            _current_span.set(None)
+        self.processor.on_end(span)
+
+    def record_span(self, name, duration, kind=SPAN_KIND_INTERNAL, attributes=None, error=None):
+        """Record an already finished child span lasting `duration` seconds."""
+        parent = _current_span.get()
+        if parent is None:
+            return
+        end_ns = time.time_ns()
+        span = Span(parent.trace_id, parent.span_id, name, kind, attributes,
+                    start_ns=end_ns - int(duration * 1e9))
+        span.end_ns = end_ns
+        if error is not None:
+            span.record_error(error)
+        self.processor.on_end(span)
+
+    def span(self, name, kind=SPAN_KIND_INTERNAL, attributes=None):
+        return _SpanContext(self, name, kind, attributes)
+
+
+class _SpanContext:
+
+    def __init__(self, tracer, name, kind, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.started = None
+
+    def __enter__(self):
+        self.started = self.tracer.start_span(self.name, self.kind, self.attributes)
+        return self.started[0] if self.started else None
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.end_span(self.started, exc)
+        return False
+
+
+tracer = Tracer()
+
+
+def traced(name=None):
+    """Decorator: run the function inside a child span of the current span."""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_methods(cls):
+    """
+    Class decorator: trace every public method. Generator methods are left
+    alone because their body runs after the call returns, outside the span.
+    """
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith('_') or not inspect.isfunction(value) or inspect.isgeneratorfunction(value):
+            continue
+        setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+
+def observe_query(operation, duration, error):
+    """Query observer for DatabaseConnection.add_query_observer."""
+    if _current_span.get() is None:
+        return
+    statement = ' '.join(operation.split()) if operation else ''
+    keyword = statement.split(' ', 1)[0].upper() if statement else 'SQL'
+    tracer.record_span(f"SQL {keyword}", duration, SPAN_KIND_CLIENT,
+                       {'db.system': 'mysql', 'db.statement': statement[:500]}, error)
+
+
+def _parse_traceparent(header):
+    # W3C trace context: version-traceid-parentid-flags
+    parts = (header or '').split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def build_exporter():
+    """Exporter selected by TRACE_EXPORTER: 'file', 'otlp' or 'none' (default)."""
+    kind = os.getenv('TRACE_EXPORTER', 'none').lower()
+    if kind == 'file':
+        return JSONLinesExporter(os.getenv('TRACE_FILE', 'traces.jsonl'))
+    if kind == 'otlp':
+        return OTLPHTTPExporter(os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces'))
+    return None
+
+
+def init_app(app, exporter=None):
+    """
+    Start a server span for every request and export sampled traces.
+    TRACE_SAMPLE_RATE is the fraction of new traces kept (default 0.1);
+    an incoming `traceparent` header decides for the traces it continues.
+    """
+    exporter = exporter or build_exporter()
+    if exporter is None:
+        return None
+
+    processor = BatchSpanProcessor(exporter)
+    atexit.register(processor.shutdown)
+    tracer.configure(processor, float(os.getenv('TRACE_SAMPLE_RATE', 0.1)))
+
+    @app.before_request
+    def _start_request_span():
+        remote = _parse_traceparent(request.headers.get('traceparent'))
+        trace_id, parent_id, sampled = remote or (None, None, None)
+        g.trace_span = tracer.start_trace(
+            f"{request.method} {request.endpoint or 'unmatched'}",
+            attributes={'http.method': request.method, 'http.target': request.path},
+            trace_id=trace_id, parent_id=parent_id, sampled=sampled)
+
+    @app.after_request
+    def _tag_request_span(response):
+        started = g.get('trace_span')
+        if started is not None:
+            span = started[0]
+            span.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                span.status = STATUS_ERROR
+            response.headers['X-Trace-ID'] = span.trace_id
+        return response
+
+    @app.teardown_request
+    def _end_request_span(error=None):
+        tracer.end_span(g.pop('trace_span', None), error)
+
+    return processor